@@ -0,0 +1,338 @@
+"""
+Throughput and latency benchmark for the UI components.
+
+    python -m benchmarks.components [--rates 100,1000,5000] [--duration 3]
+    python -m benchmarks.components --compare old.json new.json
+
+Each component is fed synthetic bursts from a producer thread, the way the
+socket thread feeds it, while Tk runs its main loop. Latency is measured
+from message receipt (before the feed's on_message) to the end of the
+frame that drew it, after update_idletasks() has pushed the change to the
+screen. A rate is "sustainable" when the producer kept up and the p99
+latency stayed within --budget. Memory growth is the RSS change over a
+component's runs.
+
+Each component is attached to an engine feed whose on_message is called
+directly instead of from a started hub, so no network is used. Without a
+DISPLAY an Xvfb server is started if available (or run the whole thing
+under xvfb-run).
+"""
+import os
+import gc
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import threading
+import subprocess
+import numpy as np
+from config import *
+from core.decoder import default_decoder
+
+DEFAULT_RATES = [10, 100, 1000, 5000, 20000]
+
+def ensure_display():
+    """Make sure Tk has a display, starting Xvfb when there is none. Returns the Xvfb process or None."""
+    if os.environ.get("DISPLAY"):
+        return None
+    if not shutil.which("Xvfb"):
+        sys.exit("No DISPLAY and Xvfb is not installed; install it or run under xvfb-run")
+    display = f":{90 + os.getpid() % 100}"
+    process = subprocess.Popen(["Xvfb", display, "-screen", "0", "1600x1000x24", "-nolisten", "tcp"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.environ["DISPLAY"] = display
+    time.sleep(1)
+    return process
+
+def rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if len(values) else None
+
+# --- Synthetic messages (decoded the way the hub decodes them) ---
+
+def typed(schema, stream, data):
+    decoder = default_decoder()
+    _, payload = decoder.decode(json.dumps({"stream": stream, "data": data}))
+    return decoder.view(payload, schema)
+
+def ticker_messages(rng):
+    price = 67000.0
+    while True:
+        price += rng.normal(0, 5)
+        yield typed("ticker", "btcusdt@ticker", {"c": f"{price:.2f}", "p": f"{price - 67000:.2f}",
+                                                  "P": f"{(price - 67000) / 670:.3f}", "q": "1625018234.12"})
+
+def depth_messages(rng, levels=20):
+    update_id = 1000
+    while True:
+        bids = [[f"{67000 - rng.integers(0, 500) * 0.01:.2f}", f"{rng.random() * 2:.8f}"] for _ in range(levels)]
+        asks = [[f"{67000.01 + rng.integers(0, 500) * 0.01:.2f}", f"{rng.random() * 2:.8f}"] for _ in range(levels)]
+        yield typed("depth", "btcusdt@depth@100ms", {"U": update_id + 1, "u": update_id + 10, "b": bids, "a": asks})
+        update_id += 10
+
+def trade_messages(rng):
+    trade_id = 0
+    while True:
+        trade_id += 1
+        yield typed("trade", "btcusdt@trade", {"T": int(time.time() * 1000), "p": f"{67000 + rng.normal(0, 5):.2f}",
+                                                "q": f"{rng.random():.5f}", "m": bool(rng.random() < 0.5), "t": trade_id})
+
+def kline_messages(rng, start, step=60000):
+    open_time, price, n = start, 67000.0, 0
+    while True:
+        n += 1
+        if n % 500 == 0:
+            open_time += step # Roll to a new candle now and then
+        price += rng.normal(0, 5)
+        yield {"k": {"t": open_time, "o": "67000", "h": f"{price + 10:.2f}", "l": f"{price - 10:.2f}",
+                     "c": f"{price:.2f}", "v": "12.5", "x": False}}
+
+# --- Harness ---
+
+class Probe:
+    """Receipt timestamps of messages handed to a component, claimed by the next frame."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.received = []
+        self.latencies = []
+
+    def receive(self, timestamp):
+        with self.lock:
+            self.received.append(timestamp)
+
+    def take(self):
+        with self.lock:
+            received, self.received = self.received, []
+        return received
+
+def make_render_loop(root, probe):
+    from components.render_loop import RenderLoop
+
+    class TimedRenderLoop(RenderLoop):
+        def flush(self):
+            # Everything received so far was submitted before this swap
+            received = probe.take()
+            super().flush()
+            if received:
+                self.root.update_idletasks()
+                done = time.perf_counter()
+                probe.latencies.extend(done - t for t in received)
+
+    loop = TimedRenderLoop(root)
+    loop.start()
+    return loop
+
+def build(name, frame, render_loop):
+    """
+    Create a component over a feed that is driven directly (the hub is never
+    started); returns (component, feed, message generator).
+    """
+    from core.engine import MarketEngine, TickerFeed, BookFeed, TradeFeed, KlineFeed
+    engine = MarketEngine()
+    rng = np.random.default_rng(1)
+    if name == "ticker":
+        from components.ticker import CryptoTicker
+        component = CryptoTicker(frame, "btcusdt", "BTC/USDT", engine=engine, render_loop=render_loop)
+        feed = TickerFeed(engine, "btcusdt")
+        messages = ticker_messages(rng)
+
+    elif name == "orderbook":
+        from components.orderbook import OrderBookPanel
+        from core.local_book import LocalOrderBook
+
+        class SeededBook(LocalOrderBook):
+            def fetch_snapshot(self):
+                return {"lastUpdateId": 1000,
+                        "bids": [[f"{67000 - i * 0.01:.2f}", "1.0"] for i in range(DEPTH_SNAPSHOT_LIMIT)],
+                        "asks": [[f"{67000.01 + i * 0.01:.2f}", "1.0"] for i in range(DEPTH_SNAPSHOT_LIMIT)]}
+
+        component = OrderBookPanel(frame, "btcusdt", engine=engine, render_loop=render_loop)
+        feed = BookFeed(engine, "btcusdt")
+        feed.book = SeededBook("btcusdt", on_sync=feed.on_sync)
+        feed.book.reset()
+        while not feed.book.is_synced:
+            time.sleep(0.01)
+        messages = depth_messages(rng)
+
+    elif name == "trades":
+        from components.trades import TradesPanel
+        component = TradesPanel(frame, "btcusdt", engine=engine, render_loop=render_loop)
+        feed = TradeFeed(engine, "btcusdt")
+        messages = trade_messages(rng)
+
+    elif name == "chart":
+        from components.chart import ChartPanel
+        component = ChartPanel(frame, "btcusdt", engine=engine, render_loop=render_loop)
+        feed = KlineFeed(engine, "btcusdt")
+        n, step = 5000, 60000
+        start = (int(time.time() * 1000) // step - n) * step
+        close = 67000 + np.cumsum(rng.normal(0, 20, n))
+        candles = np.column_stack([start + np.arange(n) * step, close, close + 15, close - 15, close, rng.random(n) * 100])
+        feed.series.load_array(candles)
+        feed.history_loaded = True
+        messages = kline_messages(rng, int(candles[-1, 0]), step)
+
+    else:
+        raise ValueError(f"Unknown component {name!r}")
+
+    feed.is_active = True
+    component.is_active = True
+    component.attach(feed)
+    return component, feed, messages
+
+def run_rate(root, feed, messages, probe, rate, duration):
+    """Feed `rate` msg/s for `duration` s; returns the measurements."""
+    probe.latencies = []
+    batch = [next(messages) for _ in range(min(int(rate * duration), 200000))]
+    sent = 0
+    finished = threading.Event()
+
+    def produce():
+        nonlocal sent
+        start = time.perf_counter()
+        while sent < len(batch):
+            due = min(int((time.perf_counter() - start) * rate) + 1, len(batch))
+            while sent < due:
+                received = time.perf_counter()
+                feed.on_message(batch[sent])
+                probe.receive(received)
+                sent += 1
+            time.sleep(0.001)
+        finished.set()
+
+    started = time.perf_counter()
+    threading.Thread(target=produce, daemon=True).start()
+
+    # Run the Tk loop until the producer is done and the last frame drained
+    def check():
+        if finished.is_set() and not probe.received:
+            root.quit()
+        else:
+            root.after(10, check)
+    root.after(10, check)
+    root.mainloop()
+    elapsed = time.perf_counter() - started
+
+    latencies = np.array(probe.latencies) * 1000
+    return {
+        "rate": rate,
+        "messages": sent,
+        "achieved_rate": sent / elapsed,
+        "p50_ms": percentile(latencies, 50),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": float(latencies.max()) if len(latencies) else None,
+    }
+
+def bench_component(root, name, rates, duration, budget_ms):
+    import tkinter as tk
+    probe = Probe()
+    render_loop = make_render_loop(root, probe)
+    frame = tk.Frame(root)
+    frame.pack(fill=tk.BOTH, expand=True)
+
+    gc.collect()
+    rss_start = rss_mb()
+    component, feed, messages = build(name, frame, render_loop)
+    root.update()
+
+    runs = []
+    max_rate = 0
+    for rate in rates:
+        result = run_rate(root, feed, messages, probe, rate, duration)
+        result["sustained"] = (result["achieved_rate"] >= 0.95 * rate
+                               and result["p99_ms"] is not None and result["p99_ms"] <= budget_ms)
+        runs.append(result)
+        print(f"  {name:<10} {rate:>7,}/s  p50 {result['p50_ms'] or 0:7.2f} ms  p99 {result['p99_ms'] or 0:7.2f} ms  "
+              f"achieved {result['achieved_rate']:>9,.0f}/s  {'ok' if result['sustained'] else 'BEHIND'}")
+        if not result["sustained"]:
+            break # Higher rates will only fall further behind
+        max_rate = rate
+
+    gc.collect()
+    rss_end = rss_mb()
+    feed.is_active = component.is_active = False
+    render_loop.stop()
+    frame.destroy()
+    return {"runs": runs, "max_sustainable_rate": max_rate, "memory_growth_mb": rss_end - rss_start}
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "json_backend": default_decoder().backend,
+        "ui_fps": UI_FPS,
+    }
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{old['environment']['commit'] or old_path} -> {new['environment']['commit'] or new_path}")
+    for name, result in new["components"].items():
+        before = old["components"].get(name)
+        if before is None:
+            continue
+        print(f"{name}: max rate {before['max_sustainable_rate']:,} -> {result['max_sustainable_rate']:,}/s, "
+              f"memory {before['memory_growth_mb']:+.1f} -> {result['memory_growth_mb']:+.1f} MB")
+        old_runs = {r["rate"]: r for r in before["runs"]}
+        for run in result["runs"]:
+            prev = old_runs.get(run["rate"])
+            if prev and prev["p99_ms"] and run["p99_ms"]:
+                change = (run["p99_ms"] - prev["p99_ms"]) / prev["p99_ms"]
+                print(f"  {run['rate']:>7,}/s  p99 {prev['p99_ms']:7.2f} -> {run['p99_ms']:7.2f} ms ({change:+.0%})")
+
+def main():
+    parser = argparse.ArgumentParser(description="Component throughput / latency benchmark")
+    parser.add_argument("--components", default="ticker,orderbook,trades,chart")
+    parser.add_argument("--rates", default=",".join(map(str, DEFAULT_RATES)), help="messages per second to try, ascending")
+    parser.add_argument("--duration", type=float, default=3.0, help="seconds per rate")
+    parser.add_argument("--budget", type=float, default=100.0, help="p99 latency (ms) a sustainable rate must stay under")
+    parser.add_argument("--out", help="result file (default: benchmarks/results/components-<time>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    xvfb = ensure_display()
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+        root.geometry("1200x800")
+        rates = [int(r) for r in args.rates.split(",")]
+        results = {"environment": environment(), "components": {}}
+        for name in args.components.split(","):
+            results["components"][name] = bench_component(root, name, rates, args.duration, args.budget)
+        root.destroy()
+    finally:
+        if xvfb:
+            xvfb.terminate()
+
+    out = args.out or os.path.join("benchmarks", "results", f"components-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Saved {out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Micro-benchmark for the stream decoder.
+
+    python -m benchmarks.decode [--seconds 1.0]
+
+For every available backend (msgspec, orjson, json) it measures messages per
+second for three representative frames, decoding them the way the hub does
+and reading the fields the components read. "baseline" is the previous hot
+path: json.loads on the whole frame plus float() on each field.
+"""
+import argparse
+import json
+import time
+from core.decoder import BACKENDS, MessageDecoder
+
+FRAMES = {
+    "trade": json.dumps({"stream": "btcusdt@trade", "data": {
+        "e": "trade", "E": 1700000000123, "s": "BTCUSDT", "t": 3281723561, "p": "67012.34000000",
+        "q": "0.01250000", "b": 24917372716, "a": 24917372802, "T": 1700000000122, "m": True, "M": True}}),
+    "depth": json.dumps({"stream": "btcusdt@depth@100ms", "data": {
+        "e": "depthUpdate", "E": 1700000000123, "s": "BTCUSDT", "U": 41038261001, "u": 41038261040,
+        "b": [[f"{67000 - i * 0.01:.2f}", f"{0.1 + i * 0.013:.8f}"] for i in range(20)],
+        "a": [[f"{67000.01 + i * 0.01:.2f}", f"{0.2 + i * 0.011:.8f}"] for i in range(20)]}}),
+    "ticker": json.dumps({"stream": "btcusdt@ticker", "data": {
+        "e": "24hrTicker", "E": 1700000000123, "s": "BTCUSDT", "p": "-812.55000000", "P": "-1.198",
+        "w": "67431.21", "x": "67824.89", "c": "67012.34", "Q": "0.0125", "b": "67012.33", "B": "1.2",
+        "a": "67012.34", "A": "0.8", "o": "67824.89", "h": "68210.00", "l": "66650.12", "v": "24101.5",
+        "q": "1625018234.12", "O": 1699913600123, "C": 1700000000123, "F": 3280000000, "L": 3281723561, "n": 1723562}}),
+}
+
+def read_typed(schema, event):
+    # The fields the components actually use
+    if schema == "trade":
+        return event.time, event.price, event.qty, event.is_buyer_maker
+    if schema == "depth":
+        return event.first_id, event.last_id, event.bids, event.asks
+    return event.price, event.change, event.change_pct, event.quote_volume
+
+def read_baseline(schema, message):
+    data = json.loads(message)["data"]
+    if schema == "trade":
+        return data["T"], float(data["p"]), float(data["q"]), data["m"]
+    if schema == "depth":
+        return data["U"], data["u"], data["b"], data["a"]
+    return float(data["c"]), float(data["p"]), float(data["P"]), float(data["q"])
+
+def rate(fn, seconds):
+    """Calls per second of `fn`, measured in batches for roughly `seconds`."""
+    calls = 0
+    batch = 1000
+    start = time.perf_counter()
+    while True:
+        for _ in range(batch):
+            fn()
+        calls += batch
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return calls / elapsed
+
+def run(seconds=1.0):
+    results = {}
+    for schema, message in FRAMES.items():
+        results[("baseline", schema)] = rate(lambda: read_baseline(schema, message), seconds)
+        for backend in BACKENDS:
+            decoder = MessageDecoder(backend)
+            def decode():
+                _, payload = decoder.decode(message)
+                return read_typed(schema, decoder.view(payload, schema))
+            results[(backend, schema)] = rate(decode, seconds)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream decoder micro-benchmark")
+    parser.add_argument("--seconds", type=float, default=1.0, help="time per measurement")
+    args = parser.parse_args()
+
+    results = run(args.seconds)
+    print(f"{'decoder':<10}" + "".join(f"{schema + ' msg/s':>22}" for schema in FRAMES))
+    for name in ["baseline"] + BACKENDS:
+        cells = []
+        for schema in FRAMES:
+            r = results[(name, schema)]
+            cells.append(f"{r:,.0f} ({r / results[('baseline', schema)]:.1f}x)")
+        print(f"{name:<10}" + "".join(f"{cell:>22}" for cell in cells))
+
+if __name__ == "__main__":
+    main()
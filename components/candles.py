@@ -0,0 +1,278 @@
+import time
+import datetime
+import numpy as np
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.ticker import FuncFormatter, MaxNLocator
+from matplotlib.colors import to_rgba
+from config import *
+
+class CandleRenderer:
+    """
+    Vectorized candlestick renderer.
+    All wicks, bodies and volume bars are three collections built from NumPy
+    arrays in one call, the last candle can be patched in place, and the
+    last-price line is an animated artist drawn with blitting so live ticks
+    do not need a full figure redraw.
+    """
+    def __init__(self, canvas, ax_price, ax_vol, body_width=0.6, redraw_interval=1.0, blit_time=None):
+        self.canvas = canvas
+        self.blit_time = blit_time # Optional histogram for blit durations
+        self.ax_price = ax_price
+        self.ax_vol = ax_vol
+        self.half = body_width / 2
+        self.redraw_interval = redraw_interval # Min seconds between full redraws on live ticks
+
+        self.up = np.array(to_rgba(COLOR_UP))
+        self.down = np.array(to_rgba(COLOR_DOWN))
+
+        self.times = np.empty(0, dtype=np.int64) # Candle open times (ms)
+        self.x = np.empty(0) # Candle centres on the x axis
+        self.step = 1 # Raw candles per drawn candle (> 1 when downsampled)
+        self.time_format = '%H:%M'
+        self.colors = np.empty((0, 4))
+
+        self.wicks = LineCollection([], linewidths=1)
+        self.bodies = PolyCollection([], linewidths=0)
+        self.volumes = PolyCollection([], linewidths=0)
+        ax_price.add_collection(self.wicks)
+        ax_price.add_collection(self.bodies)
+        ax_vol.add_collection(self.volumes)
+
+        # Last price line + label are excluded from normal draws and blitted
+        self.last_line = ax_price.axhline(np.nan, color="blue", linestyle="--", linewidth=1, alpha=0.7, animated=True)
+        self.last_text = ax_price.text(0, 0, "", color="blue", va="center", fontsize=8, animated=True)
+
+        # Index-based x axis keeps candles uniform width; map indexes back to times
+        ax_vol.xaxis.set_major_locator(MaxNLocator(nbins=5, integer=True))
+        ax_vol.xaxis.set_major_formatter(FuncFormatter(self.format_time))
+
+        self.background = None
+        self.last_redraw = 0
+        canvas.mpl_connect("draw_event", self.on_draw)
+
+        # Trailing redraw so a patched candle is never left stale when ticks stop
+        self.redraw_timer = canvas.new_timer(interval=int(redraw_interval * 1000))
+        self.redraw_timer.single_shot = True
+        self.redraw_timer.add_callback(self.redraw)
+
+    def format_time(self, x, pos=None):
+        if not len(self.x):
+            return ""
+        i = min(np.searchsorted(self.x, x - self.step / 2), len(self.x) - 1)
+        if abs(self.x[i] - x) > self.step:
+            return ""
+        return datetime.datetime.fromtimestamp(self.times[i] / 1000).strftime(self.time_format)
+
+    def set_data(self, times, opens, highs, lows, closes, volumes, x=None, step=1, xlim=None):
+        """
+        Replace every candle in one pass (arrays of equal length).
+        `x` places candles on the axis (default 0..n-1), `step` is the number
+        of raw candles each one stands for, and `xlim` the visible x range.
+        """
+        self.times = np.asarray(times, dtype=np.int64)
+        opens, highs, lows, closes, volumes = (np.asarray(a, dtype=float) for a in (opens, highs, lows, closes, volumes))
+        n = len(self.times)
+        x = np.arange(n, dtype=float) if x is None else np.asarray(x, dtype=float)
+        self.x = x
+        self.step = step
+        self.time_format = self.pick_time_format()
+
+        self.colors = np.where((closes >= opens)[:, None], self.up, self.down)
+
+        wicks = np.empty((n, 2, 2))
+        wicks[:, :, 0] = x[:, None]
+        wicks[:, 0, 1] = lows
+        wicks[:, 1, 1] = highs
+
+        self.wicks.set_segments(wicks)
+        self.wicks.set_color(self.colors)
+        self.bodies.set_verts(self.body_verts(x, opens, highs, lows, closes))
+        self.bodies.set_facecolor(self.colors)
+        self.volumes.set_verts(self.bar_verts(x, np.zeros(n), volumes))
+        self.volumes.set_facecolor(self.colors)
+
+        if n:
+            xlim = xlim or (x[0] - step, x[-1] + step)
+            self.ax_price.set_xlim(*xlim)
+            # The price label sits right of the newest candle; hide it when panned away
+            self.last_text.set_visible(x[-1] <= xlim[1])
+            self.set_price_limits(lows.min(), highs.max())
+            self.ax_vol.set_ylim(0, volumes.max() * 1.1 or 1)
+            self.set_last_price(closes[-1], blit=False)
+
+        self.redraw()
+
+    def update_last(self, open_p, high_p, low_p, close_p, vol):
+        """Patch the newest candle in place; only the price line is redrawn immediately."""
+        if not len(self.times):
+            return
+        i = len(self.times) - 1
+        x = self.x[-1:]
+        color = self.up if close_p >= open_p else self.down
+
+        self.set_path(self.wicks, i, np.array([[x[0], low_p], [x[0], high_p]], dtype=float))
+        self.set_path(self.bodies, i, self.body_verts(x, *map(np.atleast_1d, (open_p, high_p, low_p, close_p)))[0])
+        self.set_path(self.volumes, i, self.bar_verts(x, np.zeros(1), np.atleast_1d(vol))[0])
+
+        if not np.array_equal(self.colors[i], color):
+            self.colors[i] = color
+            self.wicks.set_color(self.colors)
+            self.bodies.set_facecolor(self.colors)
+            self.volumes.set_facecolor(self.colors)
+
+        # A rescale invalidates the cached background, so it forces a redraw
+        rescaled = False
+        lo, hi = self.ax_price.get_ylim()
+        if low_p < lo or high_p > hi:
+            self.set_price_limits(min(low_p, lo), max(high_p, hi))
+            rescaled = True
+        if vol > self.ax_vol.get_ylim()[1]:
+            self.ax_vol.set_ylim(0, vol * 1.1)
+            rescaled = True
+
+        self.set_last_price(close_p, blit=False)
+
+        # Body changes need a real draw, but at most once per redraw_interval;
+        # in between the price line is blitted over the cached background.
+        if rescaled or time.monotonic() - self.last_redraw >= self.redraw_interval:
+            self.redraw()
+        else:
+            self.blit()
+            self.redraw_timer.start()
+
+    def set_path(self, collection, i, verts):
+        path = collection.get_paths()[i]
+        # Closed polygons carry an extra vertex that repeats the first one
+        if len(path.vertices) > len(verts):
+            verts = np.vstack([verts, verts[:1]])
+        path.vertices = verts
+
+    def body_verts(self, x, opens, highs, lows, closes):
+        bottom = np.minimum(opens, closes)
+        height = np.abs(closes - opens)
+        # Ensure height is visible even if flat
+        flat = np.minimum(highs - lows, closes * 0.0001)
+        height = np.where(height == 0, np.where(flat == 0, 0.01, flat), height)
+        return self.bar_verts(x, bottom, bottom + height)
+
+    def bar_verts(self, x, bottom, top):
+        half = self.half * self.step
+        verts = np.empty((len(x), 4, 2))
+        verts[:, 0, 0] = verts[:, 1, 0] = x - half
+        verts[:, 2, 0] = verts[:, 3, 0] = x + half
+        verts[:, 0, 1] = verts[:, 3, 1] = bottom
+        verts[:, 1, 1] = verts[:, 2, 1] = top
+        return verts
+
+    def pick_time_format(self):
+        span = (self.times[-1] - self.times[0]) / 1000 if len(self.times) else 0
+        if span > 365 * 86400:
+            return '%Y-%m'
+        if span > 2 * 86400:
+            return '%m-%d'
+        return '%H:%M'
+
+    def set_price_limits(self, low, high):
+        pad = (high - low) * 0.05 or high * 0.001 or 1
+        self.ax_price.set_ylim(low - pad, high + pad)
+
+    def set_last_price(self, price, blit=True):
+        self.last_line.set_ydata([price, price])
+        x = self.x[-1] + self.step if len(self.x) else 0
+        self.last_text.set_position((x, price))
+        self.last_text.set_text(f"{price:,.2f}")
+        if blit:
+            self.blit()
+
+    def redraw(self):
+        self.redraw_timer.stop()
+        self.last_redraw = time.monotonic()
+        self.canvas.draw_idle()
+
+    def on_draw(self, event):
+        # Cache everything except the animated artists, then put them back on top
+        self.background = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+        self.draw_animated()
+
+    def draw_animated(self):
+        self.ax_price.draw_artist(self.last_line)
+        self.ax_price.draw_artist(self.last_text)
+
+    def blit(self):
+        if self.background is None:
+            self.redraw()
+            return
+        started = time.perf_counter()
+        self.canvas.restore_region(self.background)
+        self.draw_animated()
+        self.canvas.blit(self.canvas.figure.bbox)
+        if self.blit_time:
+            self.blit_time.observe(time.perf_counter() - started)
+
+class IndicatorRenderer:
+    """
+    Indicator columns drawn over the candles: one Line2D (or a LineCollection
+    for histogram bars) per column, created on first use and patched with the
+    visible samples each frame. Oscillators go on their own axis, which the
+    chart adds or removes.
+    """
+    def __init__(self, ax_price):
+        self.ax_price = ax_price
+        self.ax_osc = None
+        self.artists = {} # (spec, column) -> artist
+        self.guides = []
+
+    def set_oscillator_axis(self, ax_osc):
+        # Artists on the old axis went away with it
+        for key in [key for key, artist in self.artists.items() if artist.axes is not self.ax_price]:
+            del self.artists[key]
+        self.guides = []
+        self.ax_osc = ax_osc
+
+    def set_data(self, x, values, step=1):
+        """`values`: spec -> (Indicator, {column: samples at x}). Specs not listed are removed."""
+        wanted = {(spec, column) for spec, (indicator, columns) in values.items() for column in columns}
+        for key in [key for key in self.artists if key not in wanted]:
+            self.artists.pop(key).remove()
+
+        oscillator = None
+        for spec, (indicator, columns) in values.items():
+            ax = self.ax_price if indicator.pane == "price" else self.ax_osc
+            if ax is None:
+                continue
+            for column, samples in columns.items():
+                kind, color, linestyle = indicator.styles[column]
+                artist = self.artists.get((spec, column))
+                if artist is None:
+                    if kind == "bars":
+                        artist = LineCollection([], colors=color, linewidths=max(1, 3 / step))
+                        ax.add_collection(artist)
+                    else:
+                        artist, = ax.plot([], [], color=color, linestyle=linestyle, linewidth=1)
+                    self.artists[(spec, column)] = artist
+                if kind == "bars":
+                    segments = np.zeros((len(x), 2, 2))
+                    segments[:, :, 0] = np.asarray(x)[:, None]
+                    segments[:, 1, 1] = np.nan_to_num(samples)
+                    artist.set_segments(segments)
+                else:
+                    artist.set_data(x, samples)
+            if ax is self.ax_osc:
+                oscillator = (indicator, columns)
+
+        if oscillator:
+            self.scale_oscillator(*oscillator)
+
+    def scale_oscillator(self, indicator, columns):
+        if indicator.bounds:
+            low, high = indicator.bounds
+        else:
+            finite = np.concatenate([c[np.isfinite(c)] for c in columns.values()] + [np.zeros(1)])
+            low, high = finite.min(), finite.max()
+            pad = (high - low) * 0.1 or 1
+            low, high = low - pad, high + pad
+        self.ax_osc.set_ylim(low, high)
+        if [line.get_ydata()[0] for line in self.guides] != list(indicator.guides):
+            for line in self.guides:
+                line.remove()
+            self.guides = [self.ax_osc.axhline(y, color=COLOR_NEUTRAL, linestyle=":", linewidth=0.8) for y in indicator.guides]
@@ -1,32 +1,80 @@
 import tkinter as tk
 from tkinter import ttk
-import requests
-import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
-import threading
+import time
+import numpy as np
 from config import *
-import datetime
-
-import tkinter as tk
-from tkinter import ttk
-import requests
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
-import threading
-from config import *
-import datetime
-import matplotlib.dates as mdates
+from components.candles import CandleRenderer, IndicatorRenderer
+from components.render_loop import render_loop_for
+from core.engine import shared_engine
+from core.metrics import shared_metrics
+from core.kline_series import KlineSeries
+from core.indicators import parse_spec
+
+class TimedCanvas(FigureCanvasTkAgg):
+    """FigureCanvasTkAgg that records how long every full figure draw takes."""
+    def __init__(self, figure, master, draw_time):
+        self.draw_time = draw_time
+        super().__init__(figure, master=master)
+
+    def draw(self):
+        started = time.perf_counter()
+        super().draw()
+        self.draw_time.observe(time.perf_counter() - started)
 
 class ChartPanel:
-    def __init__(self, parent, symbol="btcusdt"):
+    def __init__(self, parent, symbol="btcusdt", engine=None, render_loop=None, metrics=None):
         self.parent = parent
         self.symbol = symbol.upper()
         self.is_active = False
+        self.engine = engine or shared_engine()
+        self.render_loop = render_loop or render_loop_for(parent)
+        self.feed = None
+
+        self.metrics = metrics or shared_metrics()
+        self.plot_time = self.metrics.histogram("dashboard_chart_plot_seconds", "Time in ChartPanel.plot (building candle geometry)")
+
+        self.interval = CHART_DEFAULT_INTERVAL
+        self.series = KlineSeries() # The feed's series while started
+
+        # Viewport in raw candle indexes: view_end=None follows the live candle
+        self.view_count = CHART_DEFAULT_CANDLES
+        self.view_end = None
+        self.drag = None # (pixel x, view_end) while panning with the mouse
+        self.view_key = None # What is currently drawn, to detect "only the open candle moved"
+
+        # Indicators are computed by the feed's IndicatorSet; the panel only picks and draws them
+        self.indicators = {spec: parse_spec(spec) for spec in CHART_INDICATORS}
+        self.overlay_vars = {spec: tk.BooleanVar(value=spec in CHART_DEFAULT_INDICATORS)
+                             for spec, indicator in self.indicators.items() if indicator.pane == "price"}
+        self.oscillator_var = tk.StringVar(value=next((spec for spec in CHART_DEFAULT_INDICATORS
+                                                       if self.indicators[spec].pane == "oscillator"), ""))
+        self.active_indicators = self.selected_indicators()
 
         self.frame = ttk.LabelFrame(parent, text=f"Chart ({self.symbol})", padding=10)
 
+        # Toolbar: interval selector + jump back to live
+        toolbar = ttk.Frame(self.frame)
+        toolbar.pack(fill=tk.X)
+        ttk.Label(toolbar, text="Interval:").pack(side=tk.LEFT)
+        self.interval_var = tk.StringVar(value=self.interval)
+        interval_box = ttk.Combobox(toolbar, textvariable=self.interval_var, values=CHART_INTERVALS, width=5, state="readonly")
+        interval_box.pack(side=tk.LEFT, padx=5)
+        interval_box.bind("<<ComboboxSelected>>", lambda e: self.change_interval(self.interval_var.get()))
+        ttk.Button(toolbar, text="Live", command=self.reset_view).pack(side=tk.RIGHT)
+        indicator_button = ttk.Menubutton(toolbar, text="Indicators")
+        indicator_menu = tk.Menu(indicator_button, tearoff=0)
+        for spec, var in self.overlay_vars.items():
+            indicator_menu.add_checkbutton(label=self.indicators[spec].label, variable=var, command=self.update_indicators)
+        indicator_menu.add_separator()
+        indicator_menu.add_radiobutton(label="No oscillator", value="", variable=self.oscillator_var, command=self.update_indicators)
+        for spec, indicator in self.indicators.items():
+            if indicator.pane == "oscillator":
+                indicator_menu.add_radiobutton(label=indicator.label, value=spec, variable=self.oscillator_var, command=self.update_indicators)
+        indicator_button["menu"] = indicator_menu
+        indicator_button.pack(side=tk.RIGHT, padx=5)
+
         # Matplotlib Figure with 2 subplots (Price, Volume)
         # sharex=True to align time axis
         self.fig = Figure(figsize=(5, 4), dpi=100)
@@ -36,136 +84,227 @@ class ChartPanel:
         gs = self.fig.add_gridspec(2, 1, height_ratios=[3, 1], hspace=0.1)
         self.ax_price = self.fig.add_subplot(gs[0])
         self.ax_vol = self.fig.add_subplot(gs[1], sharex=self.ax_price)
+        self.ax_osc = None # Third row while an oscillator (RSI, MACD) is selected
 
         # Styling
         self.ax_price.set_facecolor("white")
         self.ax_vol.set_facecolor("white")
+        self.ax_price.grid(True, linestyle='--', linewidth=0.5, alpha=0.5)
+        self.ax_vol.grid(True, linestyle='--', linewidth=0.5, alpha=0.5)
+        self.ax_vol.set_ylabel("Volume", fontsize=8)
+        self.ax_vol.tick_params(axis='x', labelsize=8, labelrotation=30)
+        # Hide default labels on price axis X to avoid clutter
+        self.ax_price.tick_params(axis='x', labelbottom=False)
+        self.set_title()
 
-        self.canvas = FigureCanvasTkAgg(self.fig, master=self.frame)
+        self.canvas = TimedCanvas(self.fig, self.frame,
+                                  self.metrics.histogram("dashboard_chart_draw_seconds", "Time of a full canvas.draw()"))
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
 
-        self.update_interval = 60000 # 1 minute refresh
+        # Candles are drawn as collections and patched in place between fetches
+        self.renderer = CandleRenderer(self.canvas, self.ax_price, self.ax_vol,
+                                       blit_time=self.metrics.histogram("dashboard_chart_blit_seconds", "Time of a last-price blit"))
+        self.overlay = IndicatorRenderer(self.ax_price)
+        self.layout()
+
+        # Wheel zooms around the cursor, drag pans, double-click returns to live
+        self.canvas.mpl_connect("scroll_event", self.on_scroll)
+        self.canvas.mpl_connect("button_press_event", self.on_press)
+        self.canvas.mpl_connect("motion_notify_event", self.on_drag)
+        self.canvas.mpl_connect("button_release_event", self.on_release)
 
     def start(self):
         if self.is_active: return
         self.is_active = True
-        self.fetch_data()
+
+        # The engine's KlineFeed loads the history once and keeps it current
+        # from the kline stream; the chart only draws it.
+        self.attach(self.engine.klines(self.symbol, self.interval))
+
+    def attach(self, feed):
+        self.feed = feed
+        self.series = feed.series
+        for spec in self.active_indicators:
+            feed.indicators.add(spec)
+        feed.add_listener(self.on_update)
+        if feed.history_loaded:
+            self.render_loop.submit(self, self.render)
 
     def stop(self):
         self.is_active = False
-
-    def fetch_data(self):
+        if self.feed:
+            self.feed.remove_listener(self.on_update)
+            for spec in self.active_indicators:
+                self.feed.indicators.remove(spec)
+            self.engine.release(self.feed)
+            self.feed = None
+        self.render_loop.discard(self)
+
+    def on_update(self, change, added):
         if not self.is_active: return
-
-        threading.Thread(target=self._fetch_and_plot, daemon=True).start()
-
-        # Schedule next update
-        self.parent.after(self.update_interval, self.fetch_data)
-
-    def _fetch_and_plot(self):
-        try:
-            url = f"{BINANCE_BASE_URL}/api/v3/klines"
-            params = {
-                "symbol": self.symbol,
-                "interval": "1h",
-                "limit": 50 # Increase limit for better chart
-            }
-            response = requests.get(url, params=params)
-            data = response.json()
-
-            # Parse data
-            # [time, open, high, low, close, vol, ...]
-            opens = []
-            highs = []
-            lows = []
-            closes = []
-            volumes = []
-            times = []
-
-            for candle in data:
-                # Binance time is ms
-                t = datetime.datetime.fromtimestamp(candle[0]/1000)
-                times.append(t)
-                opens.append(float(candle[1]))
-                highs.append(float(candle[2]))
-                lows.append(float(candle[3]))
-                closes.append(float(candle[4]))
-                volumes.append(float(candle[5]))
-
-            # Plot on main thread
-            self.parent.after(0, self.plot, times, opens, highs, lows, closes, volumes)
-
-        except Exception as e:
-            print(f"Chart Error: {e}")
-
-    def plot(self, times, opens, highs, lows, closes, volumes):
-        self.ax_price.clear()
-        self.ax_vol.clear()
-
-        # Convert times to matplotlib numbers for proper width handling if needed
-        # But index-based plotting is often simpler for intraday gaps.
-        # Using simple index for X-axis to keep candles uniform width.
-        x_vals = range(len(times))
-
-        up_color = "#0ECB81" # Green
-        down_color = "#F6465D" # Red
-
-        # Iterate to draw candles
-        for i in x_vals:
-            open_p = opens[i]
-            close_p = closes[i]
-            high_p = highs[i]
-            low_p = lows[i]
-            vol = volumes[i]
-
-            color = up_color if close_p >= open_p else down_color
-
-            # --- Candlestick ---
-            # Wick (Line)
-            self.ax_price.plot([i, i], [low_p, high_p], color=color, linewidth=1)
-
-            # Body (Bar)
-            height = abs(close_p - open_p)
-            bottom = min(open_p, close_p)
-            # Ensure height is visible even if flat
-            if height == 0: height = min(high_p - low_p, close_p*0.0001) or 0.01 
-
-            self.ax_price.bar(i, height, bottom=bottom, color=color, width=0.6, align='center')
-
-            # --- Volume ---
-            self.ax_vol.bar(i, vol, color=color, width=0.6, align='center')
-
-        # Formatting Price Axis
-        self.ax_price.set_title(f"{self.symbol} 1H Chart (Binance)", color="black", fontsize=10)
-        self.ax_price.grid(True, linestyle='--', linewidth=0.5, alpha=0.5)
-        # Last price line
-        last_price = closes[-1]
-        self.ax_price.axhline(last_price, color='blue', linestyle='--', linewidth=1, alpha=0.7)
-        self.ax_price.text(x_vals[-1]+1, last_price, f"{last_price:,.2f}", color="blue", va='center', fontsize=8)
-
-        # Formatting Volume Axis
-        self.ax_vol.set_ylabel("Volume", fontsize=8)
-        self.ax_vol.grid(True, linestyle='--', linewidth=0.5, alpha=0.5)
-
-        # Format X Axis (Dates)
-        # We need to map indexes back to formatting
-        # Show only some ticks
-        tick_step = max(1, len(times)//5)
-        self.ax_vol.set_xticks(list(x_vals)[::tick_step])
-        self.ax_vol.set_xticklabels([t.strftime('%H:%M') for t in times[::tick_step]], rotation=30, ha='right', fontsize=8)
-
-        # Hide default labels on price axis X to avoid clutter
-        plt.setp(self.ax_price.get_xticklabels(), visible=False)
-
+        if change == "prepend":
+            self.render_loop.submit(self, self.shift_view, added)
+        else:
+            self.render_loop.submit(self, self.render)
+
+    # --- Indicators ---
+
+    def selected_indicators(self):
+        specs = [spec for spec, var in self.overlay_vars.items() if var.get()]
+        return specs + [self.oscillator_var.get()] if self.oscillator_var.get() else specs
+
+    def update_indicators(self):
+        selected = self.selected_indicators()
+        if self.feed:
+            for spec in selected:
+                if spec not in self.active_indicators:
+                    self.feed.indicators.add(spec)
+            for spec in self.active_indicators:
+                if spec not in selected:
+                    self.feed.indicators.remove(spec)
+        self.active_indicators = selected
+        if bool(self.oscillator_var.get()) != (self.ax_osc is not None):
+            self.layout()
+        self.view_key = None
+        self.render_loop.submit(self, self.render)
+
+    def layout(self):
+        """Two rows (price, volume), or three with the oscillator axis below."""
+        oscillator = bool(self.oscillator_var.get())
+        rows = 3 if oscillator else 2
+        gs = self.fig.add_gridspec(rows, 1, height_ratios=[3, 1, 1][:rows], hspace=0.1)
+        self.ax_price.set_subplotspec(gs[0])
+        self.ax_vol.set_subplotspec(gs[1])
+        if oscillator and self.ax_osc is None:
+            self.ax_osc = self.fig.add_subplot(gs[2], sharex=self.ax_price)
+            self.ax_osc.set_facecolor("white")
+            self.ax_osc.grid(True, linestyle='--', linewidth=0.5, alpha=0.5)
+            self.ax_osc.tick_params(axis='x', labelsize=8, labelrotation=30)
+            self.ax_osc.tick_params(axis='y', labelsize=8)
+        elif not oscillator and self.ax_osc is not None:
+            self.ax_osc.remove()
+            self.ax_osc = None
+        elif self.ax_osc is not None:
+            self.ax_osc.set_subplotspec(gs[2])
+        # Time labels go under the lowest axis
+        self.ax_vol.tick_params(axis='x', labelbottom=self.ax_osc is None)
+        self.overlay.set_oscillator_axis(self.ax_osc)
         self.fig.tight_layout()
-        self.canvas.draw()
+        self.canvas.draw_idle()
+
+    def plot_indicators(self, x, step):
+        if not self.feed or not len(x): return
+        # Each drawn candle shows the indicator at the last raw candle of its bucket
+        indexes = np.asarray(x + (step - 1) / 2, dtype=np.int64)
+        values = {}
+        for spec in self.active_indicators:
+            columns = self.feed.indicators.view(spec, indexes)
+            if columns is not None:
+                values[spec] = (self.indicators[spec], columns)
+        self.overlay.set_data(x, values, step=step)
+
+    # --- Viewport ---
+
+    def visible_range(self):
+        n = len(self.series)
+        end = n if self.view_end is None else min(self.view_end, n)
+        return end - self.view_count, end
+
+    def shift_view(self, added):
+        # Older candles were inserted in front, so a panned view moves with them
+        if self.view_end is not None:
+            self.view_end += added
+        self.render()
+
+    def reset_view(self):
+        self.view_count = CHART_DEFAULT_CANDLES
+        self.view_end = None
+        self.render_loop.submit(self, self.render)
+
+    def on_scroll(self, event):
+        n = len(self.series)
+        if not n or event.xdata is None: return
+        start, end = self.visible_range()
+
+        # Keep the candle under the cursor fixed while zooming
+        scale = 0.8 ** event.step
+        count = int(min(max(self.view_count * scale, CHART_MIN_CANDLES), n))
+        anchor = (event.xdata - start) / self.view_count
+        new_end = round(event.xdata + (1 - anchor) * count)
+
+        self.view_count = count
+        self.view_end = None if new_end >= n else max(new_end, count)
+        self.render_loop.submit(self, self.render)
+
+    def on_press(self, event):
+        if event.inaxes is None: return
+        if event.dblclick:
+            self.reset_view()
+            return
+        self.drag = (event.x, self.visible_range()[1])
+
+    def on_drag(self, event):
+        if self.drag is None or event.x is None: return
+        n = len(self.series)
+        start_x, start_end = self.drag
+        candles_per_pixel = self.view_count / max(self.ax_price.bbox.width, 1)
+        end = round(start_end - (event.x - start_x) * candles_per_pixel)
+        self.view_end = None if end >= n else max(end, min(self.view_count, n))
+        self.render_loop.submit(self, self.render)
+
+    def on_release(self, event):
+        self.drag = None
+
+    def render(self):
+        if not self.is_active: return
+        start, end = self.visible_range()
+        max_points = max(int(self.ax_price.bbox.width / CHART_PIXELS_PER_CANDLE), 1)
+        *candles, x, step = self.series.view(start, end, max_points)
+        self.plot_indicators(x, step)
+        self.plot(*candles, x=x, step=step, xlim=(start - 1, start + self.view_count + 1))
+
+    def set_title(self):
+        self.ax_price.set_title(f"{self.symbol} {self.interval.upper()} Chart (Binance)", color="black", fontsize=10)
+
+    def plot(self, times, opens, highs, lows, closes, volumes, x=None, step=1, xlim=None):
+        if not len(times): return
+        started = time.perf_counter()
+
+        # Same candles in the same view as last time (only the open one moved): patch it in place
+        view_key = (len(times), times[0], times[-1], step, xlim)
+        if view_key == self.view_key:
+            self.renderer.update_last(opens[-1], highs[-1], lows[-1], closes[-1], volumes[-1])
+        else:
+            self.view_key = view_key
+            self.renderer.set_data(times, opens, highs, lows, closes, volumes, x=x, step=step, xlim=xlim)
+        self.plot_time.observe(time.perf_counter() - started)
+
+    def change_interval(self, interval):
+        if self.interval == interval: return
+        was_active = self.is_active
+        self.stop()
+        self.interval = interval
+        self.reset()
+        if was_active:
+            self.start()
+
+    def reset(self):
+        # The old series belongs to the released feed (and maybe other views)
+        self.series = KlineSeries()
+        self.view_key = None
+        self.view_count = CHART_DEFAULT_CANDLES
+        self.view_end = None
+        self.set_title()
 
     def change_symbol(self, new_symbol):
-        if self.symbol == new_symbol: return
+        if self.symbol == new_symbol.upper(): return
+        was_active = self.is_active
         self.stop()
         self.symbol = new_symbol.upper()
         self.frame.config(text=f"Chart ({self.symbol})")
-        self.start()
+        self.reset()
+        if was_active:
+            self.start()
 
     def pack(self, **kwargs):
         self.frame.pack(**kwargs)
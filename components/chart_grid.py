@@ -0,0 +1,188 @@
+import tkinter as tk
+from tkinter import ttk
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from config import *
+from components.candles import CandleRenderer
+from components.offscreen import OffscreenRenderer, to_ppm
+from components.render_loop import render_loop_for
+from core.engine import shared_engine
+from core.metrics import shared_metrics
+
+class OffscreenCandleRenderer(CandleRenderer):
+    """CandleRenderer on an Agg canvas: the render thread draws once per job, so redraws and blits are left out."""
+    def redraw(self):
+        pass
+
+    def blit(self):
+        pass
+
+class MiniChart:
+    """
+    One symbol's recent candles in a grid cell. The figure only ever draws on
+    the offscreen render thread; the Tk side is a Label showing the finished
+    bitmap, so a cell costs the main thread one PhotoImage update per frame.
+    """
+    def __init__(self, parent, symbol, interval, engine, renderer, on_click=None):
+        self.symbol = symbol
+        self.interval = interval
+        self.engine = engine
+        self.renderer = renderer
+        self.on_click = on_click
+        self.is_active = False
+        self.feed = None
+        self.size = (0, 0) # Cell size in pixels, read by the render thread
+        self.photo = None
+
+        self.frame = tk.Frame(parent, background="white", highlightthickness=1, highlightbackground=COLOR_NEUTRAL)
+        # place() keeps the bitmap from feeding back into the cell's requested size
+        self.label = tk.Label(self.frame, background="white", borderwidth=0, cursor="hand2")
+        self.label.place(relwidth=1, relheight=1)
+        self.label.bind("<Configure>", self.on_resize)
+        self.label.bind("<Button-1>", lambda e: self.on_click and self.on_click(self.symbol))
+
+        self.fig = Figure(dpi=CHART_GRID_DPI)
+        self.fig.patch.set_facecolor("white")
+        self.canvas = FigureCanvasAgg(self.fig)
+        gs = self.fig.add_gridspec(2, 1, height_ratios=[4, 1], hspace=0)
+        self.ax_price = self.fig.add_subplot(gs[0])
+        self.ax_vol = self.fig.add_subplot(gs[1], sharex=self.ax_price)
+        for ax in (self.ax_price, self.ax_vol):
+            ax.set_facecolor("white")
+            ax.grid(True, linestyle='--', linewidth=0.5, alpha=0.5)
+            ax.yaxis.tick_right()
+            ax.tick_params(labelsize=7)
+        self.ax_price.tick_params(axis='x', labelbottom=False)
+        self.ax_vol.tick_params(axis='y', labelright=False)
+        self.fig.subplots_adjust(left=0.02, right=0.84, top=0.98, bottom=0.1)
+        self.title = self.ax_price.text(0.02, 0.96, "", transform=self.ax_price.transAxes, va="top", fontsize=8, fontweight="bold")
+        self.candles = OffscreenCandleRenderer(self.canvas, self.ax_price, self.ax_vol)
+
+    def start(self):
+        if self.is_active: return
+        self.is_active = True
+        self.feed = self.engine.klines(self.symbol, self.interval)
+        self.feed.add_listener(self.on_update)
+        if self.feed.history_loaded:
+            self.schedule()
+
+    def stop(self):
+        self.is_active = False
+        if self.feed:
+            self.feed.remove_listener(self.on_update)
+            self.engine.release(self.feed)
+            self.feed = None
+        self.renderer.discard(self)
+
+    def on_update(self, change, added):
+        if not self.is_active: return
+        self.schedule()
+
+    def on_resize(self, event):
+        self.size = (event.width, event.height)
+        if self.is_active:
+            self.schedule()
+
+    def schedule(self):
+        self.renderer.submit(self, self.rasterize, self.show)
+
+    def rasterize(self):
+        # Render thread
+        feed, (width, height) = self.feed, self.size
+        if feed is None or width < 20 or height < 20 or not len(feed.series):
+            return None
+        self.fig.set_size_inches(width / CHART_GRID_DPI, height / CHART_GRID_DPI)
+        n = len(feed.series)
+        start = n - CHART_GRID_CANDLES
+        max_points = max(int(width * 0.8 / CHART_PIXELS_PER_CANDLE), 1)
+        *candles, x, step = feed.series.view(start, n, max_points)
+        if not len(x):
+            return None
+        closes = candles[4]
+        change = (closes[-1] / candles[1][0] - 1) * 100 if candles[1][0] else 0.0
+        self.title.set_text(f"{self.symbol.upper()} {self.interval}  {change:+.2f}%")
+        self.title.set_color(COLOR_UP if change >= 0 else COLOR_DOWN)
+        self.candles.set_data(*candles, x=x, step=step, xlim=(start - 1, n + 1))
+        self.canvas.draw()
+        return to_ppm(self.canvas)
+
+    def show(self, image):
+        # Tk thread
+        if not self.is_active: return
+        if self.photo is None:
+            self.photo = tk.PhotoImage(master=self.label, data=image, format="PPM")
+            self.label.config(image=self.photo)
+        else:
+            self.photo.config(data=image, format="PPM")
+
+    def grid(self, **kwargs):
+        self.frame.grid(**kwargs)
+
+class ChartGrid:
+    """
+    Mini candle charts for several symbols at once. Every cell is rasterized
+    with Agg on one shared OffscreenRenderer thread, so a 3x3 grid follows
+    the live kline streams without blocking the Tk thread. Clicking a cell
+    calls `on_click(symbol)`.
+    """
+    def __init__(self, parent, symbols=CHART_GRID_SYMBOLS, engine=None, render_loop=None, metrics=None,
+                 on_click=None, columns=CHART_GRID_COLUMNS):
+        self.parent = parent
+        self.is_active = False
+        self.engine = engine or shared_engine()
+        self.render_loop = render_loop or render_loop_for(parent)
+        self.metrics = metrics or shared_metrics()
+        self.renderer = OffscreenRenderer(self.render_loop, metrics=self.metrics)
+        self.interval = CHART_GRID_INTERVAL
+
+        self.frame = ttk.LabelFrame(parent, text="Chart Grid", padding=10)
+
+        toolbar = ttk.Frame(self.frame)
+        toolbar.pack(fill=tk.X)
+        ttk.Label(toolbar, text="Interval:").pack(side=tk.LEFT)
+        self.interval_var = tk.StringVar(value=self.interval)
+        interval_box = ttk.Combobox(toolbar, textvariable=self.interval_var, values=CHART_INTERVALS, width=5, state="readonly")
+        interval_box.pack(side=tk.LEFT, padx=5)
+        interval_box.bind("<<ComboboxSelected>>", lambda e: self.change_interval(self.interval_var.get()))
+
+        cells = ttk.Frame(self.frame)
+        cells.pack(fill=tk.BOTH, expand=True, pady=(5, 0))
+        self.charts = []
+        for i, symbol in enumerate(symbols):
+            chart = MiniChart(cells, symbol, self.interval, self.engine, self.renderer, on_click=on_click)
+            chart.grid(row=i // columns, column=i % columns, sticky="nsew", padx=2, pady=2)
+            self.charts.append(chart)
+        rows = (len(symbols) + columns - 1) // columns
+        for row in range(rows):
+            cells.rowconfigure(row, weight=1, uniform="cell")
+        for column in range(columns):
+            cells.columnconfigure(column, weight=1, uniform="cell")
+
+    def start(self):
+        if self.is_active: return
+        self.is_active = True
+        self.renderer.start()
+        for chart in self.charts:
+            chart.start()
+
+    def stop(self):
+        self.is_active = False
+        for chart in self.charts:
+            chart.stop()
+        self.renderer.stop()
+
+    def change_interval(self, interval):
+        if self.interval == interval: return
+        was_active = self.is_active
+        self.stop()
+        self.interval = interval
+        for chart in self.charts:
+            chart.interval = interval
+        if was_active:
+            self.start()
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def pack_forget(self):
+        self.frame.pack_forget()
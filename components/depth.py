@@ -0,0 +1,221 @@
+import time
+import tkinter as tk
+from tkinter import ttk
+import numpy as np
+from matplotlib import colormaps
+from matplotlib.colors import to_rgb
+from config import *
+from core.engine import shared_engine
+from core.metrics import shared_metrics
+from core.depth_history import history_for
+from components.offscreen import ppm
+from components.render_loop import render_loop_for
+from components.widget_cache import shared_widget_cache
+
+class DepthPanel:
+    """
+    Order book history as a heatmap (price by time, shaded by resting
+    liquidity) above the current cumulative depth curve.
+
+    The heatmap is a PhotoImage used as a ring of columns: it is shown twice
+    side by side on the canvas and scrolled by moving both items, so a frame
+    only colors and puts the columns that closed since the last one (plus the
+    still-open newest column) instead of redrawing the image. The depth
+    curve is two canvas polygons whose coordinates are replaced in place.
+    """
+    def __init__(self, parent, symbol="btcusdt", engine=None, render_loop=None, metrics=None):
+        self.parent = parent
+        self.symbol = symbol.lower()
+        self.is_active = False
+        self.engine = engine or shared_engine()
+        self.render_loop = render_loop or render_loop_for(parent)
+        self.widgets = shared_widget_cache()
+        self.metrics = metrics or shared_metrics()
+        self.draw_time = self.metrics.histogram("dashboard_depth_draw_seconds", "Time to update the depth heatmap and curve")
+        self.feed = None
+        self.book = None
+        self.history = None
+
+        self.width = DEPTH_HEATMAP_WIDTH
+        self.row_pixels = DEPTH_HEATMAP_ROW_PIXELS
+        self.height = DEPTH_HEATMAP_ROWS * self.row_pixels
+        self.lut = (colormaps[DEPTH_HEATMAP_COLORMAP](np.linspace(0, 1, 256))[:, :3] * 255).astype(np.uint8)
+        self.bid_color = (np.array(to_rgb(COLOR_UP)) * 255).astype(np.uint8)
+        self.ask_color = (np.array(to_rgb(COLOR_DOWN)) * 255).astype(np.uint8)
+        self.filled = 0 # Display columns closed and put so far
+        self.grid_key = None # (bucket, base, shifts, samples per column) the image was built for
+
+        self.frame = ttk.LabelFrame(parent, text=f"Depth ({self.symbol.upper()})", padding=10)
+
+        toolbar = ttk.Frame(self.frame)
+        toolbar.pack(fill=tk.X)
+        ttk.Label(toolbar, text="Span:").pack(side=tk.LEFT)
+        self.span_var = tk.StringVar(value=DEPTH_HEATMAP_DEFAULT_SPAN)
+        span_box = ttk.Combobox(toolbar, textvariable=self.span_var, values=list(DEPTH_HEATMAP_SPANS), width=5, state="readonly")
+        span_box.pack(side=tk.LEFT, padx=5)
+        span_box.bind("<<ComboboxSelected>>", lambda e: self.render_loop.submit(self, self.update_ui))
+
+        self.heatmap = tk.Canvas(self.frame, width=self.width, height=self.height, background="black", highlightthickness=0)
+        self.heatmap.pack(pady=(5, 0))
+        self.photo = tk.PhotoImage(master=self.heatmap, width=self.width, height=self.height)
+        self.images = [self.heatmap.create_image(x, 0, image=self.photo, anchor="nw") for x in (0, -self.width)]
+        self.high_text = self.heatmap.create_text(4, 2, anchor="nw", fill="white", font=("Arial", 8))
+        self.low_text = self.heatmap.create_text(4, self.height - 2, anchor="sw", fill="white", font=("Arial", 8))
+
+        self.curve = tk.Canvas(self.frame, width=self.width, height=DEPTH_CURVE_HEIGHT, background="white", highlightthickness=0)
+        self.curve.pack(pady=(5, 0))
+        self.bid_area = self.curve.create_polygon(0, 0, 0, 0, fill=COLOR_UP, outline="")
+        self.ask_area = self.curve.create_polygon(0, 0, 0, 0, fill=COLOR_DOWN, outline="")
+        self.curve_text = self.curve.create_text(self.width / 2, 2, anchor="n", fill="black", font=("Arial", 8))
+
+        self.status_label = ttk.Label(self.frame, text="Syncing...", foreground="gray")
+        self.status_label.pack(pady=(5, 0))
+
+    def start(self):
+        if self.is_active: return
+        self.is_active = True
+        self.attach(self.engine.book(self.symbol))
+
+    def attach(self, feed):
+        self.feed = feed
+        self.book = feed.book
+        # The history lives with the feed, so it survives suspends and symbol switches
+        self.history = history_for(feed)
+        self.grid_key = None
+        feed.add_listener(self.on_update)
+        if self.book.is_synced:
+            self.render_loop.submit(self, self.update_ui)
+
+    def stop(self):
+        self.is_active = False
+        if self.feed:
+            self.feed.remove_listener(self.on_update)
+            self.engine.release(self.feed)
+            self.feed = None
+        self.book = None
+        self.history = None
+        self.render_loop.discard(self)
+
+    def on_update(self):
+        if self.is_active:
+            self.render_loop.submit(self, self.update_ui)
+
+    def update_ui(self):
+        if not self.is_active or self.book is None or not self.book.is_synced: return
+        started = time.perf_counter()
+        self.draw_heatmap()
+        self.draw_curve()
+        self.draw_time.observe(time.perf_counter() - started)
+
+    # --- Heatmap ---
+
+    def samples_per_column(self):
+        span = DEPTH_HEATMAP_SPANS[self.span_var.get()]
+        return max(1, round(span / DEPTH_HEATMAP_RESOLUTION / self.width))
+
+    def draw_heatmap(self):
+        count, bucket, base, shifts, scale = self.history.state()
+        if bucket is None or not count: return
+        k = self.samples_per_column()
+        closed = (count - 1) // k # Display columns whose samples have all closed
+
+        grid_key = (bucket, base, shifts, k)
+        if grid_key != self.grid_key or closed - self.filled >= self.width:
+            # New grid, span or a long pause: start the image over
+            self.grid_key = grid_key
+            self.filled = max(0, closed - self.width + 1)
+            self.photo.blank()
+
+        if closed > self.filled:
+            rgb = self.render_columns(self.filled, closed, k, bucket, base, scale)
+            self.put(self.filled, rgb)
+            self.filled = closed
+
+        # The open column is redrawn every frame until it closes
+        self.put(closed, self.render_columns(closed, closed + 1, k, bucket, base, scale, stop=count))
+
+        # Newest column at the right edge; the second copy shows the wrapped-around older part
+        x = self.width - 1 - closed % self.width
+        self.heatmap.coords(self.images[0], x, 0)
+        self.heatmap.coords(self.images[1], x - self.width, 0)
+        self.widgets.itemconfig(self.heatmap, self.high_text, text=f"{(base + DEPTH_HEATMAP_ROWS) * bucket:,.2f}")
+        self.widgets.itemconfig(self.heatmap, self.low_text, text=f"{base * bucket:,.2f}")
+
+    def render_columns(self, first, last, k, bucket, base, scale, stop=None):
+        """Display columns [first, last) as a (columns, height, 3) image, high prices on top."""
+        n = last - first
+        quantities, best = self.history.columns(first * k, last * k if stop is None else stop)
+        # Columns that already left the history ring stay black
+        missing = n * k - len(quantities) if stop is None else 0
+        if missing > 0:
+            quantities = np.vstack([np.zeros((missing, DEPTH_HEATMAP_ROWS), dtype=np.float32), quantities])
+            best = np.vstack([np.full((missing, 2), np.nan), best])
+        if not len(quantities):
+            return np.zeros((n, self.height, 3), dtype=np.uint8)
+        if stop is None:
+            quantities = quantities.reshape(n, k, -1).max(axis=1)
+            best = best.reshape(n, k, 2)[:, -1]
+        else:
+            quantities = quantities.max(axis=0, keepdims=True)
+            best = best[-1:]
+
+        shade = np.log1p(quantities) / np.log1p(scale) if scale > 0 else np.zeros_like(quantities)
+        rgb = self.lut[np.clip(shade * 255, 0, 255).astype(np.uint8)]
+        for side, color in ((0, self.bid_color), (1, self.ask_color)):
+            rows = np.floor(best[:, side] / bucket) - base
+            valid = np.isfinite(rows) & (rows >= 0) & (rows < DEPTH_HEATMAP_ROWS)
+            rgb[np.flatnonzero(valid), rows[valid].astype(np.int64)] = color
+        return np.repeat(rgb[:, ::-1], self.row_pixels, axis=1)
+
+    def put(self, first, rgb):
+        """Write display columns starting at `first` into the ring image, split where it wraps."""
+        position = first % self.width
+        head = min(len(rgb), self.width - position)
+        for x, block in ((position, rgb[:head]), (0, rgb[head:])):
+            if len(block):
+                data = ppm(block.transpose(1, 0, 2))
+                self.photo.tk.call(self.photo.name, "put", data, "-format", "ppm", "-to", x, 0)
+
+    # --- Cumulative depth ---
+
+    def draw_curve(self):
+        bids, asks = self.book.top(DEPTH_CURVE_LEVELS)
+        if not bids or not asks: return
+        bids, asks = np.array(bids), np.array(asks)
+        bid_total, ask_total = np.cumsum(bids[:, 1]), np.cumsum(asks[:, 1])
+        low, high = bids[-1, 0], asks[-1, 0]
+        width, height = self.width, DEPTH_CURVE_HEIGHT
+        span = (high - low) or 1
+        top = max(bid_total[-1], ask_total[-1]) or 1
+
+        for item, prices, totals in ((self.bid_area, bids[:, 0], bid_total), (self.ask_area, asks[:, 0], ask_total)):
+            x = (prices - low) / span * width
+            y = height - totals / top * (height - 14)
+            # Steps: each level's total holds until the next price
+            points = np.empty((2 * len(x) + 2, 2))
+            points[0] = (x[0], height)
+            points[1:-1:2] = np.column_stack([x, np.r_[height, y[:-1]]])
+            points[2:-1:2] = np.column_stack([x, y])
+            points[-1] = (x[-1], height)
+            self.curve.coords(item, *points.ravel().tolist())
+
+        mid = (bids[0, 0] + asks[0, 0]) / 2
+        self.widgets.itemconfig(self.curve, self.curve_text, text=f"{low:,.2f}  |  mid {mid:,.2f}  |  {high:,.2f}")
+        self.widgets.config(self.status_label, text=f"Bids {bid_total[-1]:,.3f}  |  Asks {ask_total[-1]:,.3f}  (top {DEPTH_CURVE_LEVELS} levels)")
+
+    def change_symbol(self, new_symbol):
+        if self.symbol == new_symbol: return
+        was_active = self.is_active
+        self.stop()
+        self.symbol = new_symbol
+        self.frame.config(text=f"Depth ({self.symbol.upper()})")
+        self.widgets.config(self.status_label, text="Syncing...")
+        self.photo.blank()
+        if was_active:
+            self.start()
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def pack_forget(self):
+        self.frame.pack_forget()
@@ -0,0 +1,73 @@
+class Lifecycle:
+    """
+    Runs each registered component only while it is wanted (shown by the
+    user) and can actually be seen: hidden components, every component of
+    a minimized window and fully covered ones are stopped, which releases
+    their feeds and drops their queued frames. The engine keeps a released
+    feed warm for FEED_LINGER seconds, and a cold feed starts from REST
+    snapshots, so a component that comes back redraws at once instead of
+    waiting for a reconnect. Background components without a `frame` (e.g.
+    the SymbolCache) follow the window alone: they stop while it is minimized.
+    """
+    def __init__(self, root):
+        self.root = root
+        self.minimized = False
+        self.components = {} # component -> {"wanted": bool, "obscured": bool}
+        self.suspensions = 0
+        root.bind("<Unmap>", self.on_unmap, add="+")
+        root.bind("<Map>", self.on_map, add="+")
+
+    def add(self, component, wanted=True):
+        self.components[component] = {"wanted": wanted, "obscured": False}
+        frame = getattr(component, "frame", None)
+        if frame is not None:
+            # Only delivered where the window system reports it (X11)
+            frame.bind("<Visibility>", lambda event, c=component: self.on_visibility(c, event), add="+")
+        self.update(component)
+
+    def remove(self, component):
+        self.components.pop(component, None)
+
+    def set_wanted(self, component, wanted):
+        self.components[component]["wanted"] = wanted
+        self.update(component)
+
+    def should_run(self, component):
+        state = self.components[component]
+        return state["wanted"] and not state["obscured"] and not self.minimized
+
+    def update(self, component):
+        run = self.should_run(component)
+        if run and not component.is_active:
+            component.start()
+        elif not run and component.is_active:
+            component.stop()
+            self.suspensions += 1
+
+    def update_all(self):
+        for component in list(self.components):
+            self.update(component)
+
+    def on_unmap(self, event):
+        # <Unmap> bound on the root also fires for every child widget
+        if event.widget is self.root and not self.minimized:
+            self.minimized = True
+            self.update_all()
+
+    def on_map(self, event):
+        if event.widget is self.root and self.minimized:
+            self.minimized = False
+            self.update_all()
+
+    def on_visibility(self, component, event):
+        if event.widget is not component.frame or component not in self.components:
+            return
+        obscured = event.state == "VisibilityFullyObscured"
+        if obscured != self.components[component]["obscured"]:
+            self.components[component]["obscured"] = obscured
+            self.update(component)
+
+    def stats(self):
+        """(running, registered) panel counts; background components are left out."""
+        panels = [c for c in self.components if getattr(c, "frame", None) is not None]
+        return sum(c.is_active for c in panels), len(panels)
@@ -0,0 +1,88 @@
+import threading
+import time
+import numpy as np
+from config import *
+from core.metrics import shared_metrics
+
+def ppm(rgb):
+    """An (height, width, 3) uint8 array as binary PPM bytes, which tk.PhotoImage reads without PIL."""
+    height, width = rgb.shape[:2]
+    return f"P6 {width} {height} 255\n".encode() + np.ascontiguousarray(rgb).tobytes()
+
+def to_ppm(canvas):
+    """The last draw of an Agg canvas as PPM bytes."""
+    return ppm(np.asarray(canvas.buffer_rgba())[:, :, :3])
+
+class OffscreenRenderer:
+    """
+    One background thread that rasterizes Matplotlib figures with Agg.
+    Views `submit(key, draw, done)`: `draw()` runs on the render thread and
+    returns image bytes, `done(image)` then runs on the Tk thread through the
+    RenderLoop. Like the RenderLoop only the newest job per key is kept, and
+    the thread renders at most `fps` rounds per second, so a busy grid costs
+    the Tk thread one PhotoImage swap per cell and frame.
+    """
+    def __init__(self, render_loop, fps=CHART_GRID_FPS, metrics=None):
+        self.render_loop = render_loop
+        self.interval = 1 / fps
+        self.is_active = False
+        self.thread = None
+        self.condition = threading.Condition()
+        self.pending = {} # key -> (draw, done)
+
+        self.metrics = metrics or shared_metrics()
+        self.raster_time = self.metrics.histogram("dashboard_grid_raster_seconds", "Time to rasterize one chart offscreen")
+        self.rendered = 0
+        self.merged = 0
+
+    def start(self):
+        if self.is_active: return
+        self.is_active = True
+        self.thread = threading.Thread(target=self.run, name="offscreen-render", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        with self.condition:
+            self.is_active = False
+            self.pending.clear()
+            self.condition.notify()
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout=2)
+        self.thread = None
+
+    def submit(self, key, draw, done):
+        with self.condition:
+            if key in self.pending:
+                self.merged += 1
+            self.pending[key] = (draw, done)
+            self.condition.notify()
+
+    def discard(self, key):
+        with self.condition:
+            self.pending.pop(key, None)
+        self.render_loop.discard(key)
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.is_active and not self.pending:
+                    self.condition.wait()
+                if not self.is_active:
+                    return
+                jobs, self.pending = self.pending, {}
+
+            started = time.perf_counter()
+            for key, (draw, done) in jobs.items():
+                try:
+                    began = time.perf_counter()
+                    image = draw()
+                    self.raster_time.observe(time.perf_counter() - began)
+                except Exception as e:
+                    print(f"Offscreen Render Error: {e}")
+                    continue
+                self.rendered += 1
+                if image is not None:
+                    self.render_loop.submit(key, done, image)
+
+            # Frame limit: later jobs for the same keys merge in the meantime
+            time.sleep(max(0.0, self.interval - (time.perf_counter() - started)))
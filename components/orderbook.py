@@ -1,18 +1,21 @@
 import tkinter as tk
 from tkinter import ttk
-import threading
-import json
-import ssl
-import certifi
-import websocket
 from config import *
+from core.engine import shared_engine
+from components.render_loop import render_loop_for
+from components.widget_cache import shared_widget_cache
 
 class OrderBookPanel:
-    def __init__(self, parent, symbol="btcusdt"):
+    def __init__(self, parent, symbol="btcusdt", engine=None, render_loop=None):
         self.parent = parent
         self.symbol = symbol.lower()
         self.is_active = False
-        self.ws = None
+        self.engine = engine or shared_engine()
+        self.feed = None
+        self.render_loop = render_loop or render_loop_for(parent)
+        self.widgets = shared_widget_cache() # Levels that did not change are not reconfigured
+        self.book = None
+        self.levels = ORDERBOOK_LEVELS
 
         self.frame = ttk.LabelFrame(parent, text=f"Order Book ({self.symbol.upper()})", padding=10)
 
@@ -27,7 +30,7 @@ class OrderBookPanel:
         self.bid_labels = [] # (price_label, qty_label)
         self.ask_labels = [] # (price_label, qty_label)
 
-        for i in range(10):
+        for i in range(self.levels):
             # Bids (Green)
             bp = ttk.Label(self.frame, text="--", foreground=COLOR_UP)
             bq = ttk.Label(self.frame, text="--")
@@ -42,70 +45,70 @@ class OrderBookPanel:
             aq.grid(row=i+1, column=3, padx=5)
             self.ask_labels.append((ap, aq))
 
+        # Spread / sync status
+        self.status_label = ttk.Label(self.frame, text="Syncing...", foreground="gray")
+        self.status_label.grid(row=self.levels+1, column=0, columnspan=4, pady=(5, 0))
+
     def start(self):
         if self.is_active: return
         self.is_active = True
+        # The engine's BookFeed keeps the local book; this panel only draws it
+        self.attach(self.engine.book(self.symbol))
 
-        # Partial Depth Stream: <symbol>@depth<levels>@1000ms
-        ws_url = f"{BINANCE_WS_URL}/{self.symbol}@depth10@1000ms"
-
-        ssl_context = ssl.create_default_context(cafile=certifi.where())
-        self.ws = websocket.WebSocketApp(
-            ws_url,
-            on_message=self.on_message,
-            on_error=self.on_error,
-            on_close=self.on_close,
-             on_open=self.on_open
-        )
-
-        threading.Thread(target=self.ws.run_forever, kwargs={"sslopt": {"context": ssl_context}}, daemon=True).start()
+    def attach(self, feed):
+        self.feed = feed
+        self.book = feed.book
+        feed.add_listener(self.on_update)
+        if self.book.is_synced:
+            self.render_loop.submit(self, self.update_ui)
 
     def stop(self):
         self.is_active = False
-        if self.ws:
-            self.ws.close()
-            self.ws = None
-
-    def on_message(self, ws, message):
-        if not self.is_active: return
-        try:
-            data = json.loads(message)
-            self.frame.after(0, self.update_ui, data)
-        except Exception as e:
-            print(f"OrderBook Error: {e}")
-
-    def update_ui(self, data):
-        bids = data.get('bids', [])
-        asks = data.get('asks', [])
-
-        # Update Bids
-        for i, (price, qty) in enumerate(bids[:10]):
-            pl, ql = self.bid_labels[i]
-            pl.config(text=f"{float(price):.2f}")
-            ql.config(text=f"{float(qty):.4f}")
-
-        # Update Asks
-        for i, (price, qty) in enumerate(asks[:10]):
-            pl, ql = self.ask_labels[i]
-            pl.config(text=f"{float(price):.2f}")
-            ql.config(text=f"{float(qty):.4f}")
+        if self.feed:
+            self.feed.remove_listener(self.on_update)
+            self.engine.release(self.feed)
+            self.feed = None
+        self.book = None
+        self.render_loop.discard(self)
+
+    def on_update(self):
+        # The book absorbs every diff; the UI only redraws once per frame
+        if self.is_active:
+            self.render_loop.submit(self, self.update_ui)
+
+    def update_ui(self):
+        if not self.is_active or self.book is None or not self.book.is_synced: return
+
+        bids, asks = self.book.top(self.levels)
+        self.fill_side(self.bid_labels, bids)
+        self.fill_side(self.ask_labels, asks)
+
+        spread = self.book.spread()
+        n_bids, n_asks = self.book.depth()
+        spread_text = f"{spread:.2f}" if spread is not None else "--"
+        self.widgets.config(self.status_label, text=f"Spread: {spread_text}  |  Levels: {n_bids:,} / {n_asks:,}")
+
+    def fill_side(self, labels, levels):
+        for i, (pl, ql) in enumerate(labels):
+            if i < len(levels):
+                price, qty = levels[i]
+                self.widgets.config(pl, text=f"{price:.2f}")
+                self.widgets.config(ql, text=f"{qty:.4f}")
+            else:
+                self.widgets.config(pl, text="--")
+                self.widgets.config(ql, text="--")
 
     def change_symbol(self, new_symbol):
         if self.symbol == new_symbol: return
 
+        # A suspended panel picks the new symbol up when it resumes
+        was_active = self.is_active
         self.stop()
         self.symbol = new_symbol
         self.frame.config(text=f"Order Book ({self.symbol.upper()})")
-        self.start()
-
-    def on_error(self, ws, error):
-        print(f"OrderBook WS Error: {error}")
-
-    def on_close(self, ws, status, msg):
-        print("OrderBook WS Closed")
-
-    def on_open(self, ws):
-        print("OrderBook WS Connected")
+        self.widgets.config(self.status_label, text="Syncing...")
+        if was_active:
+            self.start()
 
     def pack(self, **kwargs):
         self.frame.pack(**kwargs)
@@ -0,0 +1,116 @@
+import tkinter as tk
+from tkinter import ttk
+from config import *
+from core.metrics import shared_metrics
+
+class PerfOverlay:
+    """
+    Live view of the instrumentation in a Metrics registry.
+    Once a second it shows, for the last second only: message rate and
+    handler time per stream, decode time, Tk tick lag, frame queue wait and
+    depth per component, chart plot/draw/blit, grid raster and depth draw
+    times, widget configure calls made and skipped, and the thread count.
+    """
+    def __init__(self, parent, metrics=None, interval=1000):
+        self.parent = parent
+        self.metrics = metrics or shared_metrics()
+        self.interval = interval
+        self.is_active = False
+        self.job = None
+        self.previous = {} # (metric, labels) -> counter value or histogram snapshot
+
+        self.frame = ttk.LabelFrame(parent, text="Performance", padding=10)
+        self.text = tk.Text(self.frame, width=64, height=24, font=("Courier", 9), relief="flat", state=tk.DISABLED)
+        self.text.pack(fill=tk.BOTH, expand=True)
+
+    def start(self):
+        if self.is_active: return
+        self.is_active = True
+        self.refresh()
+
+    def stop(self):
+        self.is_active = False
+        if self.job:
+            self.frame.after_cancel(self.job)
+            self.job = None
+
+    def delta(self, name, labels, metric):
+        """Counter increase, or histogram bucket snapshot, since the previous refresh."""
+        key = (name, labels)
+        if hasattr(metric, "counts"):
+            since = self.previous.get(key)
+            self.previous[key] = metric.snapshot()
+            return since
+        last = self.previous.get(key, metric.value)
+        self.previous[key] = metric.value
+        return metric.value - last
+
+    def window(self, name, labels, histogram):
+        """(p50, p99) in ms over the last refresh interval, or None when nothing was observed."""
+        since = self.delta(name, labels, histogram)
+        p50 = histogram.quantile(0.5, since)
+        if p50 is None:
+            return None
+        return p50 * 1000, histogram.quantile(0.99, since) * 1000
+
+    def format_window(self, values):
+        return "--" if values is None else f"{values[0]:7.2f} / {values[1]:7.2f}"
+
+    def refresh(self):
+        if not self.is_active: return
+        self.metrics.collect()
+        seconds = self.interval / 1000
+        metrics = self.metrics
+        lines = []
+
+        lines.append(f"{'Stream':<28}{'msg/s':>8}   handler p50 / p99 ms")
+        handlers = metrics.family("dashboard_stream_handler_seconds")
+        for labels, counter in sorted(metrics.family("dashboard_stream_messages_total").items()):
+            rate = self.delta("dashboard_stream_messages_total", labels, counter) / seconds
+            stream = dict(labels)["stream"]
+            handler = self.window("dashboard_stream_handler_seconds", labels, handlers[labels]) if labels in handlers else None
+            lines.append(f"{stream[:27]:<28}{rate:>8.1f}   {self.format_window(handler)}")
+
+        lines.append("")
+        lines.append(f"{'Timing (ms)':<28}{'p50 / p99':>19}")
+        for title, name in (("Decode", "dashboard_decode_seconds"),
+                            ("Tk tick lag", "dashboard_ui_tick_lag_seconds"),
+                            ("Frame flush", "dashboard_ui_frame_seconds"),
+                            ("Chart plot", "dashboard_chart_plot_seconds"),
+                            ("Chart draw", "dashboard_chart_draw_seconds"),
+                            ("Chart blit", "dashboard_chart_blit_seconds"),
+                            ("Grid raster", "dashboard_grid_raster_seconds"),
+                            ("Depth draw", "dashboard_depth_draw_seconds")):
+            for labels, histogram in metrics.family(name).items():
+                lines.append(f"{title:<28}{self.format_window(self.window(name, labels, histogram)):>19}")
+
+        lines.append("")
+        lines.append(f"{'Component':<28}{'queue':>6}   wait p50 / p99 ms")
+        waits = metrics.family("dashboard_ui_queue_wait_seconds")
+        for labels, gauge in sorted(metrics.family("dashboard_ui_queue_depth").items()):
+            component = dict(labels)["component"]
+            wait = self.window("dashboard_ui_queue_wait_seconds", labels, waits[labels]) if labels in waits else None
+            lines.append(f"{component[:27]:<28}{gauge.value:>6}   {self.format_window(wait)}")
+
+        configures = {dict(labels)["result"]: self.delta("dashboard_ui_configure_total", labels, counter) / seconds
+                      for labels, counter in metrics.family("dashboard_ui_configure_total").items()}
+        lines.append("")
+        lines.append(f"Widget configure/s: {configures.get('applied', 0):,.0f} made, {configures.get('skipped', 0):,.0f} skipped")
+
+        threads = metrics.family("dashboard_threads")
+        cpu = metrics.family("dashboard_process_cpu_seconds")
+        cpu_share = sum(self.delta("dashboard_process_cpu_seconds", labels, g) for labels, g in cpu.items()) / seconds
+        lines.append("")
+        lines.append(f"Threads: {sum(g.value for g in threads.values())}   CPU: {cpu_share:.0%}")
+
+        self.text.config(state=tk.NORMAL)
+        self.text.delete("1.0", tk.END)
+        self.text.insert("1.0", "\n".join(lines))
+        self.text.config(state=tk.DISABLED)
+        self.job = self.frame.after(self.interval, self.refresh)
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def pack_forget(self):
+        self.frame.pack_forget()
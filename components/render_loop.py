@@ -0,0 +1,165 @@
+import threading
+import time
+from config import *
+from core.metrics import shared_metrics
+
+class RenderLoop:
+    """
+    Frame-rate-limited UI update scheduler.
+    Socket threads hand their updates here instead of calling `after(0, ...)`
+    per message; only the latest state per key (or a batch of items) is kept
+    and everything is flushed once per frame on the Tk main thread.
+    """
+    def __init__(self, root, fps=UI_FPS, metrics=None):
+        self.root = root
+        self.interval = max(1, int(1000 / fps))
+        self.is_active = False
+        self.after_id = None
+        self.tick_due = 0 # perf_counter() time the next tick was asked for
+
+        self.lock = threading.Lock()
+        self.pending = {} # key -> (callback, args, queued at)
+        self.batches = {} # key -> (callback, [items], queued at)
+
+        # Instrumentation: how late Tk runs our ticks, how long updates wait
+        # for a frame and how long each component takes to draw
+        self.metrics = metrics or shared_metrics()
+        self.tick_lag = self.metrics.histogram("dashboard_ui_tick_lag_seconds", "Delay of render ticks beyond their Tk after() interval")
+        self.frame_time = self.metrics.histogram("dashboard_ui_frame_seconds", "Time to flush one frame")
+        self.component_metrics = {} # component name -> (queue wait, callback time) histograms
+
+        # Stats
+        self.submitted = 0 # Updates handed in by socket threads
+        self.merged = 0 # Updates replaced by a newer one before being drawn
+        self.batched = 0 # Items delivered inside a batch rather than on their own
+        self.flushed = 0 # Callbacks actually run on the main thread
+        self.frames = 0
+
+    def start(self):
+        if self.is_active: return
+        self.is_active = True
+        # Registered per start, as stop() removes it
+        self.metrics.add_collector(self.collect)
+        self.schedule()
+
+    def stop(self):
+        self.is_active = False
+        self.metrics.remove_collector(self.collect)
+        if self.after_id:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+
+    def submit(self, key, callback, *args):
+        """Schedule `callback(*args)` for the next frame, replacing any older update for `key`."""
+        with self.lock:
+            self.submitted += 1
+            queued = time.perf_counter()
+            if key in self.pending:
+                self.merged += 1
+                queued = self.pending[key][2] # Waiting since the first update of this frame
+            self.pending[key] = (callback, args, queued)
+
+    def append(self, key, callback, item):
+        """Queue `item`; `callback(items)` receives everything queued for `key` since the last frame."""
+        with self.lock:
+            self.submitted += 1
+            if key in self.batches:
+                self.batches[key][1].append(item)
+                self.batched += 1
+            else:
+                self.batches[key] = (callback, [item], time.perf_counter())
+
+    def discard(self, key):
+        """Drop anything still queued for `key` (e.g. after a symbol switch)."""
+        with self.lock:
+            self.pending.pop(key, None)
+            self.batches.pop(key, None)
+
+    def schedule(self):
+        self.tick_due = time.perf_counter() + self.interval / 1000
+        self.after_id = self.root.after(self.interval, self.tick)
+
+    def tick(self):
+        if not self.is_active: return
+        self.tick_lag.observe(max(0.0, time.perf_counter() - self.tick_due))
+        self.flush()
+        self.schedule()
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            batches, self.batches = self.batches, {}
+
+        started = time.perf_counter()
+        self.frames += 1
+        for key, (callback, args, queued) in pending.items():
+            self.run(key, callback, args, queued)
+        for key, (callback, items, queued) in batches.items():
+            self.run(key, callback, (items,), queued)
+        self.frame_time.observe(time.perf_counter() - started)
+
+    def run(self, key, callback, args, queued):
+        self.flushed += 1
+        wait, duration = self.instruments(key)
+        started = time.perf_counter()
+        wait.observe(started - queued)
+        try:
+            callback(*args)
+        except Exception as e:
+            print(f"Render Error: {e}")
+        duration.observe(time.perf_counter() - started)
+
+    def instruments(self, key):
+        name = component_name(key)
+        instruments = self.component_metrics.get(name)
+        if instruments is None:
+            instruments = self.component_metrics[name] = (
+                self.metrics.histogram("dashboard_ui_queue_wait_seconds", "Time an update waited for its frame", component=name),
+                self.metrics.histogram("dashboard_ui_callback_seconds", "Time a component spent drawing", component=name))
+        return instruments
+
+    def collect(self, metrics):
+        """Queue depth per component (items waiting for the next frame) and the frame counters."""
+        depths = {name: 0 for name in self.component_metrics}
+        with self.lock:
+            for key in self.pending:
+                depths[component_name(key)] = depths.get(component_name(key), 0) + 1
+            for key, (_, items, _) in self.batches.items():
+                depths[component_name(key)] = depths.get(component_name(key), 0) + len(items)
+            counters = {"submitted": self.submitted, "merged": self.merged, "batched": self.batched, "flushed": self.flushed}
+        for name, depth in depths.items():
+            metrics.gauge("dashboard_ui_queue_depth", "Updates waiting for the next frame", component=name).set(depth)
+        for name, value in counters.items():
+            metrics.gauge("dashboard_ui_updates", "Render loop update counters since start", kind=name).set(value)
+
+    def stats(self):
+        """Counters describing how much work the frame limiter saved."""
+        with self.lock:
+            return {
+                "fps": round(1000 / self.interval, 1),
+                "frames": self.frames,
+                "submitted": self.submitted,
+                "merged": self.merged,
+                "batched": self.batched,
+                "flushed": self.flushed,
+            }
+
+
+def component_name(key):
+    """Metric label for a render loop key: the component class, plus its stream when it has one."""
+    stream = getattr(key, "stream", None)
+    name = type(key).__name__
+    return f"{name}:{stream}" if isinstance(stream, str) else name
+
+
+_loops = {}
+
+def render_loop_for(widget):
+    """Return the render loop for `widget`'s Tk root, creating and starting it if needed."""
+    root = widget.winfo_toplevel()._root()
+    loop = _loops.get(root)
+    if loop is None:
+        loop = RenderLoop(root)
+        loop.start()
+        _loops[root] = loop
+    return loop
@@ -1,27 +1,25 @@
 import tkinter as tk
 from tkinter import ttk
-import certifi
-import ssl
-import socket
-import websocket
-import json
-import threading
 from config import *
+from core.engine import shared_engine
+from components.render_loop import render_loop_for
+from components.widget_cache import shared_widget_cache
 
 class CryptoTicker:
     """
     Reusable ticker component for a single cryptocurrency.
-    Manages its own WebSocket connection and UI updates.
+    A view over the engine's TickerFeed for the symbol.
     """
-    def __init__(self, parent, symbol, display_name, on_click=None):
+    def __init__(self, parent, symbol, display_name, on_click=None, engine=None, render_loop=None):
         self.parent = parent
         self.symbol = symbol.lower()
         self.display_name = display_name
         self.on_click = on_click
         self.is_active = False
-        self.ws = None
-
-        self.ws = None
+        self.engine = engine or shared_engine()
+        self.feed = None
+        self.render_loop = render_loop or render_loop_for(parent)
+        self.widgets = shared_widget_cache() # Skips label updates that would not change anything
 
         # Create UI
         self.frame = tk.Frame(parent, relief="solid", borderwidth=1, bg="white")
@@ -79,50 +77,36 @@ class CryptoTicker:
             self.frame.config(relief="solid", borderwidth=1)
 
     def start(self):
-        """Start WebSocket connection in a separate thread."""
+        """Acquire the symbol's ticker feed from the engine."""
         if self.is_active:
             return
 
         self.is_active = True
-        ws_url = f"{BINANCE_WS_URL}/{self.symbol}@ticker"
-
-        # Create SSL context using certifi
-        ssl_context = ssl.create_default_context(cafile=certifi.where())
-
-        self.ws = websocket.WebSocketApp(
-            ws_url,
-            on_message=self.on_message,
-            on_error=self.on_error,
-            on_close=self.on_close,
-            on_open=self.on_open
-        )
-
+        self.attach(self.engine.ticker(self.symbol))
 
-        threading.Thread(target=self.ws.run_forever, kwargs={"sslopt": {"context": ssl_context}}, daemon=True).start()
+    def attach(self, feed):
+        """Show `feed` (a TickerFeed); the last known tick is drawn right away."""
+        self.feed = feed
+        feed.add_listener(self.on_update)
+        if feed.last:
+            self.render_loop.submit(self, self.update_display, *feed.last)
 
     def stop(self):
-        """Stop WebSocket connection."""
+        """Release the ticker feed."""
         self.is_active = False
-        if self.ws:
-            self.ws.close()
-            self.ws = None
-
-    def on_message(self, ws, message):
-        """Handle incoming WebSocket messages."""
+        if self.feed:
+            self.feed.remove_listener(self.on_update)
+            self.engine.release(self.feed)
+            self.feed = None
+        self.render_loop.discard(self)
+
+    def on_update(self, price, change, percent, volume):
+        """Handle ticker updates from the feed (socket thread)."""
         if not self.is_active:
             return
 
-        try:
-            data = json.loads(message)
-            price = float(data['c'])
-            change = float(data['p'])
-            percent = float(data['P'])
-            volume = float(data['q']) # Quote asset volume (e.g. USDT volume)
-
-            # Schedule UI update on the main thread
-            self.parent.after(0, self.update_display, price, change, percent, volume)
-        except Exception as e:
-            print(f"Error parsing message: {e}")
+        # Only the latest tick per frame reaches the UI
+        self.render_loop.submit(self, self.update_display, price, change, percent, volume)
 
     def update_display(self, price, change, percent, volume):
         """Update the UI with new price data."""
@@ -130,24 +114,15 @@ class CryptoTicker:
             return
 
         color = COLOR_UP if change >= 0 else COLOR_DOWN
-        self.price_label.config(text=f"{price:,.2f}", fg=color)
+        self.widgets.config(self.price_label, text=f"{price:,.2f}", fg=color)
 
         sign = "+" if change >= 0 else ""
-        self.change_label.config(
+        self.widgets.config(self.change_label,
             text=f"{sign}{change:,.2f} ({sign}{percent:.2f}%)",
             foreground=color
         )
 
-        self.volume_label.config(text=f"Vol: {volume:,.0f}")
-
-    def on_error(self, ws, error):
-        print(f"WebSocket Error ({self.symbol}): {error}")
-
-    def on_close(self, ws, status, msg):
-        print(f"WebSocket Closed ({self.symbol})")
-
-    def on_open(self, ws):
-        print(f"WebSocket Connected ({self.symbol})")
+        self.widgets.config(self.volume_label, text=f"Vol: {volume:,.0f}")
 
     def pack(self, **kwargs):
         self.frame.pack(**kwargs)
@@ -1,25 +1,60 @@
 import tkinter as tk
 from tkinter import ttk
-import threading
-import json
-import ssl
-import certifi
-import websocket
+from collections import deque
 from config import *
+from core.engine import shared_engine
+from components.render_loop import render_loop_for
+from components.widget_cache import shared_widget_cache
 import datetime
+import time
 
 class TradesPanel:
-    def __init__(self, parent, symbol="btcusdt"):
+    """
+    Trade tape backed by a fixed-capacity ring buffer.
+    Trades come from the engine's TradeFeed (which also does the gap
+    backfill and keeps the TradeStats, exposed as `self.stats`), land in the
+    buffer in one batch per frame, and only the rows that fit the view are
+    written to the Treeview (its items are created once and reused).
+    """
+    def __init__(self, parent, symbol="btcusdt", engine=None, render_loop=None,
+                 visible_rows=TRADES_VISIBLE_ROWS, buffer_size=TRADES_BUFFER_SIZE,
+                 stream_type=TRADES_STREAM):
         self.parent = parent
         self.symbol = symbol.lower()
         self.is_active = False
-        self.ws = None
+        self.engine = engine or shared_engine()
+        self.feed = None
+        self.stream_type = stream_type # "trade" or "aggTrade"
+        self.render_loop = render_loop or render_loop_for(parent)
+        self.widgets = shared_widget_cache()
+        self.stats = None # The feed's TradeStats while started
+        self.stats_job = None
+
+        # (trade time ms, price, qty, is_buyer_maker), newest on the right
+        self.trades = deque(maxlen=buffer_size)
+        self.visible_rows = visible_rows
+        self.offset = 0 # Rows scrolled back from the newest trade
+        self.shown = [None] * visible_rows # Trade currently drawn in each row
 
         self.frame = ttk.LabelFrame(parent, text=f"Recent Trades ({self.symbol.upper()})", padding=10)
 
+        # Aggregated-trade toggle
+        self.agg_var = tk.BooleanVar(value=stream_type == "aggTrade")
+        ttk.Checkbutton(self.frame, text="Aggregated trades", variable=self.agg_var,
+                        command=self.toggle_aggregated).pack(anchor=tk.W)
+
+        # Rolling statistics (one line per window)
+        self.stats_labels = {}
+        stats_frame = ttk.Frame(self.frame)
+        stats_frame.pack(side=tk.BOTTOM, fill=tk.X, pady=(5, 0))
+        for seconds in TRADE_STATS_WINDOWS:
+            label = ttk.Label(stats_frame, text=f"{self.window_name(seconds)}: --", font=("Arial", 9), foreground="gray")
+            label.pack(anchor=tk.W)
+            self.stats_labels[seconds] = label
+
         # Treeview for details
         columns = ("time", "price", "qty")
-        self.tree = ttk.Treeview(self.frame, columns=columns, show="headings", height=10)
+        self.tree = ttk.Treeview(self.frame, columns=columns, show="headings", height=visible_rows)
         self.tree.heading("time", text="Time")
         self.tree.heading("price", text="Price")
         self.tree.heading("qty", text="Qty")
@@ -28,83 +63,156 @@ class TradesPanel:
         self.tree.column("price", width=100)
         self.tree.column("qty", width=100)
 
+        # isBuyerMaker = True -> The maker was a buyer. The taker was a seller. So it's a SELL trade ( Red ).
+        # isBuyerMaker = False -> The maker was a seller. The taker was a buyer. So it's a BUY trade ( Green ).
+        self.tree.tag_configure("buy", foreground=COLOR_UP)
+        self.tree.tag_configure("sell", foreground=COLOR_DOWN)
+
+        # Fixed set of row items, rewritten in place
+        self.rows = [self.tree.insert("", tk.END, values=("", "", "")) for _ in range(visible_rows)]
+
+        # The scrollbar walks the ring buffer, not the Treeview items
+        self.scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.tree.pack(fill=tk.BOTH, expand=True)
 
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.tree.bind(sequence, self.on_wheel)
+
     def start(self):
         if self.is_active: return
         self.is_active = True
-
-        ws_url = f"{BINANCE_WS_URL}/{self.symbol}@trade"
-
-        ssl_context = ssl.create_default_context(cafile=certifi.where())
-        self.ws = websocket.WebSocketApp(
-            ws_url,
-            on_message=self.on_message,
-            on_error=self.on_error,
-            on_close=self.on_close,
-             on_open=self.on_open
-        )
-
-        threading.Thread(target=self.ws.run_forever, kwargs={"sslopt": {"context": ssl_context}}, daemon=True).start()
+        self.attach(self.engine.trades(self.symbol, self.stream_type))
+
+    def attach(self, feed):
+        self.feed = feed
+        self.stats = feed.stats
+        # The feed's buffer is the source of truth (also after a suspension)
+        self.trades.clear()
+        self.trades.extend(feed.trades)
+        self.offset = 0
+        feed.add_listener(self.on_trade)
+        self.render()
+        self.update_stats()
 
     def stop(self):
         self.is_active = False
-        if self.ws:
-            self.ws.close()
-            self.ws = None
-
-    def on_message(self, ws, message):
-        if not self.is_active: return
-        try:
-            data = json.loads(message)
-            self.frame.after(0, self.add_trade, data)
-        except Exception as e:
-            print(f"Trade Error: {e}")
-
-    def add_trade(self, data):
-        # Data: e, E, s, t, p, q, b, a, T, m, M
+        if self.feed:
+            self.feed.remove_listener(self.on_trade)
+            self.engine.release(self.feed)
+            self.feed = None
+        if self.stats_job:
+            self.frame.after_cancel(self.stats_job)
+            self.stats_job = None
+        self.render_loop.discard(self)
+
+    def on_trade(self, trade):
+        # Trades are batched per frame instead of one callback each
+        if self.is_active:
+            self.render_loop.append(self, self.add_trades, trade)
+
+    def parse(self, data):
+        # trade:    e, E, s, t, p, q, b, a, T, m, M
+        # aggTrade: e, E, s, a, p, q, f, l, T, m, M
         # p = price, q = quantity, T = trade time, m = isBuyerMaker (True=Sell, False=Buy)
+        return (data['T'], float(data['p']), float(data['q']), data['m'])
 
-        price = float(data['p'])
-        qty = float(data['q'])
-        timestamp = data['T']
-        is_buyer_maker = data['m']
+    def toggle_aggregated(self):
+        self.set_stream_type("aggTrade" if self.agg_var.get() else "trade")
 
-        time_str = datetime.datetime.fromtimestamp(timestamp/1000).strftime('%H:%M:%S')
-
-        color = COLOR_DOWN if is_buyer_maker else COLOR_UP # Maker=Sell -> Red, Maker=Buy(Taker=Sell) -> Red? 
-        # isBuyerMaker = True -> The maker was a buyer. The taker was a seller. So it's a SELL trade ( Red ).
-        # isBuyerMaker = False -> The maker was a seller. The taker was a buyer. So it's a BUY trade ( Green ).
-
-        tag = "sell" if is_buyer_maker else "buy"
-
-        item = self.tree.insert("", 0, values=(time_str, f"{price:,.2f}", f"{qty:,.4f}"), tags=(tag,))
-
-        # Keep list short
-        if len(self.tree.get_children()) > 20:
-            self.tree.delete(self.tree.get_children()[-1])
+    def set_stream_type(self, stream_type):
+        if self.stream_type == stream_type: return
+        was_active = self.is_active
+        self.stop()
+        self.stream_type = stream_type
+        self.clear()
+        if was_active:
+            self.start()
+
+    def window_name(self, seconds):
+        return f"{seconds}s" if seconds < 60 else f"{seconds // 60}m"
+
+    def update_stats(self):
+        """Refresh the statistics lines once per second."""
+        if not self.is_active or self.stats is None: return
+        snapshot = self.stats.snapshot(now=time.time() * 1000)
+        for seconds, label in self.stats_labels.items():
+            s = snapshot[seconds]
+            vwap = f"{s['vwap']:,.2f}" if s["vwap"] is not None else "--"
+            text = (f"{self.window_name(seconds)}: VWAP {vwap} | "
+                    f"Imb {s['imbalance']:+.0%} | {s['tps']:.1f} t/s | Large {s['large']}")
+            self.widgets.config(label, text=text, foreground=COLOR_UP if s["imbalance"] > 0 else COLOR_DOWN if s["imbalance"] < 0 else "gray")
+        self.stats_job = self.frame.after(1000, self.update_stats)
 
-        self.tree.tag_configure("buy", foreground=COLOR_UP)
-        self.tree.tag_configure("sell", foreground=COLOR_DOWN)
+    def add_trade(self, data):
+        self.add_trades([self.parse(data)])
+
+    def add_trades(self, trades):
+        self.trades.extend(trades)
+
+        # Keep the same trades on screen while the user is scrolled back
+        if self.offset:
+            self.offset = min(self.offset + len(trades), self.max_offset())
+        self.render()
+
+    def max_offset(self):
+        return max(0, len(self.trades) - self.visible_rows)
+
+    def render(self):
+        n = len(self.trades)
+        for i, item in enumerate(self.rows):
+            index = n - 1 - self.offset - i
+            trade = self.trades[index] if index >= 0 else None
+            if trade is self.shown[i]:
+                continue
+            self.shown[i] = trade
+
+            if trade is None:
+                self.tree.item(item, values=("", "", ""), tags=())
+                continue
+            timestamp, price, qty, is_buyer_maker = trade
+            time_str = datetime.datetime.fromtimestamp(timestamp/1000).strftime('%H:%M:%S')
+            tag = "sell" if is_buyer_maker else "buy"
+            self.tree.item(item, values=(time_str, f"{price:,.2f}", f"{qty:,.4f}"), tags=(tag,))
+
+        if n:
+            first = self.offset / n
+            self.scrollbar.set(first, min(1.0, first + self.visible_rows / n))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def scroll_to(self, offset):
+        self.offset = int(min(max(offset, 0), self.max_offset()))
+        self.render()
+
+    def yview(self, *args):
+        if args[0] == "moveto":
+            self.scroll_to(float(args[1]) * len(self.trades))
+        elif args[0] == "scroll":
+            step = int(args[1]) * (self.visible_rows if args[2] == "pages" else 1)
+            self.scroll_to(self.offset + step)
+
+    def on_wheel(self, event):
+        if event.num == 4 or event.delta > 0:
+            self.scroll_to(self.offset - 3)
+        else:
+            self.scroll_to(self.offset + 3)
+        return "break"
 
     def change_symbol(self, new_symbol):
         if self.symbol == new_symbol: return
+        was_active = self.is_active
         self.stop()
         self.symbol = new_symbol
         self.frame.config(text=f"Recent Trades ({self.symbol.upper()})")
-        # Clear tree
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        self.start()
-
-    def on_error(self, ws, error):
-        print(f"Trade WS Error: {error}")
-
-    def on_close(self, ws, status, msg):
-        print("Trade WS Closed")
-
-    def on_open(self, ws):
-        print("Trade WS Connected")
+        self.clear()
+        if was_active:
+            self.start()
+
+    def clear(self):
+        self.trades.clear()
+        self.offset = 0
+        self.render()
 
     def pack(self, **kwargs):
         self.frame.pack(**kwargs)
@@ -0,0 +1,177 @@
+import tkinter as tk
+from tkinter import ttk
+from config import *
+from core.engine import shared_engine
+from core.market_table import MarketTable
+from components.render_loop import render_loop_for
+from components.widget_cache import shared_widget_cache
+
+SORT_OPTIONS = {"Change %": "change", "Volume": "volume", "Price": "price", "Symbol": "symbol"}
+
+class WatchlistPanel:
+    """
+    Market-wide watchlist fed by the all-market mini ticker stream.
+    State lives in the engine's MarketFeed (a MarketTable); the panel
+    re-sorts and filters it at most once per frame and only writes the rows
+    that fit the view.
+    """
+    def __init__(self, parent, engine=None, render_loop=None, on_click=None,
+                 stream=WATCHLIST_STREAM, visible_rows=WATCHLIST_VISIBLE_ROWS):
+        self.parent = parent
+        self.is_active = False
+        self.engine = engine or shared_engine()
+        self.render_loop = render_loop or render_loop_for(parent)
+        self.widgets = shared_widget_cache()
+        self.on_click = on_click
+        self.stream = stream
+        self.feed = None
+        self.table = MarketTable() # The feed's table while started
+
+        self.visible_rows = visible_rows
+        self.offset = 0
+        self.order = [] # Filtered + sorted row indexes
+        self.shown = [None] * visible_rows
+
+        self.frame = ttk.LabelFrame(parent, text="Watchlist", padding=10)
+
+        # Filters
+        controls = ttk.Frame(self.frame)
+        controls.pack(fill=tk.X)
+        ttk.Label(controls, text="Search:").grid(row=0, column=0, sticky=tk.W)
+        self.text_var = tk.StringVar()
+        ttk.Entry(controls, textvariable=self.text_var, width=10).grid(row=0, column=1, padx=5)
+        ttk.Label(controls, text="Quote:").grid(row=0, column=2, sticky=tk.W)
+        self.quote_var = tk.StringVar(value=WATCHLIST_QUOTE)
+        ttk.Entry(controls, textvariable=self.quote_var, width=6).grid(row=0, column=3, padx=5)
+
+        ttk.Label(controls, text="Sort:").grid(row=1, column=0, sticky=tk.W, pady=(5, 0))
+        self.sort_var = tk.StringVar(value="Change %")
+        ttk.Combobox(controls, textvariable=self.sort_var, values=list(SORT_OPTIONS), width=9,
+                     state="readonly").grid(row=1, column=1, padx=5, pady=(5, 0))
+        self.desc_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(controls, text="Desc", variable=self.desc_var).grid(row=1, column=2, columnspan=2, sticky=tk.W, pady=(5, 0))
+
+        for var in (self.text_var, self.quote_var, self.sort_var, self.desc_var):
+            var.trace_add("write", lambda *args: self.schedule_refresh())
+
+        self.count_label = ttk.Label(self.frame, text="0 symbols", foreground="gray")
+        self.count_label.pack(side=tk.BOTTOM, anchor=tk.W)
+
+        # Virtualized table: fixed row items, scrollbar over the filtered result
+        columns = ("symbol", "price", "change", "volume")
+        self.tree = ttk.Treeview(self.frame, columns=columns, show="headings", height=visible_rows, selectmode="none")
+        for col, text, width in (("symbol", "Symbol", 90), ("price", "Price", 90), ("change", "Chg %", 60), ("volume", "Vol (quote)", 90)):
+            self.tree.heading(col, text=text, command=lambda c=col: self.sort_by_heading(c))
+            self.tree.column(col, width=width, anchor=tk.E if col != "symbol" else tk.W)
+        self.tree.tag_configure("up", foreground=COLOR_UP)
+        self.tree.tag_configure("down", foreground=COLOR_DOWN)
+        self.rows = [self.tree.insert("", tk.END, values=("", "", "", "")) for _ in range(visible_rows)]
+
+        self.scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(fill=tk.BOTH, expand=True)
+
+        self.tree.bind("<Button-1>", self.handle_click)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.tree.bind(sequence, self.on_wheel)
+
+    def start(self):
+        if self.is_active: return
+        self.is_active = True
+        self.attach(self.engine.market(self.stream))
+
+    def attach(self, feed):
+        self.feed = feed
+        self.table = feed.table
+        feed.add_listener(self.on_update)
+        self.schedule_refresh()
+
+    def stop(self):
+        self.is_active = False
+        if self.feed:
+            self.feed.remove_listener(self.on_update)
+            self.engine.release(self.feed)
+            self.feed = None
+        self.render_loop.discard(self)
+
+    def on_update(self):
+        if self.is_active:
+            self.schedule_refresh()
+
+    def schedule_refresh(self):
+        self.render_loop.submit(self, self.refresh)
+
+    def refresh(self):
+        """Re-filter and re-sort the table, then redraw the visible rows."""
+        self.order = self.table.query(
+            sort_by=SORT_OPTIONS[self.sort_var.get()],
+            descending=self.desc_var.get(),
+            text=self.text_var.get().strip(),
+            quote=self.quote_var.get().strip(),
+        )
+        self.offset = min(self.offset, self.max_offset())
+        self.widgets.config(self.count_label, text=f"{len(self.order):,} of {len(self.table):,} symbols")
+        self.render()
+
+    def render(self):
+        visible = self.table.rows(self.order[self.offset:self.offset + self.visible_rows])
+        for i, item in enumerate(self.rows):
+            row = visible[i] if i < len(visible) else None
+            if row == self.shown[i]:
+                continue
+            self.shown[i] = row
+
+            if row is None:
+                self.tree.item(item, values=("", "", "", ""), tags=())
+                continue
+            symbol, price, change, volume = row
+            tag = "up" if change >= 0 else "down"
+            self.tree.item(item, values=(symbol, f"{price:,.6g}", f"{change:+.2f}", f"{volume:,.0f}"), tags=(tag,))
+
+        n = len(self.order)
+        if n:
+            first = self.offset / n
+            self.scrollbar.set(first, min(1.0, first + self.visible_rows / n))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def sort_by_heading(self, column):
+        name = {"symbol": "Symbol", "price": "Price", "change": "Change %", "volume": "Volume"}[column]
+        if self.sort_var.get() == name:
+            self.desc_var.set(not self.desc_var.get())
+        else:
+            self.sort_var.set(name)
+
+    def max_offset(self):
+        return max(0, len(self.order) - self.visible_rows)
+
+    def scroll_to(self, offset):
+        self.offset = int(min(max(offset, 0), self.max_offset()))
+        self.render()
+
+    def yview(self, *args):
+        if args[0] == "moveto":
+            self.scroll_to(float(args[1]) * len(self.order))
+        elif args[0] == "scroll":
+            step = int(args[1]) * (self.visible_rows if args[2] == "pages" else 1)
+            self.scroll_to(self.offset + step)
+
+    def on_wheel(self, event):
+        if event.num == 4 or event.delta > 0:
+            self.scroll_to(self.offset - 3)
+        else:
+            self.scroll_to(self.offset + 3)
+        return "break"
+
+    def handle_click(self, event):
+        item = self.tree.identify_row(event.y)
+        if not item or not self.on_click: return
+        row = self.shown[self.rows.index(item)]
+        if row:
+            self.on_click(row[0].lower())
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def pack_forget(self):
+        self.frame.pack_forget()
@@ -0,0 +1,63 @@
+import weakref
+from core.metrics import shared_metrics
+
+_UNSET = object()
+
+class WidgetCache:
+    """
+    The last options set on each widget (and canvas item), so an update that
+    formats to the same text or color skips the `configure` call, a Tcl round
+    trip on the Tk thread. An option has to be set through the cache every
+    time: one set directly on the widget leaves the cache stale (see `forget`).
+    """
+    def __init__(self, metrics=None):
+        self.values = weakref.WeakKeyDictionary() # widget -> {(item, option): value}
+        self.metrics = metrics or shared_metrics()
+        self.applied = self.metrics.counter("dashboard_ui_configure_total", "Widget configure calls, made or skipped as unchanged", result="applied")
+        self.skipped = self.metrics.counter("dashboard_ui_configure_total", "Widget configure calls, made or skipped as unchanged", result="skipped")
+
+    def config(self, widget, **options):
+        """`widget.config(**options)` with only the options that changed. Returns True if Tk was called."""
+        changed = self.changed(widget, None, options)
+        if changed:
+            widget.config(**changed)
+        return bool(changed)
+
+    def itemconfig(self, canvas, item, **options):
+        """`canvas.itemconfig(item, **options)` with only the options that changed."""
+        changed = self.changed(canvas, item, options)
+        if changed:
+            canvas.itemconfig(item, **changed)
+        return bool(changed)
+
+    def changed(self, widget, item, options):
+        last = self.values.get(widget)
+        if last is None:
+            last = self.values[widget] = {}
+        changed = {}
+        for option, value in options.items():
+            if last.get((item, option), _UNSET) != value:
+                last[(item, option)] = value
+                changed[option] = value
+        if changed:
+            self.applied.inc()
+        else:
+            self.skipped.inc()
+        return changed
+
+    def forget(self, widget):
+        """Drop what is known about `widget`, e.g. after it was configured directly."""
+        self.values.pop(widget, None)
+
+    def stats(self):
+        return {"applied": self.applied.value, "skipped": self.skipped.value}
+
+
+_shared_cache = None
+
+def shared_widget_cache():
+    """The widget cache used by components that are not given one."""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = WidgetCache()
+    return _shared_cache
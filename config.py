@@ -1,8 +1,114 @@
 # Configuration Constants
+import os
 
-# API Configuration
-BINANCE_BASE_URL = "https://api.binance.com"
+# API Configuration (the environment can point these at a replay server)
+BINANCE_BASE_URL = os.environ.get("BINANCE_BASE_URL", "https://api.binance.com")
 BINANCE_WS_URL = "wss://stream.binance.com:9443/ws"
+BINANCE_STREAM_URL = os.environ.get("BINANCE_STREAM_URL", "wss://stream.binance.com:9443/stream") # Combined streams (one socket for all panels)
+
+# Stream connection / supervisor
+STREAM_URL_LIMIT = 200 # Streams put in the connection URL; the rest are SUBSCRIBEd after open
+WS_PING_INTERVAL = 20 # Seconds between client pings
+WS_PING_TIMEOUT = 10 # Drop the socket if no pong arrives within this many seconds
+WS_RECONNECT_BASE = 1 # Reconnect backoff base in seconds (doubled per failure, jittered)
+WS_RECONNECT_MAX = 60
+STREAM_STALL_TIMEOUT = 15 # Reconnect if the whole socket is silent this long
+# A stream is "stale" after this many silent seconds (by stream type suffix)
+STREAM_STALE_AFTER = {"ticker": 10, "depth": 10, "kline": 15, "trade": 120, "aggTrade": 120, "arr": 10}
+TRADE_BACKFILL_PAGES = 5 # Max /api/v3/aggTrades pages fetched to fill a gap after a reconnect
+
+# REST client
+REST_TIMEOUT = 10 # Seconds per request
+REST_RETRIES = 3 # Retries for timeouts, 5xx and 429/418
+REST_BACKOFF = 0.5 # Base backoff in seconds (doubled per retry, jittered)
+REST_POOL_SIZE = 8 # Keep-alive connections / concurrent async requests
+REST_WEIGHT_LIMIT = 5000 # Request weight per minute (Binance allows 6000)
+
+# Record / replay
+RECORD_DIR = "recordings" # One folder of segment files per recording
+RECORD_SEGMENT_SECONDS = 300 # Start a new segment file after this long...
+RECORD_SEGMENT_BYTES = 64 * 1024 * 1024 # ...or this many uncompressed bytes
+RECORD_SNAPSHOT_INTERVAL = 60 # Seconds between REST snapshots taken by the recorder CLI
+REPLAY_HOST = "127.0.0.1"
+REPLAY_PORT = 9443 # Serves both the /stream WebSocket and the REST endpoints
+
+# Columnar tick recording (ticker, book top and trade rows; needs pyarrow)
+TICK_RECORD_DIR = os.environ.get("DASHBOARD_TICK_DIR", "") # Record into <dir>/<table>/date=YYYY-MM-DD/ ("" = off)
+TICK_RECORD_FORMAT = os.environ.get("DASHBOARD_TICK_FORMAT", "parquet") # "parquet" or "arrow" (IPC files)
+TICK_COMPRESSION = "zstd"
+TICK_BATCH_ROWS = 8192 # Rows per preallocated column buffer, written as one batch
+TICK_FLUSH_SECONDS = 5 # Write a partly filled buffer after this long
+TICK_FILE_SECONDS = 900 # Start a new file after this long (files are only readable once closed)
+TICK_MAX_PENDING = 16 # Spare buffers per table; rows are dropped when the writer is this far behind
+
+# Instrumentation
+METRICS_EXPORT_FILE = os.environ.get("DASHBOARD_METRICS_FILE") # Prometheus text file, rewritten periodically
+METRICS_PORT = int(os.environ.get("DASHBOARD_METRICS_PORT", 0)) # Serve /metrics on 127.0.0.1:<port> (0 = off)
+METRICS_EXPORT_INTERVAL = 5 # Seconds between file exports
+
+# Headless engine
+SNAPSHOT_HOST = "127.0.0.1"
+SNAPSHOT_PORT = 9444 # JSON snapshots served by headless.py
+HEADLESS_LOG_INTERVAL = 10 # Seconds between metrics summaries on the console
+FEED_LINGER = 30 # Seconds a feed keeps running after its last view is hidden, so showing it again is instant
+SYMBOL_CACHE_SIZE = 6 # Symbols whose book, trades and klines stay warm for instant switching (LRU)
+
+# Multiprocess ingestion (ticker, book and trade feeds decoded in worker processes)
+INGEST_PROCESSES = os.environ.get("DASHBOARD_INGEST_PROCESSES", "") not in ("", "0")
+INGEST_GROUPS = {"ticker": "tickers", "book": "books", "trades": "trades"} # Feed kind -> worker process
+INGEST_BOOK_LEVELS = 50 # Order book levels published per side
+INGEST_POLL_INTERVAL = 0.025 # Seconds between shared state checks in the UI process (about twice per frame)
+INGEST_STATS_INTERVAL = 0.5 # Seconds between trade statistics publishes
+
+# Order Book
+ORDERBOOK_LEVELS = 10 # Levels shown per side
+DEPTH_SNAPSHOT_LIMIT = 1000 # Levels loaded from /api/v3/depth when syncing the local book
+DEPTH_SNAPSHOT_RETRY_BASE = 1 # Seconds before retrying a failed depth snapshot (doubled per failure, jittered)
+DEPTH_SNAPSHOT_RETRY_MAX = 30
+DEPTH_BUFFER_LIMIT = 1000 # Diffs buffered per book while waiting for a snapshot (100 s of @depth@100ms)
+DEPTH_HEATMAP_RESOLUTION = 0.1 # Seconds per heatmap history column
+DEPTH_HISTORY_SECONDS = 3600 # History kept per heatmap (36,000 columns x DEPTH_HEATMAP_ROWS float32, ~23 MB)
+DEPTH_HEATMAP_ROWS = 160 # Price buckets around the mid price
+DEPTH_HEATMAP_BUCKET_BPS = 1 # Bucket height in basis points of the mid price (rounded to a 1/2/5 step)
+DEPTH_HEATMAP_LEVELS = 500 # Book levels per side binned into each column
+DEPTH_HEATMAP_WIDTH = 480 # Heatmap width in pixels (one display column each)
+DEPTH_HEATMAP_ROW_PIXELS = 2
+DEPTH_HEATMAP_SPANS = {"1m": 60, "5m": 300, "15m": 900, "1h": 3600} # Time shown across the heatmap
+DEPTH_HEATMAP_DEFAULT_SPAN = "1m"
+DEPTH_HEATMAP_COLORMAP = "magma"
+DEPTH_CURVE_LEVELS = 100 # Levels per side in the cumulative depth curve
+DEPTH_CURVE_HEIGHT = 120
+
+# Trades
+TRADES_VISIBLE_ROWS = 20 # Rows drawn in the trade tape
+TRADES_BUFFER_SIZE = 5000 # Trades kept in the ring buffer (scrollable)
+TRADES_SNAPSHOT_LIMIT = 500 # Recent trades fetched over REST when a trade feed starts cold
+TRADES_STREAM = "trade" # "trade" (every fill) or "aggTrade" (fills aggregated per taker order)
+TRADE_STATS_WINDOWS = (1, 60, 300) # Rolling statistics windows in seconds
+LARGE_TRADE_NOTIONAL = 100000 # Trades worth at least this much (quote asset) count as large
+
+# Watchlist
+WATCHLIST_STREAM = "!miniTicker@arr" # or "!ticker@arr" (heavier, includes exact change %)
+WATCHLIST_VISIBLE_ROWS = 25
+WATCHLIST_QUOTE = "USDT" # Default quote asset filter (empty = all pairs)
+
+# Chart
+KLINE_CACHE_DIR = "cache/klines" # On-disk candle cache (one folder per symbol/interval)
+KLINE_FETCH_LIMIT = 1000 # Candles per /api/v3/klines request (Binance max)
+KLINE_HISTORY_CANDLES = 20000 # Older history paged into the cache in the background
+CHART_INTERVALS = ["1m", "3m", "5m", "15m", "30m", "1h", "2h", "4h", "6h", "8h", "12h", "1d", "3d", "1w"]
+CHART_DEFAULT_INTERVAL = "1h"
+CHART_DEFAULT_CANDLES = 50 # Candles visible before zooming
+CHART_MIN_CANDLES = 10
+CHART_PIXELS_PER_CANDLE = 2 # Downsample once candles get thinner than this
+CHART_INDICATORS = ["sma:20", "ema:50", "bb:20:2", "vwap", "rsi:14", "macd:12:26:9"] # Offered in the chart's Indicators menu ("name:param:...")
+CHART_DEFAULT_INDICATORS = [] # Shown on startup (at most one oscillator: rsi or macd)
+CHART_GRID_SYMBOLS = ["btcusdt", "ethusdt", "solusdt", "bnbusdt", "xrpusdt", "dogeusdt", "adausdt", "trxusdt", "linkusdt"]
+CHART_GRID_COLUMNS = 3
+CHART_GRID_INTERVAL = "1m"
+CHART_GRID_CANDLES = 60 # Candles per mini chart
+CHART_GRID_FPS = 4 # Max offscreen render rounds per second (each redraws only the cells that changed)
+CHART_GRID_DPI = 80
 
 # Colors
 COLOR_BG = "#121212" # Darker background
@@ -15,3 +121,6 @@ COLOR_NEUTRAL = "#aaaaaa"
 FONT_TITLE = ("Arial", 16, "bold")
 FONT_PRICE = ("Arial", 40, "bold")
 FONT_CHANGE = ("Arial", 12)
+
+# Rendering
+UI_FPS = 20 # Max UI refreshes per second (10-30 is a good range)
@@ -0,0 +1,137 @@
+import json
+
+# Optional fast decoders, preferred in this order
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKENDS = [name for name, module in (("msgspec", msgspec), ("orjson", orjson)) if module] + ["json"]
+
+# [[price, qty], ...] price levels. msgspec converts them to floats in C;
+# the lazy views hand back Binance's strings (LocalOrderBook converts either).
+LEVELS = list[tuple[float, float]]
+
+# Typed event schemas: attribute -> (Binance field, type). Only these fields
+# are ever converted; everything else in the payload is skipped.
+SCHEMAS = {
+    "trade": {
+        # trade and aggTrade share T/p/q/m; only the ID field differs
+        "time": ("T", int),
+        "price": ("p", float),
+        "qty": ("q", float),
+        "is_buyer_maker": ("m", bool),
+        "trade_id": ("t", int),
+        "agg_id": ("a", int), # On a plain trade "a" is the seller order ID instead
+    },
+    "depth": {
+        "first_id": ("U", int),
+        "last_id": ("u", int),
+        "bids": ("b", LEVELS),
+        "asks": ("a", LEVELS),
+    },
+    "ticker": {
+        "price": ("c", float),
+        "change": ("p", float),
+        "change_pct": ("P", float),
+        "quote_volume": ("q", float),
+    },
+}
+
+class LazyEvent:
+    """
+    Attribute view over a decoded payload dict. Fields are converted on
+    access, so a handler that reads three fields never pays for the other
+    eight. Subclasses are generated from SCHEMAS by lazy_event().
+    """
+    __slots__ = ("data",)
+
+    def __init__(self, data):
+        self.data = data
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.data!r})"
+
+def lazy_field(key, convert):
+    if convert is LEVELS or convert is bool:
+        return property(lambda self: self.data.get(key))
+    def get(self):
+        value = self.data.get(key)
+        return None if value is None else convert(value)
+    return property(get)
+
+def lazy_event(name, fields):
+    attrs = {attr: lazy_field(key, convert) for attr, (key, convert) in fields.items()}
+    return type(name, (LazyEvent,), {"__slots__": (), **attrs})
+
+def struct_event(name, fields):
+    # Missing fields default to None (e.g. agg_id on a plain trade)
+    return msgspec.defstruct(name, [(attr, convert | None, msgspec.field(name=key, default=None))
+                                    for attr, (key, convert) in fields.items()])
+
+class MessageDecoder:
+    """
+    Decodes combined-stream frames ({"stream": ..., "data": ...}).
+
+    decode() returns (stream, payload); view(payload, schema) turns the
+    payload into what a handler asked for: a plain dict (schema None) or a
+    typed event with the attributes in SCHEMAS[schema].
+
+    With msgspec the payload stays raw bytes until a handler asks for it and
+    typed events are decoded straight into structs (strings to floats in C);
+    with orjson or json the frame is decoded once and typed events are
+    LazyEvent views over the dict.
+    """
+    def __init__(self, backend=None):
+        self.backend = backend or BACKENDS[0]
+        if self.backend not in BACKENDS:
+            raise ValueError(f"JSON backend {self.backend!r} is not available (have {', '.join(BACKENDS)})")
+
+        if self.backend == "msgspec":
+            class Envelope(msgspec.Struct):
+                stream: str = None
+                data: msgspec.Raw = msgspec.Raw(b"null")
+
+            self.envelope = msgspec.json.Decoder(Envelope)
+            self.plain = msgspec.json.Decoder()
+            # strict=False lets "67000.01" decode into a float field
+            self.typed = {schema: msgspec.json.Decoder(struct_event(schema.title() + "Event", fields), strict=False)
+                          for schema, fields in SCHEMAS.items()}
+        else:
+            self.loads = orjson.loads if self.backend == "orjson" else json.loads
+            self.typed = {schema: lazy_event(schema.title() + "Event", fields) for schema, fields in SCHEMAS.items()}
+
+    def decode(self, message):
+        """(stream, payload) for a stream frame, (None, None) for anything else (e.g. SUBSCRIBE replies)."""
+        if self.backend == "msgspec":
+            frame = self.envelope.decode(message)
+            return (frame.stream, frame.data) if frame.stream is not None else (None, None)
+
+        data = self.loads(message)
+        if not isinstance(data, dict) or "stream" not in data:
+            return None, None
+        return data["stream"], data["data"]
+
+    def view(self, payload, schema=None):
+        if self.backend == "msgspec":
+            if schema is None:
+                return self.plain.decode(payload)
+            return self.typed[schema].decode(payload)
+        if schema is None:
+            return payload
+        return self.typed[schema](payload)
+
+
+_default_decoder = None
+
+def default_decoder():
+    """The decoder for the fastest available backend, shared by all hubs."""
+    global _default_decoder
+    if _default_decoder is None:
+        _default_decoder = MessageDecoder()
+    return _default_decoder
@@ -0,0 +1,136 @@
+import math
+import threading
+import time
+import numpy as np
+from config import *
+
+def nice_step(value):
+    """Round up to 1, 2 or 5 times a power of ten."""
+    if value <= 0:
+        return 1.0
+    power = 10 ** math.floor(math.log10(value))
+    for multiple in (1, 2, 5, 10):
+        if value <= multiple * power:
+            return multiple * power
+    return 10 * power
+
+_history_lock = threading.Lock()
+
+def history_for(feed):
+    """
+    The DepthHistory of a book feed, created and registered as its listener
+    on first use. It lives with the feed, so it keeps recording while the
+    heatmap is hidden, suspended or showing a symbol the SymbolCache keeps
+    warm, and ends when the feed stops.
+    """
+    with _history_lock:
+        if feed.depth_history is None:
+            feed.depth_history = DepthHistory(feed.book)
+            feed.add_listener(feed.depth_history.on_update)
+        return feed.depth_history
+
+class DepthHistory:
+    """
+    Resting liquidity over time on a fixed price grid, for the depth heatmap.
+    One column per `resolution` seconds is kept in a preallocated ring that
+    covers `seconds`, so memory is bounded (an hour at 100 ms by default).
+    Rows are price buckets of `bucket_bps` of the first mid price (rounded to
+    a 1/2/5 step) around a base that is moved when the mid drifts towards an
+    edge; the grid is narrowed to the depth the book actually reports. Any
+    book that answers top(n) works; `history_for` keeps one with each book
+    feed.
+    """
+    def __init__(self, book, seconds=DEPTH_HISTORY_SECONDS, resolution=DEPTH_HEATMAP_RESOLUTION,
+                 rows=DEPTH_HEATMAP_ROWS, bucket_bps=DEPTH_HEATMAP_BUCKET_BPS, levels=DEPTH_HEATMAP_LEVELS):
+        self.book = book
+        self.resolution = resolution
+        self.capacity = int(seconds / resolution)
+        self.rows = rows
+        self.bucket_bps = bucket_bps
+        self.levels = levels
+
+        self.lock = threading.Lock()
+        self.data = np.zeros((self.capacity, rows), dtype=np.float32) # ring: column -> quantity per bucket
+        self.best = np.full((self.capacity, 2), np.nan) # best bid / ask per column
+        self.count = 0 # Columns started so far; the newest (count - 1) is still open
+        self.slot = None # time // resolution of the open column
+        self.bucket = None # Price step per row
+        self.base = 0 # Bucket number of row 0
+        self.shifts = 0 # Bumped when the grid moves, so views rebuild
+        self.scale = 0.0 # Slowly decaying max quantity per bucket, for shading
+
+    def on_update(self, *args):
+        self.record()
+
+    def record(self, now=None):
+        bids, asks = self.book.top(self.levels)
+        if not bids or not asks:
+            return
+        slot = int((time.time() if now is None else now) / self.resolution)
+        prices = np.array([p for p, _ in bids] + [p for p, _ in asks])
+        qtys = np.array([q for _, q in bids] + [q for _, q in asks], dtype=np.float32)
+        mid = (bids[0][0] + asks[0][0]) / 2
+
+        with self.lock:
+            if self.bucket is None:
+                # The grid spans `bucket_bps` per row, but no more than the
+                # book reports: an ingest worker only publishes
+                # INGEST_BOOK_LEVELS per side, and rows past that would read
+                # as empty liquidity
+                span = min(mid * self.bucket_bps / 10000 * self.rows, asks[-1][0] - bids[-1][0])
+                self.bucket = nice_step(span / self.rows)
+                self.base = int(mid // self.bucket) - self.rows // 2
+            self.advance(slot)
+            self.follow(mid)
+
+            rows = (prices // self.bucket).astype(np.int64) - self.base
+            inside = (rows >= 0) & (rows < self.rows)
+            column = np.bincount(rows[inside], weights=qtys[inside], minlength=self.rows).astype(np.float32)
+            head = (self.count - 1) % self.capacity
+            self.data[head] = column
+            self.best[head] = (bids[0][0], asks[0][0])
+            self.scale = max(self.scale * 0.9999, float(column.max()))
+
+    def advance(self, slot):
+        # Caller holds the lock. Quiet slots repeat the last column, so x stays linear in time.
+        if slot == self.slot:
+            return
+        gap = 1 if self.slot is None else max(1, slot - self.slot)
+        repeat = min(gap - 1, self.capacity - 1) if self.count else 0
+        if repeat:
+            previous = (self.count - 1) % self.capacity
+            index = (self.count + np.arange(repeat)) % self.capacity
+            self.data[index] = self.data[previous]
+            self.best[index] = self.best[previous]
+        self.count += gap if self.count else 1
+        self.slot = slot
+
+    def follow(self, mid):
+        # Caller holds the lock. Re-centre once the mid leaves the middle half.
+        row = mid // self.bucket - self.base
+        if self.rows / 4 <= row < self.rows * 3 / 4:
+            return
+        shift = int(mid // self.bucket) - self.rows // 2 - self.base
+        self.base += shift
+        self.shifts += 1
+        if abs(shift) >= self.rows:
+            self.data[:] = 0
+            return
+        self.data[:] = np.roll(self.data, -shift, axis=1)
+        if shift > 0:
+            self.data[:, self.rows - shift:] = 0
+        else:
+            self.data[:, :-shift] = 0
+
+    def columns(self, start, stop):
+        """Copies of (quantities, best bid/ask) for columns [start, stop), oldest first; start is clamped to the ring."""
+        with self.lock:
+            start = max(start, self.count - self.capacity, 0)
+            stop = min(stop, self.count)
+            index = np.arange(start, max(start, stop)) % self.capacity
+            return self.data[index], self.best[index]
+
+    def state(self):
+        """(count, bucket, base, shifts, scale): columns so far and the price grid; bucket is None before the first record."""
+        with self.lock:
+            return self.count, self.bucket, self.base, self.shifts, self.scale
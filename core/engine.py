@@ -0,0 +1,587 @@
+import time
+import threading
+from collections import deque
+import numpy as np
+from config import *
+from core.stream_hub import StreamHub
+from core.rest_client import shared_rest
+from core.metrics import shared_metrics
+from core.local_book import LocalOrderBook
+from core.trade_stats import TradeStats
+from core.kline_series import KlineSeries
+from core.kline_store import KlineStore
+from core.indicators import IndicatorSet
+from core.market_table import MarketTable
+
+class Feed:
+    """
+    One market data stream kept as state, independent of any UI.
+    Feeds are created and reference counted by a MarketEngine; listeners are
+    called on the socket (or REST) thread, so UIs hand the work to their own
+    thread (the Tk views go through the RenderLoop).
+    """
+    kind = "feed"
+
+    def __init__(self, engine, key):
+        self.engine = engine
+        self.hub = engine.hub
+        self.rest = engine.rest
+        self.key = key
+        self.is_active = False
+        self.refs = 0
+        self.expiry = None # Timer that stops the feed once it has lingered unused
+        self.listeners = []
+
+    def add_listener(self, callback):
+        if callback not in self.listeners:
+            self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+    def notify(self, *args):
+        for callback in list(self.listeners):
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"{type(self).__name__} listener error: {e}")
+
+    def start(self):
+        self.is_active = True
+
+    def stop(self):
+        self.is_active = False
+
+    def snapshot(self):
+        """JSON-serializable view of the current state."""
+        return {"kind": self.kind, "active": self.is_active}
+
+class TickerFeed(Feed):
+    """24h ticker for one symbol. Listeners get (price, change, change %, quote volume)."""
+    kind = "ticker"
+
+    def __init__(self, engine, symbol):
+        super().__init__(engine, ("ticker", symbol))
+        self.symbol = symbol
+        self.stream = f"{symbol}@ticker"
+        self.last = None
+
+    def start(self):
+        super().start()
+        self.hub.subscribe(self.stream, self.on_message, schema="ticker")
+        # The stream ticks once a second; a REST snapshot fills new views sooner
+        threading.Thread(target=self.fetch_snapshot, daemon=True).start()
+
+    def stop(self):
+        super().stop()
+        self.hub.unsubscribe(self.stream, self.on_message)
+
+    def fetch_snapshot(self):
+        try:
+            data = self.rest.ticker_24hr(self.symbol)
+        except Exception as e:
+            print(f"Ticker Snapshot Error ({self.symbol}): {e}")
+            return
+        if self.is_active and self.last is None:
+            self.last = (float(data["lastPrice"]), float(data["priceChange"]),
+                         float(data["priceChangePercent"]), float(data["quoteVolume"]))
+            self.notify(*self.last)
+
+    def on_message(self, data):
+        if not self.is_active: return
+        # Volume is the quote asset volume (e.g. USDT volume)
+        self.last = (data.price, data.change, data.change_pct, data.quote_volume)
+        self.notify(*self.last)
+
+    def snapshot(self):
+        snapshot = super().snapshot()
+        snapshot["symbol"] = self.symbol
+        if self.last:
+            snapshot.update(zip(("price", "change", "change_pct", "quote_volume"), self.last))
+        return snapshot
+
+class BookFeed(Feed):
+    """Local order book for one symbol. Listeners are called (no arguments) whenever it changes or resyncs."""
+    kind = "book"
+
+    def __init__(self, engine, symbol):
+        super().__init__(engine, ("book", symbol))
+        self.symbol = symbol
+        self.stream = f"{symbol}@depth@100ms"
+        self.book = LocalOrderBook(symbol, on_sync=self.on_sync, rest=self.rest)
+        self.depth_history = None # Heatmap history, created by the first depth view (core.depth_history.history_for)
+
+    def start(self):
+        # Diff Depth Stream: <symbol>@depth@100ms, applied to a local book
+        # that is seeded from the REST snapshot
+        super().start()
+        self.hub.subscribe(self.stream, self.on_message, schema="depth")
+        self.hub.add_connect_listener(self.on_connect)
+        self.book.reset()
+
+    def stop(self):
+        super().stop()
+        self.hub.unsubscribe(self.stream, self.on_message)
+        self.hub.remove_connect_listener(self.on_connect)
+        self.book.close()
+
+    def on_message(self, data):
+        if not self.is_active: return
+        if self.book.apply(data):
+            self.notify()
+
+    def on_connect(self, reconnected):
+        # Diffs were lost while the socket was down: take a fresh snapshot
+        # now instead of waiting for the first update ID gap.
+        if reconnected and self.is_active:
+            self.book.reset()
+
+    def on_sync(self, synced):
+        if synced:
+            self.notify()
+
+    def snapshot(self, levels=ORDERBOOK_LEVELS):
+        bids, asks = self.book.top(levels)
+        snapshot = super().snapshot()
+        snapshot.update({
+            "symbol": self.symbol,
+            "synced": self.book.is_synced,
+            "last_update_id": self.book.last_update_id,
+            "bids": bids,
+            "asks": asks,
+            "spread": self.book.spread(),
+            "depth": self.book.depth(),
+            "resyncs": self.book.resyncs,
+        })
+        return snapshot
+
+class TradeFeed(Feed):
+    """
+    Trade (or aggTrade) stream for one symbol: a ring buffer of
+    (time ms, price, qty, is_buyer_maker) tuples plus a TradeStats engine.
+    Listeners get each trade tuple. A cold start is seeded with the most
+    recent trades and a reconnect fills in the missed ones, both from
+    `/api/v3/aggTrades`, spliced in before the live trades.
+    """
+    kind = "trades"
+
+    def __init__(self, engine, symbol, stream_type=TRADES_STREAM, buffer_size=TRADES_BUFFER_SIZE):
+        super().__init__(engine, ("trades", symbol, stream_type))
+        self.symbol = symbol
+        self.stream_type = stream_type # "trade" or "aggTrade"
+        self.stream = f"{symbol}@{stream_type}"
+        self.trades = deque(maxlen=buffer_size)
+        self.stats = TradeStats()
+
+        # Gap backfill state
+        self.backfill_lock = threading.Lock()
+        self.last_trade = None # (trade time ms, aggregate ID or None) of the newest trade seen
+        self.pending = None # (trade, aggregate ID) held back while a backfill runs
+        self.backfill_generation = 0
+
+    def start(self):
+        super().start()
+        self.hub.subscribe(self.stream, self.on_message, schema="trade")
+        self.hub.add_connect_listener(self.on_connect)
+        self.begin_backfill(seed=True)
+
+    def stop(self):
+        super().stop()
+        self.hub.unsubscribe(self.stream, self.on_message)
+        self.hub.remove_connect_listener(self.on_connect)
+        with self.backfill_lock:
+            self.backfill_generation += 1
+            self.pending = None
+            self.last_trade = None
+
+    def on_message(self, data):
+        if not self.is_active: return
+        trade = (data.time, data.price, data.qty, data.is_buyer_maker)
+        # Only aggTrade IDs can be used with /api/v3/aggTrades?fromId=
+        agg_id = data.agg_id if self.stream_type == "aggTrade" else None
+        # A plain trade's ID is matched against the aggregates' first/last trade IDs
+        trade_id = data.trade_id if self.stream_type == "trade" else None
+        with self.backfill_lock:
+            if self.pending is not None:
+                self.pending.append((trade, agg_id, trade_id))
+                return
+            self.last_trade = (trade[0], agg_id)
+        self.publish([trade])
+
+    def publish(self, trades):
+        for trade in trades:
+            self.trades.append(trade)
+            self.stats.add(*trade)
+            self.notify(trade)
+
+    def on_connect(self, reconnected):
+        if reconnected and self.is_active:
+            self.begin_backfill()
+
+    def begin_backfill(self, seed=False):
+        """Hold live trades back while REST fills in the recent trades (seed) or the missed ones."""
+        with self.backfill_lock:
+            if self.pending is not None or (not seed and self.last_trade is None):
+                return
+            self.pending = []
+            self.backfill_generation += 1
+            args = (None if seed else self.last_trade, self.backfill_generation)
+        threading.Thread(target=self.backfill, args=args, daemon=True).start()
+
+    def backfill(self, last_trade, generation):
+        """Fetch the trades since `last_trade` (or the most recent ones when None), then release the held live trades."""
+        missed = []
+        try:
+            if last_trade is None:
+                # Cold start: views open on recent trades instead of an empty tape
+                missed = self.rest.agg_trades(self.symbol, limit=TRADES_SNAPSHOT_LIMIT)
+            else:
+                missed = self.fetch_missed(last_trade)
+        except Exception as e:
+            print(f"Trade Backfill Error ({self.symbol}): {e}")
+
+        with self.backfill_lock:
+            if generation != self.backfill_generation or self.pending is None:
+                return # Stopped meanwhile
+            pending, self.pending = self.pending, None
+            missed = self.not_delivered(missed, pending)
+            trades = [parse_agg_trade(t) for t in missed]
+            if pending:
+                self.last_trade = (pending[-1][0][0], pending[-1][1])
+            elif missed:
+                self.last_trade = (missed[-1]["T"], missed[-1]["a"] if self.stream_type == "aggTrade" else None)
+            self.publish(trades + [trade for trade, *_ in pending])
+        if trades and last_trade is not None:
+            print(f"Trades {self.symbol.upper()}: backfilled {len(trades)} missed trades")
+
+    def not_delivered(self, missed, pending):
+        """
+        The REST aggTrades rows the live stream did not deliver itself: those
+        before the first held live trade by ID, so trades in the same
+        millisecond as that trade are kept. A REST aggregate that spans the
+        first live plain trade is left out, as part of it was delivered.
+        """
+        if not pending:
+            return missed
+        (time_ms, _, _, _), agg_id, trade_id = pending[0]
+        if agg_id is not None:
+            return [t for t in missed if t["a"] < agg_id]
+        if trade_id is not None:
+            return [t for t in missed if t["l"] < trade_id]
+        return [t for t in missed if t["T"] < time_ms]
+
+    def fetch_missed(self, last_trade):
+        last_time, last_id = last_trade
+        missed = []
+        # Resume by aggregate ID when we have one, else by time
+        params = {"fromId": last_id + 1} if last_id is not None else {"startTime": last_time + 1}
+        for _ in range(TRADE_BACKFILL_PAGES):
+            page = self.rest.agg_trades(self.symbol, limit=1000, **params)
+            missed.extend(page)
+            with self.backfill_lock:
+                caught_up = bool(self.pending) and bool(page) and page[-1]["T"] >= self.pending[0][0][0]
+            if len(page) < 1000 or caught_up:
+                break
+            params = {"fromId": page[-1]["a"] + 1}
+        return missed
+
+    def snapshot(self, n=100):
+        snapshot = super().snapshot()
+        recent = list(self.trades)[-n:]
+        snapshot.update({
+            "symbol": self.symbol,
+            "stream": self.stream_type,
+            "trades": [{"time": t, "price": p, "qty": q, "is_buyer_maker": m} for t, p, q, m in recent],
+            "stats": self.stats.snapshot(now=time.time() * 1000),
+        })
+        return snapshot
+
+def parse_agg_trade(data):
+    # REST /api/v3/aggTrades row: a, p, q, f, l, T, m, M
+    # p = price, q = quantity, T = trade time, m = isBuyerMaker (True=Sell, False=Buy)
+    return (data['T'], float(data['p']), float(data['q']), data['m'])
+
+class KlineFeed(Feed):
+    """
+    Candles for one symbol and interval: the disk cache and REST history
+    loaded once, then kept current by the kline stream (REST is only used
+    again to backfill after a reconnect). Listeners get ("history" | "live"
+    | "prepend", candles added in front). Chart indicators live alongside in
+    an IndicatorSet, so every view of the same symbol and interval shares them.
+    """
+    kind = "klines"
+
+    def __init__(self, engine, symbol, interval=CHART_DEFAULT_INTERVAL):
+        super().__init__(engine, ("klines", symbol, interval))
+        self.symbol = symbol
+        self.interval = interval
+        self.stream = f"{symbol}@kline_{interval}"
+        self.series = KlineSeries()
+        self.indicators = IndicatorSet(self.series)
+        self.store = None
+        self.history_loaded = False
+
+    def start(self):
+        super().start()
+        self.history_loaded = False
+        self.store = KlineStore(self.symbol.upper(), self.interval, rest=self.rest)
+        self.hub.subscribe(self.stream, self.on_message)
+        self.hub.add_connect_listener(self.on_connect)
+        self.fetch_history()
+
+    def stop(self):
+        super().stop()
+        self.hub.unsubscribe(self.stream, self.on_message)
+        self.hub.remove_connect_listener(self.on_connect)
+        self.store = None
+
+    def fetch_history(self, backfill=False):
+        # Closed live candles wait until the forward sync is done (see KlineStore.hold)
+        self.store.hold()
+        threading.Thread(target=self._fetch_history, args=(self.store, backfill), daemon=True).start()
+
+    def _fetch_history(self, store, backfill):
+        try:
+            # Show whatever is cached on disk right away
+            if not backfill:
+                cached = store.read()
+                if len(cached) and store is self.store:
+                    self.series.load_array(cached)
+                    self.indicators.refresh()
+                    self.history_loaded = True
+                    self.notify("history", 0)
+
+            # Then fetch only candles newer than the cache (this is also the
+            # backfill after a reconnect)
+            fresh = store.sync()
+            store.release()
+
+            # Stopped while the request was in flight
+            if store is not self.store: return
+
+            if self.history_loaded:
+                self.series.merge_array(fresh)
+            else:
+                self.series.load_array(store.read())
+            self.indicators.refresh()
+            self.history_loaded = True
+            self.notify("history", 0)
+
+            # Page older history in behind the live candles
+            if not backfill:
+                older = store.backfill()
+                if store is self.store:
+                    added = self.series.prepend_array(older)
+                    if added:
+                        self.indicators.refresh()
+                        self.notify("prepend", added)
+
+        except Exception as e:
+            print(f"Kline Error ({self.symbol} {self.interval}): {e}")
+        finally:
+            store.release() # No-op unless the sync failed
+
+    def on_message(self, data):
+        if not self.is_active: return
+        k = data["k"]
+        change = self.series.apply_kline(k)
+        if change:
+            self.indicators.update(change)
+            if self.history_loaded:
+                self.notify("live", 0)
+
+        # Closed candles go straight into the disk cache
+        store = self.store
+        if k["x"] and store:
+            store.append_live(np.array([[k["t"], k["o"], k["h"], k["l"], k["c"], k["v"]]], dtype=float))
+
+    def on_connect(self, reconnected):
+        # Candles that closed while the socket was down never arrive on the stream
+        if reconnected and self.is_active and self.history_loaded:
+            self.fetch_history(backfill=True)
+
+    def snapshot(self, n=100):
+        snapshot = super().snapshot()
+        times, *columns = self.series.tail(n)
+        snapshot.update({
+            "symbol": self.symbol,
+            "interval": self.interval,
+            "loaded": self.history_loaded,
+            "candles": len(self.series),
+            "columns": ["time", "open", "high", "low", "close", "volume"],
+            "tail": np.column_stack([times] + columns).tolist() if len(times) else [],
+            "indicators": self.indicators.tail(n),
+        })
+        return snapshot
+
+class MarketFeed(Feed):
+    """Every symbol from the all-market ticker stream in a MarketTable. Listeners are called (no arguments) per update."""
+    kind = "market"
+
+    def __init__(self, engine, stream=WATCHLIST_STREAM):
+        super().__init__(engine, ("market", stream))
+        self.stream = stream
+        self.table = MarketTable()
+
+    def start(self):
+        super().start()
+        self.hub.subscribe(self.stream, self.on_message)
+
+    def stop(self):
+        super().stop()
+        self.hub.unsubscribe(self.stream, self.on_message)
+
+    def on_message(self, data):
+        if not self.is_active: return
+        self.table.update(data)
+        self.notify()
+
+    def snapshot(self, n=50, sort_by="change", quote=""):
+        snapshot = super().snapshot()
+        rows = self.table.rows(self.table.query(sort_by=sort_by, quote=quote)[:n])
+        snapshot.update({
+            "stream": self.stream,
+            "symbols": len(self.table),
+            "rows": [{"symbol": s, "price": p, "change_pct": c, "quote_volume": v} for s, p, c, v in rows],
+        })
+        return snapshot
+
+FEEDS = {"ticker": TickerFeed, "book": BookFeed, "trades": TradeFeed, "klines": KlineFeed, "market": MarketFeed}
+
+class MarketEngine:
+    """
+    UI-independent market data engine.
+    Owns the stream hub and REST client and hands out shared, reference
+    counted feeds: the first acquire() starts a feed, and `linger` seconds
+    after the last release() it is stopped (unless acquired again meanwhile,
+    in which case the view gets the warm state back without a resubscribe).
+    The Tk components and the headless server are both thin views over
+    these feeds.
+    """
+    def __init__(self, hub=None, rest=None, metrics=None, linger=FEED_LINGER):
+        self.linger = linger
+        self.metrics = metrics or shared_metrics()
+        self.hub = hub or StreamHub(metrics=self.metrics)
+        self.rest = rest or shared_rest()
+        self.lock = threading.Lock()
+        self.feeds = {} # key -> feed
+        self.feed_listeners = []
+
+    def add_feed_listener(self, callback):
+        """Call `callback(feed, started)` just before a feed starts and after it stops (e.g. to record every feed)."""
+        with self.lock:
+            if callback not in self.feed_listeners:
+                self.feed_listeners.append(callback)
+
+    def remove_feed_listener(self, callback):
+        with self.lock:
+            if callback in self.feed_listeners:
+                self.feed_listeners.remove(callback)
+
+    def notify_feed(self, feed, started):
+        with self.lock:
+            listeners = list(self.feed_listeners)
+        for callback in listeners:
+            try:
+                callback(feed, started)
+            except Exception as e:
+                print(f"Feed listener error: {e}")
+
+    def acquire(self, kind, *args):
+        """The feed for `kind` ("ticker", "book", ...) and its arguments, started if it was not running."""
+        feed_class = self.feed_class(kind)
+        with self.lock:
+            feed = self.feeds.get((kind,) + args)
+            if feed is None:
+                feed = feed_class(self, *args)
+                self.feeds[feed.key] = feed
+            lingering = feed.expiry is not None
+            if lingering:
+                feed.expiry.cancel()
+                feed.expiry = None
+            feed.refs += 1
+            start = feed.refs == 1 and not lingering
+        if start:
+            self.notify_feed(feed, True)
+            feed.start()
+        return feed
+
+    def feed_class(self, kind):
+        """Feed implementation for `kind`; subclasses can serve some kinds differently."""
+        return FEEDS[kind]
+
+    def release(self, feed):
+        """Drop one reference to `feed`; the last one stops it after `linger` seconds."""
+        with self.lock:
+            feed.refs -= 1
+            if feed.refs > 0:
+                return
+            if self.linger:
+                feed.expiry = threading.Timer(self.linger, self.expire, args=(feed,))
+                feed.expiry.daemon = True
+                feed.expiry.start()
+                return
+            self.feeds.pop(feed.key, None)
+        feed.stop()
+        self.notify_feed(feed, False)
+
+    def expire(self, feed):
+        with self.lock:
+            if feed.refs > 0 or self.feeds.get(feed.key) is not feed:
+                return # Acquired again meanwhile
+            feed.expiry = None
+            self.feeds.pop(feed.key)
+        feed.stop()
+        self.notify_feed(feed, False)
+
+    def find(self, kind, *args):
+        """A running feed, or None (does not start anything)."""
+        with self.lock:
+            return self.feeds.get((kind,) + args)
+
+    # Shorthands
+    def ticker(self, symbol):
+        return self.acquire("ticker", symbol.lower())
+
+    def book(self, symbol):
+        return self.acquire("book", symbol.lower())
+
+    def trades(self, symbol, stream_type=TRADES_STREAM):
+        return self.acquire("trades", symbol.lower(), stream_type)
+
+    def klines(self, symbol, interval=CHART_DEFAULT_INTERVAL):
+        return self.acquire("klines", symbol.lower(), interval)
+
+    def market(self, stream=WATCHLIST_STREAM):
+        return self.acquire("market", stream)
+
+    def snapshot(self):
+        """Every running feed, keyed "kind:args", plus the connection state."""
+        with self.lock:
+            feeds = list(self.feeds.values())
+        return {
+            "connection": {"state": self.hub.state, "reconnects": self.hub.reconnects},
+            "feeds": {":".join(map(str, feed.key)): feed.snapshot() for feed in feeds},
+        }
+
+    def stop(self):
+        with self.lock:
+            feeds, self.feeds = list(self.feeds.values()), {}
+        for feed in feeds:
+            if feed.expiry:
+                feed.expiry.cancel()
+            feed.refs = 0
+            feed.stop()
+            self.notify_feed(feed, False)
+        self.hub.stop()
+
+
+_shared_engine = None
+
+def shared_engine():
+    """The process-wide engine used by components that are not given one."""
+    global _shared_engine
+    if _shared_engine is None:
+        _shared_engine = MarketEngine()
+    return _shared_engine
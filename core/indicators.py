@@ -0,0 +1,365 @@
+import threading
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from core.kline_series import TIME, HIGH, LOW, CLOSE, VOLUME
+
+DAY_MS = 86400000
+
+def smooth(values, alpha, initial, out):
+    """
+    out[k] = alpha * values[k] + (1 - alpha) * out[k - 1], starting from
+    `initial`, without a Python loop per element. The recursion has a closed
+    form (a scaled cumsum); it is applied in blocks short enough that
+    (1 - alpha) ** -block stays below 1e6, which keeps it exact to float precision.
+    """
+    decay = 1 - alpha
+    if decay <= 0:
+        out[:] = values
+        return
+    block = max(1, int(np.log(1e6) / -np.log(decay)))
+    previous = initial
+    for lo in range(0, len(values), block):
+        chunk = values[lo:lo + block]
+        powers = decay ** np.arange(1, len(chunk) + 1)
+        out[lo:lo + len(chunk)] = powers * (previous + alpha * np.cumsum(chunk / powers))
+        previous = out[lo + len(chunk) - 1]
+
+def ema(values, period, first, alpha=None):
+    """EMA of `values` seeded with the mean of the `period` values ending at index `first` (NaN before)."""
+    alpha = 2 / (period + 1) if alpha is None else alpha
+    out = np.full(len(values), np.nan)
+    if first < len(values):
+        out[first] = values[first - period + 1:first + 1].mean()
+        smooth(values[first + 1:], alpha, out[first], out[first + 1:])
+    return out
+
+def ema_at(values, out, i, period, first, alpha=None):
+    """The same EMA at index `i` alone, from out[i - 1]."""
+    if i < first:
+        return np.nan
+    if i == first:
+        return values[first - period + 1:first + 1].mean()
+    alpha = 2 / (period + 1) if alpha is None else alpha
+    return alpha * values[i] + (1 - alpha) * out[i - 1]
+
+class Indicator:
+    """
+    One indicator over a candle array. `compute` fills every column for the
+    whole (n, 6) array with vectorized NumPy; `step` recomputes row `i` alone
+    from row i - 1 (and a bounded look-back into the candles), so a live candle
+    costs O(1) however long the history is. Columns listed in `hidden` are
+    running state for `step` and are not drawn.
+    """
+    pane = "price" # "price" overlays the candles, "oscillator" gets its own axis
+    columns = ()
+    hidden = ()
+    styles = {} # column -> (kind "line" | "bars", color, linestyle)
+
+    def __init__(self, *params):
+        self.params = params
+
+    @property
+    def label(self):
+        return " ".join([type(self).__name__] + [f"{p:g}" for p in self.params])
+
+    def compute(self, data):
+        raise NotImplementedError
+
+    def step(self, data, out, i):
+        raise NotImplementedError
+
+class SMA(Indicator):
+    columns = ("sma",)
+    styles = {"sma": ("line", "#F0B90B", "-")}
+
+    def __init__(self, period=20):
+        super().__init__(int(period))
+        self.period = int(period)
+
+    def compute(self, data):
+        closes = data[:, CLOSE]
+        out = np.full(len(closes), np.nan)
+        p = self.period
+        if len(closes) >= p:
+            sums = np.cumsum(np.concatenate([[0.0], closes]))
+            out[p - 1:] = (sums[p:] - sums[:-p]) / p
+        return {"sma": out}
+
+    def step(self, data, out, i):
+        p = self.period
+        closes = data[:, CLOSE]
+        sma = out["sma"]
+        if i < p - 1:
+            sma[i] = np.nan
+        elif i == p - 1 or np.isnan(sma[i - 1]):
+            sma[i] = closes[i - p + 1:i + 1].mean()
+        else:
+            sma[i] = sma[i - 1] + (closes[i] - closes[i - p]) / p
+
+class EMA(Indicator):
+    columns = ("ema",)
+    styles = {"ema": ("line", "#8E44AD", "-")}
+
+    def __init__(self, period=50):
+        super().__init__(int(period))
+        self.period = int(period)
+
+    def compute(self, data):
+        return {"ema": ema(data[:, CLOSE], self.period, self.period - 1)}
+
+    def step(self, data, out, i):
+        out["ema"][i] = ema_at(data[:, CLOSE], out["ema"], i, self.period, self.period - 1)
+
+class Bollinger(Indicator):
+    columns = ("mid", "upper", "lower")
+    styles = {
+        "mid": ("line", "#2980B9", "-"),
+        "upper": ("line", "#2980B9", "--"),
+        "lower": ("line", "#2980B9", "--"),
+    }
+
+    def __init__(self, period=20, width=2):
+        super().__init__(int(period), float(width))
+        self.period = int(period)
+        self.width = float(width)
+
+    def compute(self, data):
+        closes = data[:, CLOSE]
+        mid, upper, lower = (np.full(len(closes), np.nan) for _ in range(3))
+        if len(closes) >= self.period:
+            # Population std over each window; exact, unlike running sums of squares
+            windows = sliding_window_view(closes, self.period)
+            mean = windows.mean(axis=1)
+            band = self.width * windows.std(axis=1)
+            mid[self.period - 1:] = mean
+            upper[self.period - 1:] = mean + band
+            lower[self.period - 1:] = mean - band
+        return {"mid": mid, "upper": upper, "lower": lower}
+
+    def step(self, data, out, i):
+        if i < self.period - 1:
+            out["mid"][i] = out["upper"][i] = out["lower"][i] = np.nan
+            return
+        window = data[i - self.period + 1:i + 1, CLOSE]
+        mean = window.mean()
+        band = self.width * window.std()
+        out["mid"][i] = mean
+        out["upper"][i] = mean + band
+        out["lower"][i] = mean - band
+
+class RSI(Indicator):
+    """Wilder's RSI: gains and losses smoothed with alpha = 1 / period."""
+    pane = "oscillator"
+    columns = ("rsi",)
+    hidden = ("gain", "loss")
+    styles = {"rsi": ("line", "#8E44AD", "-")}
+    bounds = (0, 100)
+    guides = (30, 70)
+
+    def __init__(self, period=14):
+        super().__init__(int(period))
+        self.period = int(period)
+
+    def compute(self, data):
+        change = np.diff(data[:, CLOSE], prepend=np.nan)
+        alpha = 1 / self.period
+        gain = ema(np.maximum(change, 0), self.period, self.period, alpha)
+        loss = ema(np.maximum(-change, 0), self.period, self.period, alpha)
+        return {"rsi": self.rsi(gain, loss), "gain": gain, "loss": loss}
+
+    def step(self, data, out, i):
+        p = self.period
+        if i < p:
+            out["rsi"][i] = out["gain"][i] = out["loss"][i] = np.nan
+            return
+        if i == p or np.isnan(out["gain"][i - 1]):
+            change = np.diff(data[i - p:i + 1, CLOSE])
+            gain, loss = np.maximum(change, 0).mean(), np.maximum(-change, 0).mean()
+        else:
+            change = data[i, CLOSE] - data[i - 1, CLOSE]
+            gain = (out["gain"][i - 1] * (p - 1) + max(change, 0)) / p
+            loss = (out["loss"][i - 1] * (p - 1) + max(-change, 0)) / p
+        out["gain"][i], out["loss"][i] = gain, loss
+        out["rsi"][i] = self.rsi(gain, loss)
+
+    def rsi(self, gain, loss):
+        total = gain + loss
+        with np.errstate(invalid="ignore", divide="ignore"):
+            # No movement at all over the period reads as neutral
+            return np.where(np.isnan(total), np.nan, np.where(total > 0, 100 * gain / total, 50.0))
+
+class MACD(Indicator):
+    pane = "oscillator"
+    columns = ("macd", "signal", "hist")
+    hidden = ("fast", "slow")
+    styles = {
+        "macd": ("line", "#2980B9", "-"),
+        "signal": ("line", "#E67E22", "-"),
+        "hist": ("bars", "#95A5A6", "-"),
+    }
+    bounds = None
+    guides = (0,)
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        super().__init__(int(fast), int(slow), int(signal))
+        self.fast, self.slow, self.signal = int(fast), int(slow), int(signal)
+
+    def compute(self, data):
+        closes = data[:, CLOSE]
+        fast = ema(closes, self.fast, self.slow - 1)
+        slow = ema(closes, self.slow, self.slow - 1)
+        macd = fast - slow
+        signal = ema(macd, self.signal, self.slow + self.signal - 2)
+        return {"macd": macd, "signal": signal, "hist": macd - signal, "fast": fast, "slow": slow}
+
+    def step(self, data, out, i):
+        closes = data[:, CLOSE]
+        out["fast"][i] = ema_at(closes, out["fast"], i, self.fast, self.slow - 1)
+        out["slow"][i] = ema_at(closes, out["slow"], i, self.slow, self.slow - 1)
+        out["macd"][i] = out["fast"][i] - out["slow"][i]
+        out["signal"][i] = ema_at(out["macd"], out["signal"], i, self.signal, self.slow + self.signal - 2)
+        out["hist"][i] = out["macd"][i] - out["signal"][i]
+
+class VWAP(Indicator):
+    """Volume weighted typical price, restarting every UTC day."""
+    columns = ("vwap",)
+    hidden = ("pv", "volume")
+    styles = {"vwap": ("line", "#16A085", "-")}
+
+    def compute(self, data):
+        typical = (data[:, HIGH] + data[:, LOW] + data[:, CLOSE]) / 3
+        volume = data[:, VOLUME]
+        day = data[:, TIME] // DAY_MS
+        # Index where each candle's session starts
+        starts = np.flatnonzero(np.diff(day, prepend=np.nan) != 0)
+        first = np.repeat(starts, np.diff(np.append(starts, len(day))))
+        pv_sum = np.cumsum(typical * volume)
+        volume_sum = np.cumsum(volume)
+        pv = pv_sum - np.where(first > 0, pv_sum[first - 1], 0)
+        vol = volume_sum - np.where(first > 0, volume_sum[first - 1], 0)
+        return {"vwap": self.vwap(pv, vol, typical), "pv": pv, "volume": vol}
+
+    def step(self, data, out, i):
+        candle = data[i]
+        typical = (candle[HIGH] + candle[LOW] + candle[CLOSE]) / 3
+        pv, vol = typical * candle[VOLUME], candle[VOLUME]
+        if i and data[i - 1, TIME] // DAY_MS == candle[TIME] // DAY_MS:
+            pv += out["pv"][i - 1]
+            vol += out["volume"][i - 1]
+        out["pv"][i], out["volume"][i] = pv, vol
+        out["vwap"][i] = self.vwap(pv, vol, typical)
+
+    def vwap(self, pv, volume, typical):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(volume > 0, pv / volume, typical)
+
+INDICATORS = {"sma": SMA, "ema": EMA, "bb": Bollinger, "rsi": RSI, "macd": MACD, "vwap": VWAP}
+
+def parse_spec(spec):
+    """'bb:20:2' -> Bollinger(20, 2). Raises ValueError for unknown names."""
+    name, *params = spec.lower().split(":")
+    if name not in INDICATORS:
+        raise ValueError(f"Unknown indicator {name!r} (known: {', '.join(INDICATORS)})")
+    return INDICATORS[name](*(float(p) for p in params))
+
+class IndicatorSet:
+    """
+    The indicators in use on one KlineSeries, kept in step with it.
+    Indicators are added by spec string ("sma:20", "macd:12:26:9") and
+    reference counted, so every view of the same symbol and interval shares
+    one computation. History loads recompute them vectorized; a live candle
+    update or append runs each indicator's O(1) `step`.
+    """
+    def __init__(self, series):
+        self.series = series
+        self.lock = threading.Lock()
+        self.indicators = {} # spec -> Indicator
+        self.refs = {}
+        self.values = {} # spec -> {column: array}, capacity >= size
+        self.size = 0
+
+    def add(self, spec):
+        indicator = parse_spec(spec)
+        with self.lock:
+            self.refs[spec] = self.refs.get(spec, 0) + 1
+            if spec not in self.indicators:
+                self.indicators[spec] = indicator
+                with self.series.lock:
+                    if self.series.size == self.size:
+                        self.values[spec] = self.allocate(indicator.compute(self.series.data[:self.size]))
+                    else:
+                        self.recompute()
+            return self.indicators[spec]
+
+    def remove(self, spec):
+        with self.lock:
+            if spec not in self.refs:
+                return
+            self.refs[spec] -= 1
+            if self.refs[spec] <= 0:
+                del self.refs[spec], self.indicators[spec], self.values[spec]
+
+    def specs(self):
+        with self.lock:
+            return list(self.indicators)
+
+    def allocate(self, columns):
+        # Caller holds both locks; spare capacity so appends do not reallocate
+        capacity = max(len(self.series.data), 1)
+        out = {}
+        for column, values in columns.items():
+            out[column] = np.full(capacity, np.nan)
+            out[column][:len(values)] = values
+        return out
+
+    def refresh(self):
+        """Recompute everything (the series was loaded, merged or had history prepended)."""
+        with self.lock:
+            with self.series.lock:
+                self.recompute()
+
+    def recompute(self):
+        # Caller holds both locks
+        data = self.series.data[:self.series.size]
+        for spec, indicator in self.indicators.items():
+            self.values[spec] = self.allocate(indicator.compute(data))
+        self.size = self.series.size
+
+    def update(self, change):
+        """Follow KlineSeries.apply_kline: "update" and "append" are O(1), anything else recomputes."""
+        with self.lock:
+            with self.series.lock:
+                n = self.series.size
+                if change == "update" and n == self.size:
+                    rows = [n - 1]
+                elif change == "append" and n == self.size + 1:
+                    # Re-step the candle before too, in case its closing update was missed
+                    rows = [n - 2, n - 1] if n > 1 else [n - 1]
+                else:
+                    self.recompute()
+                    return
+                data = self.series.data[:n]
+                for spec, indicator in self.indicators.items():
+                    out = self.values[spec]
+                    if n > len(next(iter(out.values()))):
+                        out = self.values[spec] = self.allocate({c: v[:self.size] for c, v in out.items()})
+                    for i in rows:
+                        indicator.step(data, out, i)
+                self.size = n
+
+    def view(self, spec, indexes):
+        """{column: values} of indicator `spec` at raw candle `indexes` (copies), or None if it is not in use."""
+        with self.lock:
+            if spec not in self.values or not self.size:
+                return None
+            indexes = np.clip(indexes, 0, self.size - 1)
+            return {column: values[indexes] for column, values in self.values[spec].items()
+                    if column in self.indicators[spec].columns}
+
+    def tail(self, n):
+        """The newest `n` values of every indicator: {spec: {column: list}} (JSON-friendly, NaN as None)."""
+        with self.lock:
+            start = max(0, self.size - n)
+            return {spec: {column: [None if np.isnan(v) else float(v) for v in values[start:self.size]]
+                           for column, values in self.values[spec].items() if column in self.indicators[spec].columns}
+                    for spec in self.indicators}
@@ -0,0 +1,403 @@
+import time
+import threading
+import multiprocessing
+from collections import deque
+from multiprocessing import shared_memory
+from config import *
+from core.engine import MarketEngine, Feed
+from core.metrics import FAST_BUCKETS
+from core.shared_state import TickerState, BookState, TradeState
+
+# --- Worker process side ---
+
+class Publisher:
+    """Runs one engine feed inside a worker and mirrors it into a shared block created by the UI process."""
+    def __init__(self, engine, name, kind, args):
+        self.engine = engine
+        self.memory = shared_memory.SharedMemory(name=name)
+        self.state = self.make_state(self.memory.buf)
+        self.feed = engine.acquire(kind, *args)
+        self.feed.add_listener(self.on_update)
+
+    def make_state(self, buffer):
+        raise NotImplementedError
+
+    def on_update(self, *args):
+        raise NotImplementedError
+
+    def close(self):
+        self.feed.remove_listener(self.on_update)
+        self.engine.release(self.feed)
+        self.state = None
+        try:
+            self.memory.close()
+        except BufferError:
+            pass # A callback still holds a view; the mapping goes with it
+
+class TickerPublisher(Publisher):
+    def make_state(self, buffer):
+        return TickerState(buffer)
+
+    def on_update(self, price, change, change_pct, quote_volume):
+        state = self.state
+        if state:
+            state.publish(price, change, change_pct, quote_volume)
+
+class BookPublisher(Publisher):
+    def make_state(self, buffer):
+        return BookState(buffer)
+
+    def on_update(self):
+        state = self.state
+        if state:
+            state.publish(self.feed.book)
+
+class TradePublisher(Publisher):
+    def __init__(self, engine, name, kind, args):
+        super().__init__(engine, name, kind, args)
+        self.stopped = threading.Event()
+        threading.Thread(target=self.stats_loop, daemon=True).start()
+
+    def make_state(self, buffer):
+        return TradeState(buffer)
+
+    def on_update(self, trade):
+        state = self.state
+        if state:
+            state.ring.append(trade)
+
+    def stats_loop(self):
+        # The windows also move when no trades arrive, so publish on a timer
+        while not self.stopped.wait(INGEST_STATS_INTERVAL):
+            state = self.state
+            if state:
+                state.publish_stats(self.feed.stats.snapshot(now=time.time() * 1000))
+
+    def close(self):
+        self.stopped.set()
+        super().close()
+
+PUBLISHERS = {"ticker": TickerPublisher, "book": BookPublisher, "trades": TradePublisher}
+
+def ingest_worker(group, commands):
+    """
+    Entry point of a worker process. Feeds are started and stopped by
+    ("start" | "stop", shared block name, kind, args) commands; None exits.
+    """
+    from core.supervisor import StreamSupervisor
+    engine = MarketEngine(linger=0) # The UI process already lingers
+    supervisor = StreamSupervisor(engine.hub)
+    supervisor.start()
+    publishers = {}
+    try:
+        while True:
+            command = commands.get()
+            if command is None:
+                break
+            action, name, kind, args = command
+            try:
+                if action == "start" and name not in publishers:
+                    publishers[name] = PUBLISHERS[kind](engine, name, kind, args)
+                elif action == "stop" and name in publishers:
+                    publishers.pop(name).close()
+            except FileNotFoundError:
+                pass # Released by the UI before we got to it
+            except Exception as e:
+                print(f"Ingest {group} error: {e}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for publisher in publishers.values():
+            publisher.close()
+        supervisor.stop()
+        engine.stop()
+
+# --- UI process side ---
+
+class SharedFeed(Feed):
+    """
+    A feed kept by an ingest worker. The UI process creates the shared block,
+    asks the worker to fill it, and the engine's poll thread reads the
+    latest version and notifies listeners like a local feed would.
+    """
+    def start(self):
+        super().start()
+        self.memory = shared_memory.SharedMemory(create=True, size=self.nbytes())
+        self.state = self.make_state(self.memory.buf)
+        self.version = 0
+        self.engine.send(self.kind, ("start", self.memory.name, self.kind, self.key[1:]))
+        self.engine.add_poll(self)
+
+    def stop(self):
+        super().stop()
+        self.engine.remove_poll(self) # Waits out a poll in progress
+        self.engine.send(self.kind, ("stop", self.memory.name, self.kind, self.key[1:]))
+        self.state = None
+        self.memory.unlink()
+        try:
+            self.memory.close()
+        except BufferError:
+            pass
+
+    def restart(self):
+        """Ask a restarted worker to fill the same block again."""
+        self.engine.send(self.kind, ("start", self.memory.name, self.kind, self.key[1:]))
+
+    def nbytes(self):
+        raise NotImplementedError
+
+    def make_state(self, buffer):
+        raise NotImplementedError
+
+    def poll(self):
+        raise NotImplementedError
+
+class SharedTickerFeed(SharedFeed):
+    kind = "ticker"
+
+    def __init__(self, engine, symbol):
+        super().__init__(engine, ("ticker", symbol))
+        self.symbol = symbol
+        self.last = None
+
+    def nbytes(self):
+        return TickerState.nbytes()
+
+    def make_state(self, buffer):
+        return TickerState(buffer)
+
+    def poll(self):
+        fields = self.state.fields
+        if fields.version() == self.version: return
+        read = fields.read()
+        if read is None: return
+        self.version, values = read
+        self.last = tuple(values.tolist())
+        self.notify(*self.last)
+
+    def snapshot(self):
+        snapshot = super().snapshot()
+        snapshot["symbol"] = self.symbol
+        if self.last:
+            snapshot.update(zip(("price", "change", "change_pct", "quote_volume"), self.last))
+        return snapshot
+
+class SharedBook:
+    """The LocalOrderBook queries the views use, answered from the last published top of book."""
+    def __init__(self):
+        self.is_synced = False
+        self.last_update_id = 0
+        self.resyncs = 0
+        self.bids = []
+        self.asks = []
+        self.levels = (0, 0)
+
+    def load(self, state):
+        self.bids, self.asks = state["bids"], state["asks"]
+        self.levels = (int(state["n_bids"]), int(state["n_asks"]))
+        self.last_update_id = int(state["last_update_id"])
+        self.resyncs = int(state["resyncs"])
+        self.is_synced = bool(state["synced"])
+
+    def top(self, n):
+        return self.bids[:n], self.asks[:n]
+
+    def spread(self):
+        if not self.bids or not self.asks:
+            return None
+        return self.asks[0][0] - self.bids[0][0]
+
+    def depth(self):
+        return self.levels
+
+class SharedBookFeed(SharedFeed):
+    kind = "book"
+
+    def __init__(self, engine, symbol):
+        super().__init__(engine, ("book", symbol))
+        self.symbol = symbol
+        self.book = SharedBook()
+        self.depth_history = None
+
+    def nbytes(self):
+        return BookState.nbytes()
+
+    def make_state(self, buffer):
+        return BookState(buffer)
+
+    def poll(self):
+        fields = self.state.fields
+        if fields.version() == self.version: return
+        read = fields.read()
+        if read is None: return
+        self.version, values = read
+        self.book.load(self.state.unpack(values))
+        if self.book.is_synced:
+            self.notify()
+
+    def snapshot(self, levels=ORDERBOOK_LEVELS):
+        bids, asks = self.book.top(levels)
+        snapshot = super().snapshot()
+        snapshot.update({
+            "symbol": self.symbol,
+            "synced": self.book.is_synced,
+            "last_update_id": self.book.last_update_id,
+            "bids": bids,
+            "asks": asks,
+            "spread": self.book.spread(),
+            "depth": self.book.depth(),
+            "resyncs": self.book.resyncs,
+        })
+        return snapshot
+
+class SharedTradeStats:
+    """TradeStats.snapshot() read from the worker's last published windows."""
+    def __init__(self, feed):
+        self.feed = feed
+        self.last = None
+
+    def snapshot(self, now=None):
+        state = self.feed.state
+        read = state.stats.read() if state else None
+        if read is not None and read[0]:
+            self.last = state.unpack_stats(read[1])
+        return self.last or {seconds: empty_window() for seconds in TRADE_STATS_WINDOWS}
+
+def empty_window():
+    return {"trades": 0, "tps": 0.0, "volume": 0.0, "buy_volume": 0.0, "sell_volume": 0.0,
+            "vwap": None, "imbalance": 0.0, "large": 0, "large_trades": []}
+
+class SharedTradeFeed(SharedFeed):
+    kind = "trades"
+
+    def __init__(self, engine, symbol, stream_type=TRADES_STREAM, buffer_size=TRADES_BUFFER_SIZE):
+        super().__init__(engine, ("trades", symbol, stream_type))
+        self.symbol = symbol
+        self.stream_type = stream_type
+        self.trades = deque(maxlen=buffer_size)
+        self.stats = SharedTradeStats(self)
+        self.position = 0 # Rows of the shared ring already read
+
+    def nbytes(self):
+        return TradeState.nbytes()
+
+    def make_state(self, buffer):
+        return TradeState(buffer)
+
+    def poll(self):
+        self.position, rows = self.state.ring.read_since(self.position)
+        for time_ms, price, qty, is_buyer_maker in rows.tolist():
+            trade = (int(time_ms), price, qty, bool(is_buyer_maker))
+            self.trades.append(trade)
+            self.notify(trade)
+
+    def snapshot(self, n=100):
+        snapshot = super().snapshot()
+        recent = list(self.trades)[-n:]
+        snapshot.update({
+            "symbol": self.symbol,
+            "stream": self.stream_type,
+            "trades": [{"time": t, "price": p, "qty": q, "is_buyer_maker": m} for t, p, q, m in recent],
+            "stats": self.stats.snapshot(),
+        })
+        return snapshot
+
+SHARED_FEEDS = {"ticker": SharedTickerFeed, "book": SharedBookFeed, "trades": SharedTradeFeed}
+
+class IngestEngine(MarketEngine):
+    """
+    MarketEngine that moves decoding and state upkeep of the ticker, book
+    and trade feeds into worker processes, one per group in INGEST_GROUPS.
+    Workers publish into shared memory with seqlock versioning
+    (core.shared_state); this process only compares version counters and
+    copies the few values that changed, so a busy stream costs the UI no
+    JSON decoding and no GIL time. Kinds not in `groups` (klines, the
+    market table) stay in-process.
+    Listeners of shared feeds are called on the engine's poll thread.
+    """
+    def __init__(self, hub=None, rest=None, metrics=None, linger=FEED_LINGER,
+                 groups=INGEST_GROUPS, poll_interval=INGEST_POLL_INTERVAL):
+        super().__init__(hub=hub, rest=rest, metrics=metrics, linger=linger)
+        self.groups = dict(groups)
+        self.poll_interval = poll_interval
+        self.context = multiprocessing.get_context("spawn") # Never fork a process running Tk and threads
+        self.workers = {} # group -> (process, command queue)
+        self.worker_lock = threading.Lock()
+        self.polled = []
+        self.poll_lock = threading.RLock() # Listeners may acquire feeds from the poll thread
+        self.poll_time = self.metrics.histogram("dashboard_ingest_poll_seconds", "Time to check every shared feed once",
+                                                buckets=FAST_BUCKETS)
+        self.restarts = self.metrics.counter("dashboard_ingest_restarts_total", "Ingest worker processes restarted")
+        self.stopped = threading.Event()
+        threading.Thread(target=self.poll_loop, daemon=True).start()
+
+    def feed_class(self, kind):
+        if kind in self.groups:
+            return SHARED_FEEDS[kind]
+        return super().feed_class(kind)
+
+    def send(self, kind, command):
+        group = self.groups[kind]
+        with self.worker_lock:
+            worker = self.workers.get(group)
+            if worker is None:
+                worker = self.spawn(group)
+        worker[1].put(command)
+
+    def spawn(self, group):
+        # Caller holds worker_lock
+        commands = self.context.Queue()
+        process = self.context.Process(target=ingest_worker, args=(group, commands), name=f"ingest-{group}", daemon=True)
+        process.start()
+        self.workers[group] = (process, commands)
+        return self.workers[group]
+
+    def check_workers(self):
+        """Restart crashed workers and hand them their feeds again."""
+        with self.worker_lock:
+            dead = [group for group, (process, _) in self.workers.items() if not process.is_alive()]
+            for group in dead:
+                print(f"Ingest worker {group} exited ({self.workers[group][0].exitcode}), restarting")
+                self.spawn(group)
+                self.restarts.inc()
+        if dead:
+            with self.poll_lock:
+                for feed in self.polled:
+                    if self.groups[feed.kind] in dead:
+                        feed.restart()
+
+    def add_poll(self, feed):
+        with self.poll_lock:
+            self.polled.append(feed)
+
+    def remove_poll(self, feed):
+        with self.poll_lock:
+            if feed in self.polled:
+                self.polled.remove(feed)
+
+    def poll_loop(self):
+        checked = time.monotonic()
+        while not self.stopped.wait(self.poll_interval):
+            started = time.perf_counter()
+            with self.poll_lock:
+                for feed in list(self.polled):
+                    try:
+                        feed.poll()
+                    except Exception as e:
+                        print(f"Ingest poll error ({':'.join(map(str, feed.key))}): {e}")
+            self.poll_time.observe(time.perf_counter() - started)
+            if time.monotonic() - checked >= 1:
+                checked = time.monotonic()
+                self.check_workers()
+
+    def stop(self):
+        self.stopped.set()
+        super().stop()
+        with self.worker_lock:
+            workers, self.workers = list(self.workers.values()), {}
+        for process, commands in workers:
+            commands.put(None)
+        for process, commands in workers:
+            process.join(2)
+            if process.is_alive():
+                process.terminate()
@@ -0,0 +1,88 @@
+import numpy as np
+
+# Column order matches KlineSeries.data
+TIME, OPEN, HIGH, LOW, CLOSE, VOLUME = range(6)
+
+def aggregate(block, factor):
+    """OHLC-preserving downsample of an (n, 6) candle array by `factor` (last bucket may be partial)."""
+    n = len(block)
+    starts = np.arange(0, n, factor)
+    ends = np.minimum(starts + factor, n) - 1
+    out = np.empty((len(starts), 6))
+    out[:, TIME] = block[starts, TIME]
+    out[:, OPEN] = block[starts, OPEN]
+    out[:, HIGH] = np.maximum.reduceat(block[:, HIGH], starts)
+    out[:, LOW] = np.minimum.reduceat(block[:, LOW], starts)
+    out[:, CLOSE] = block[ends, CLOSE]
+    out[:, VOLUME] = np.add.reduceat(block[:, VOLUME], starts)
+    return out
+
+class KlinePyramid:
+    """
+    Level-of-detail levels over a candle array.
+    Level k holds buckets of factor**k raw candles aligned to index 0, so a
+    zoomed-out view reads a short slice of the right level instead of
+    rescanning the raw data, and a live tick only rewrites one bucket per level.
+    """
+    def __init__(self, factor=2):
+        self.factor = factor
+        self.levels = [] # level k (1-based) -> (capacity, 6) array
+        self.sizes = []
+
+    def rebuild(self, base):
+        """Recompute every level from the raw (n, 6) candles."""
+        self.levels = []
+        self.sizes = []
+        current = base
+        while len(current) > 1:
+            current = aggregate(current, self.factor)
+            self.levels.append(current)
+            self.sizes.append(len(current))
+
+    def touch(self, base, i):
+        """Raw candle `i` changed or was appended; refresh the buckets above it."""
+        below = base
+        for k in range(len(self.levels) + 1):
+            i //= self.factor
+            lo = i * self.factor
+            bucket = aggregate(below[lo:lo + self.factor], self.factor)[0]
+
+            if k == len(self.levels):
+                # The top level just gained a second bucket: grow a new level
+                if len(below) <= 1:
+                    break
+                self.levels.append(aggregate(below, self.factor))
+                self.sizes.append(len(self.levels[k]))
+                below = self.levels[k]
+                continue
+
+            level = self.levels[k]
+            if i >= len(level):
+                grown = np.empty((len(level) * 2, 6))
+                grown[:self.sizes[k]] = level[:self.sizes[k]]
+                self.levels[k] = level = grown
+            level[i] = bucket
+            self.sizes[k] = max(self.sizes[k], i + 1)
+            below = level[:self.sizes[k]]
+
+    def view(self, base, start, stop, max_points):
+        """
+        Candles covering raw indexes [start, stop) with at most ~max_points rows.
+        Returns (block, x, step): aggregated rows, their centre positions in raw
+        index units, and the number of raw candles per row.
+        """
+        step = 1
+        k = 0
+        while (stop - start) / step > max_points and k < len(self.levels):
+            k += 1
+            step *= self.factor
+
+        if k == 0:
+            block = base[start:stop]
+            return block, np.arange(start, start + len(block), dtype=float), 1
+
+        first = start // step
+        last = -(-stop // step) # ceil
+        block = self.levels[k - 1][first:min(last, self.sizes[k - 1])]
+        x = first * step + (step - 1) / 2 + np.arange(len(block)) * step
+        return block, x, step
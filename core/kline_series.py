@@ -0,0 +1,150 @@
+import threading
+import numpy as np
+from core.kline_pyramid import KlinePyramid
+
+# Column order of KlineSeries.data (time is the candle open time in ms)
+TIME, OPEN, HIGH, LOW, CLOSE, VOLUME = range(6)
+
+class KlineSeries:
+    """
+    Growable candle store backed by one (n, 6) float64 NumPy array.
+    History is loaded once from REST; live `@kline` events then either patch
+    the open candle or append a new one. A KlinePyramid is kept alongside for
+    zoomed-out views.
+    """
+    def __init__(self, capacity=1024):
+        self.lock = threading.Lock()
+        self.data = np.empty((capacity, 6))
+        self.size = 0
+        self.pyramid = KlinePyramid()
+
+    def __len__(self):
+        return self.size
+
+    def clear(self):
+        with self.lock:
+            self.size = 0
+            self.pyramid.rebuild(self.data[:0])
+
+    def load(self, rows):
+        """Replace everything with REST `/api/v3/klines` rows."""
+        with self.lock:
+            self.size = 0
+            self.pyramid.rebuild(self.data[:0])
+            self.merge_rows(rows)
+
+    def merge(self, rows):
+        """Upsert REST rows (e.g. a backfill after a reconnect)."""
+        with self.lock:
+            return self.merge_rows(rows)
+
+    def merge_rows(self, rows):
+        # Caller holds the lock. rows: [[time, open, high, low, close, vol, ...], ...]
+        if not len(rows):
+            return None
+        return self.merge_block(np.array([row[:6] for row in rows], dtype=float))
+
+    def merge_block(self, block):
+        # Caller holds the lock
+        result = None
+        for candle in block:
+            result = self.upsert(candle) or result
+        return result
+
+    def load_array(self, block):
+        """Replace everything with an (n, 6) array, e.g. read from a KlineStore."""
+        with self.lock:
+            self.size = 0
+            self.reserve(len(block))
+            self.data[:len(block)] = block
+            self.size = len(block)
+            self.pyramid.rebuild(self.data[:self.size])
+
+    def merge_array(self, block):
+        """Upsert an (n, 6) array of candles."""
+        with self.lock:
+            return self.merge_block(block)
+
+    def prepend_array(self, block):
+        """Insert older candles (oldest first) in front of the current ones. Returns how many were added."""
+        with self.lock:
+            if self.size:
+                block = block[block[:, TIME] < self.data[0, TIME]]
+            if not len(block):
+                return 0
+            merged = np.empty((max(len(self.data), self.size + len(block)), 6))
+            merged[:len(block)] = block
+            merged[len(block):len(block) + self.size] = self.data[:self.size]
+            self.data = merged
+            self.size += len(block)
+            # Indexes shifted, so bucket alignment changed
+            self.pyramid.rebuild(self.data[:self.size])
+            return len(block)
+
+    def reserve(self, count):
+        # Caller holds the lock
+        if count <= len(self.data):
+            return
+        capacity = max(len(self.data), 1)
+        while capacity < count:
+            capacity *= 2
+        grown = np.empty((capacity, 6))
+        grown[:self.size] = self.data[:self.size]
+        self.data = grown
+
+    def apply_kline(self, k):
+        """Apply the `k` payload of a kline event. Returns "update", "append" or None."""
+        candle = (k["t"], float(k["o"]), float(k["h"]), float(k["l"]), float(k["c"]), float(k["v"]))
+        with self.lock:
+            return self.upsert(candle)
+
+    def upsert(self, candle):
+        # Caller holds the lock
+        t = candle[TIME]
+        if self.size and t < self.data[self.size - 1, TIME]:
+            # Older than the open candle: overwrite in place if we have it
+            i = np.searchsorted(self.data[:self.size, TIME], t)
+            if i < self.size and self.data[i, TIME] == t:
+                self.data[i] = candle
+                self.pyramid.touch(self.data[:self.size], i)
+                return "history"
+            return None
+
+        if self.size and t == self.data[self.size - 1, TIME]:
+            result = "update"
+        else:
+            result = "append"
+            self.reserve(self.size + 1)
+            self.size += 1
+
+        self.data[self.size - 1] = candle
+        self.pyramid.touch(self.data[:self.size], self.size - 1)
+        return result
+
+    def last_time(self):
+        with self.lock:
+            return int(self.data[self.size - 1, TIME]) if self.size else None
+
+    def last(self):
+        """The newest candle as a copy of its row, or None."""
+        with self.lock:
+            return self.data[self.size - 1].copy() if self.size else None
+
+    def tail(self, n):
+        """Copy of the newest `n` candles as separate columns (times, opens, highs, lows, closes, volumes)."""
+        with self.lock:
+            block = self.data[max(0, self.size - n):self.size].copy()
+        return (block[:, TIME].astype(np.int64),) + tuple(block[:, OPEN:].T)
+
+    def view(self, start, stop, max_points):
+        """
+        Candles for raw indexes [start, stop), downsampled through the pyramid
+        so at most ~max_points rows come back. Returns
+        (times, opens, highs, lows, closes, volumes, x, step); see KlinePyramid.view.
+        """
+        with self.lock:
+            start = max(0, start)
+            stop = min(self.size, stop)
+            block, x, step = self.pyramid.view(self.data[:self.size], start, stop, max_points)
+            block = block.copy()
+        return (block[:, TIME].astype(np.int64),) + tuple(block[:, OPEN:].T) + (x, step)
@@ -0,0 +1,185 @@
+import os
+import threading
+import numpy as np
+from config import *
+from core.rest_client import shared_rest
+
+COLUMNS = ("time", "open", "high", "low", "close", "volume")
+ITEM_SIZE = 8 # Every column is little-endian 8-byte (int64 time, float64 the rest)
+DTYPES = {"time": "<i8"}
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+def _lock_for(path):
+    with _locks_guard:
+        return _locks.setdefault(path, threading.RLock())
+
+class KlineStore:
+    """
+    On-disk candle cache for one symbol and interval.
+
+    Each column is its own fixed-width binary file under
+    `<root>/<SYMBOL>/<interval>/<column>.bin`, so reads are a memory map and
+    new candles are appended in place. Files only ever grow: the open candle
+    is overwritten where it sits, and older history is prepended by writing
+    a new file and swapping it in, which keeps existing maps valid.
+    """
+    def __init__(self, symbol, interval, root=KLINE_CACHE_DIR, rest=None):
+        self.symbol = symbol.upper()
+        self.interval = interval
+        self.rest = rest or shared_rest()
+        self.path = os.path.join(root, self.symbol, interval)
+        self.lock = _lock_for(os.path.abspath(self.path))
+        self.held = None # Live candles kept back while a sync pages forward (None = not syncing)
+
+    def column_path(self, name):
+        return os.path.join(self.path, f"{name}.bin")
+
+    def __len__(self):
+        try:
+            return os.path.getsize(self.column_path("time")) // ITEM_SIZE
+        except OSError:
+            return 0
+
+    # --- Reading ---
+
+    def map_column(self, name, count):
+        return np.memmap(self.column_path(name), dtype=DTYPES.get(name, "<f8"), mode="r", shape=(count,))
+
+    def read(self, n=None):
+        """Newest `n` candles (all if None) as an (n, 6) float array in KlineSeries column order."""
+        with self.lock:
+            count = len(self)
+            if not count:
+                return np.empty((0, 6))
+            start = 0 if n is None else max(0, count - n)
+            block = np.empty((count - start, 6))
+            for i, name in enumerate(COLUMNS):
+                block[:, i] = self.map_column(name, count)[start:]
+        return block
+
+    def first_time(self):
+        with self.lock:
+            count = len(self)
+            return int(self.map_column("time", count)[0]) if count else None
+
+    def last_time(self):
+        with self.lock:
+            count = len(self)
+            return int(self.map_column("time", count)[-1]) if count else None
+
+    # --- Writing ---
+
+    def append(self, block):
+        """Write candles at or after the newest stored one (the open candle is overwritten)."""
+        if not len(block):
+            return
+        with self.lock:
+            os.makedirs(self.path, exist_ok=True)
+            count = len(self)
+            last = int(self.map_column("time", count)[-1]) if count else None
+            if last is not None:
+                block = block[block[:, 0] >= last]
+                if not len(block):
+                    return
+            # Start writing over the open candle if the block repeats it
+            start = count - 1 if last is not None and int(block[0, 0]) == last else count
+
+            # The time column defines the length, so it is written last
+            for i, name in reversed(list(enumerate(COLUMNS))):
+                mode = "r+b" if os.path.exists(self.column_path(name)) else "wb"
+                with open(self.column_path(name), mode) as f:
+                    f.seek(start * ITEM_SIZE)
+                    f.write(block[:, i].astype(DTYPES.get(name, "<f8")).tobytes())
+
+    def hold(self):
+        """
+        Keep `append_live` candles back until `release()`. sync() pages
+        forward from the newest stored candle, and append() drops anything
+        older than that, so a live candle written in between would leave a
+        hole where the remaining pages belong.
+        """
+        with self.lock:
+            if self.held is None:
+                self.held = []
+
+    def release(self):
+        """Write the candles held back since `hold()` and let live appends through again."""
+        with self.lock:
+            held, self.held = self.held or [], None
+            for block in held:
+                self.append(block)
+
+    def append_live(self, block):
+        """append() for candles from the stream, deferred while a sync is running."""
+        with self.lock:
+            if self.held is not None:
+                self.held.append(block)
+            else:
+                self.append(block)
+
+    def prepend(self, block):
+        """Write candles older than the oldest stored one."""
+        if not len(block):
+            return
+        with self.lock:
+            count = len(self)
+            if count:
+                first = int(self.map_column("time", count)[0])
+                block = block[block[:, 0] < first]
+                if not len(block):
+                    return
+            os.makedirs(self.path, exist_ok=True)
+
+            for i, name in reversed(list(enumerate(COLUMNS))):
+                dtype = DTYPES.get(name, "<f8")
+                tmp = self.column_path(name) + ".tmp"
+                with open(tmp, "wb") as f:
+                    f.write(block[:, i].astype(dtype).tobytes())
+                    if count:
+                        f.write(self.map_column(name, count).tobytes())
+                os.replace(tmp, self.column_path(name))
+
+    # --- Network ---
+
+    def fetch(self, **params):
+        """One `/api/v3/klines` page as an (n, 6) float array."""
+        rows = self.rest.klines(self.symbol, self.interval, limit=KLINE_FETCH_LIMIT, **params)
+        return np.array([row[:6] for row in rows], dtype=float).reshape(-1, 6)
+
+    def sync(self):
+        """Fetch only candles newer than the cache (starting with the open one). Returns them."""
+        last = self.last_time()
+        if last is None:
+            block = self.fetch()
+            self.append(block)
+            return block
+
+        pages = []
+        while True:
+            block = self.fetch(startTime=last)
+            if not len(block):
+                break
+            self.append(block)
+            pages.append(block)
+            if len(block) < KLINE_FETCH_LIMIT:
+                break
+            last = int(block[-1, 0])
+        return np.concatenate(pages) if pages else np.empty((0, 6))
+
+    def backfill(self, target=KLINE_HISTORY_CANDLES):
+        """Page older history into the cache until it holds `target` candles. Returns the candles added, oldest first."""
+        added = []
+        while len(self) < target:
+            first = self.first_time()
+            if first is None:
+                break
+            block = self.fetch(endTime=first - 1)
+            if not len(block):
+                break # Reached the listing date
+            self.prepend(block)
+            added.insert(0, block)
+            if len(block) < KLINE_FETCH_LIMIT:
+                break
+        return np.concatenate(added) if added else np.empty((0, 6))
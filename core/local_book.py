@@ -0,0 +1,188 @@
+import random
+import threading
+from collections import deque
+from itertools import islice, accumulate
+from sortedcontainers import SortedDict
+from config import *
+from core.rest_client import shared_rest
+
+class LocalOrderBook:
+    """
+    Full-depth order book kept in sync from the REST snapshot plus the
+    `<symbol>@depth@100ms` diff stream, following Binance's procedure:
+    buffer diffs, load `/api/v3/depth`, drop stale diffs, then apply the rest
+    in update-ID order. A gap in the IDs triggers a fresh snapshot, and a
+    failed snapshot request is retried with backoff. Only the newest
+    `DEPTH_BUFFER_LIMIT` diffs are buffered meanwhile; if older ones fell
+    out, the snapshot check sees the gap and starts over.
+
+    Price levels live in SortedDicts, so every update is O(log n) and top-N
+    queries only walk the first N levels.
+    """
+    def __init__(self, symbol, snapshot_limit=DEPTH_SNAPSHOT_LIMIT, on_sync=None, rest=None):
+        self.symbol = symbol.upper()
+        self.rest = rest or shared_rest()
+        self.snapshot_limit = snapshot_limit
+        self.on_sync = on_sync # Called with True/False when the sync state changes
+
+        self.lock = threading.Lock()
+        self.bids = SortedDict(lambda price: -price) # Highest bid first
+        self.asks = SortedDict() # Lowest ask first
+        self.last_update_id = 0
+        self.is_synced = False
+        self.buffer = deque(maxlen=DEPTH_BUFFER_LIMIT) # Diffs received while waiting for a snapshot
+        self.retry = None # Timer for the next snapshot attempt after a failed one
+        self.generation = 0 # Bumped on every resync so stale snapshots are ignored
+        self.resyncs = 0
+
+    def reset(self):
+        """Throw away the book and start a new snapshot sync."""
+        with self.lock:
+            self.generation += 1
+            generation = self.generation
+            self.is_synced = False
+            self.buffer.clear()
+            self.bids.clear()
+            self.asks.clear()
+            self.last_update_id = 0
+            self.cancel_retry()
+        self.notify(False)
+
+        threading.Thread(target=self.load_snapshot, args=(generation,), daemon=True).start()
+
+    def close(self):
+        """Stop syncing (the feed stopped): pending snapshots and retries are ignored."""
+        with self.lock:
+            self.generation += 1
+            self.is_synced = False
+            self.buffer.clear()
+            self.cancel_retry()
+
+    def cancel_retry(self):
+        # Caller holds the lock
+        if self.retry:
+            self.retry.cancel()
+            self.retry = None
+
+    def resync(self):
+        self.resyncs += 1
+        print(f"OrderBook {self.symbol}: update ID gap, resyncing")
+        self.reset()
+
+    def fetch_snapshot(self):
+        return self.rest.depth(self.symbol, self.snapshot_limit)
+
+    def load_snapshot(self, generation, attempt=0):
+        with self.lock:
+            if generation != self.generation:
+                return # Reset or closed while a retry was waiting
+        try:
+            snapshot = self.fetch_snapshot()
+        except Exception as e:
+            # The socket is still live, so nothing else would notice: retry with backoff
+            delay = min(DEPTH_SNAPSHOT_RETRY_MAX, DEPTH_SNAPSHOT_RETRY_BASE * 2 ** attempt) * random.uniform(0.8, 1.2)
+            print(f"OrderBook Snapshot Error ({self.symbol}): {e}; retrying in {delay:.1f}s")
+            with self.lock:
+                if generation == self.generation:
+                    self.retry = threading.Timer(delay, self.load_snapshot, args=(generation, attempt + 1))
+                    self.retry.daemon = True
+                    self.retry.start()
+            return
+
+        with self.lock:
+            if generation != self.generation:
+                return # A newer resync has started
+
+            self.last_update_id = snapshot["lastUpdateId"]
+            self.set_levels(self.bids, snapshot.get("bids", []))
+            self.set_levels(self.asks, snapshot.get("asks", []))
+
+            self.retry = None
+            pending = [e for e in self.buffer if e.last_id > self.last_update_id]
+            self.buffer.clear()
+
+            # The first diff must straddle the snapshot, otherwise the
+            # snapshot is older than anything we buffered and is useless.
+            if pending and pending[0].first_id > self.last_update_id + 1:
+                gap = True
+            else:
+                self.is_synced = True
+                gap = not all(self.apply_diff(e) for e in pending)
+
+        if gap:
+            self.resync()
+        else:
+            self.notify(True)
+
+    def apply(self, event):
+        """Feed one diff-depth event (a typed "depth" event). Returns True if the book changed."""
+        with self.lock:
+            if not self.is_synced:
+                self.buffer.append(event)
+                return False
+            if event.last_id <= self.last_update_id:
+                return False
+            ok = self.apply_diff(event)
+
+        if not ok:
+            self.resync()
+        return ok
+
+    def apply_diff(self, event):
+        # Caller holds the lock. Events must chain: U == previous u + 1
+        # (the first one after a snapshot only has to cover lastUpdateId + 1).
+        if event.first_id > self.last_update_id + 1:
+            return False
+        self.set_levels(self.bids, event.bids)
+        self.set_levels(self.asks, event.asks)
+        self.last_update_id = event.last_id
+        return True
+
+    def set_levels(self, side, levels):
+        for price, qty in levels:
+            price = float(price)
+            qty = float(qty)
+            if qty == 0:
+                side.pop(price, None)
+            else:
+                side[price] = qty
+
+    def notify(self, synced):
+        if self.on_sync:
+            self.on_sync(synced)
+
+    # --- Queries ---
+
+    def top(self, n):
+        """Return ([(price, qty), ...] bids, [...] asks), best levels first."""
+        with self.lock:
+            return list(islice(self.bids.items(), n)), list(islice(self.asks.items(), n))
+
+    def cumulative(self, n):
+        """Like top(), but with running quantity totals: [(price, qty, cum_qty), ...]."""
+        bids, asks = self.top(n)
+        return self.accumulate(bids), self.accumulate(asks)
+
+    def accumulate(self, levels):
+        totals = accumulate(qty for _, qty in levels)
+        return [(price, qty, total) for (price, qty), total in zip(levels, totals)]
+
+    def best_bid(self):
+        with self.lock:
+            return self.bids.peekitem(0) if self.bids else None
+
+    def best_ask(self):
+        with self.lock:
+            return self.asks.peekitem(0) if self.asks else None
+
+    def spread(self):
+        """Best ask minus best bid, or None while either side is empty."""
+        with self.lock:
+            if not self.bids or not self.asks:
+                return None
+            return self.asks.peekitem(0)[0] - self.bids.peekitem(0)[0]
+
+    def depth(self):
+        """Number of price levels held on each side."""
+        with self.lock:
+            return len(self.bids), len(self.asks)
@@ -0,0 +1,81 @@
+import threading
+import numpy as np
+
+# Column order of MarketTable.data
+PRICE, OPEN, HIGH, LOW, VOLUME, QUOTE_VOLUME, CHANGE_PCT = range(7)
+SORT_COLUMNS = {"change": CHANGE_PCT, "volume": QUOTE_VOLUME, "price": PRICE}
+
+class MarketTable:
+    """
+    Market-wide ticker state fed by `!miniTicker@arr` (or `!ticker@arr`).
+    One row per symbol in a float64 array plus a symbol -> row index, so
+    hundreds of pairs cost a few kilobytes and a sorted/filtered view is one
+    vectorized mask plus an argsort (O(n log n)).
+    """
+    def __init__(self, capacity=512):
+        self.lock = threading.Lock()
+        self.index = {} # symbol -> row
+        self.symbols = np.empty(capacity, dtype=object)
+        self.data = np.zeros((capacity, 7))
+        self.size = 0
+        self.version = 0 # Bumped on every update so views know when to re-sort
+
+    def __len__(self):
+        return self.size
+
+    def update(self, events):
+        """Apply one `!miniTicker@arr` / `!ticker@arr` payload (a list of per-symbol events)."""
+        with self.lock:
+            for e in events:
+                symbol = e["s"]
+                row = self.index.get(symbol)
+                if row is None:
+                    row = self.add_symbol(symbol)
+                price = float(e["c"])
+                open_p = float(e["o"])
+                # The full ticker carries P; the mini ticker has to derive it
+                change = float(e["P"]) if "P" in e else ((price - open_p) / open_p * 100 if open_p else 0.0)
+                self.data[row] = (price, open_p, float(e["h"]), float(e["l"]), float(e["v"]), float(e["q"]), change)
+            self.version += 1
+
+    def add_symbol(self, symbol):
+        # Caller holds the lock
+        if self.size == len(self.data):
+            capacity = len(self.data) * 2
+            self.data = np.concatenate([self.data, np.zeros_like(self.data)])
+            symbols = np.empty(capacity, dtype=object)
+            symbols[:self.size] = self.symbols[:self.size]
+            self.symbols = symbols
+        row = self.size
+        self.index[symbol] = row
+        self.symbols[row] = symbol
+        self.size += 1
+        return row
+
+    def query(self, sort_by="change", descending=True, text="", quote="", min_quote_volume=0):
+        """Row indexes matching the filters, sorted by "change", "volume", "price" or "symbol"."""
+        with self.lock:
+            n = self.size
+            symbols = self.symbols[:n]
+            data = self.data[:n]
+
+            mask = data[:, QUOTE_VOLUME] >= min_quote_volume
+            if text or quote:
+                text = text.upper()
+                quote = quote.upper()
+                mask &= np.fromiter(((text in s) and s.endswith(quote) for s in symbols), dtype=bool, count=n)
+            rows = np.flatnonzero(mask)
+
+            if sort_by == "symbol":
+                keys = symbols[rows].astype(str)
+            else:
+                keys = data[rows, SORT_COLUMNS[sort_by]]
+            order = np.argsort(keys, kind="stable")
+            if descending:
+                order = order[::-1]
+            return rows[order]
+
+    def rows(self, indexes):
+        """[(symbol, price, change %, quote volume), ...] for the given row indexes."""
+        with self.lock:
+            return [(self.symbols[i], self.data[i, PRICE], self.data[i, CHANGE_PCT], self.data[i, QUOTE_VOLUME]) for i in indexes]
@@ -0,0 +1,228 @@
+import os
+import time
+import threading
+from bisect import bisect_left
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from config import *
+
+# Latency buckets in seconds (100 µs .. 2.5 s)
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+# Per-message work (decoding, stream handlers) in seconds (1 µs .. 10 ms)
+FAST_BUCKETS = (0.000001, 0.0000025, 0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.01)
+
+class Counter:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+class Gauge:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def set(self, value):
+        self.value = value
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is a bisect and two additions."""
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1) # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self):
+        return list(self.counts)
+
+    def quantile(self, q, since=None):
+        """Approximate quantile (linear within a bucket); `since` = an earlier snapshot() for a windowed view."""
+        counts = self.counts if since is None else [a - b for a, b in zip(self.counts, since)]
+        total = sum(counts)
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for i, n in enumerate(counts):
+            if n and seen + n >= rank:
+                low = self.buckets[i - 1] if i else 0.0
+                high = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return low + (high - low) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+KINDS = {"counter": Counter, "gauge": Gauge, "histogram": Histogram}
+
+class Metrics:
+    """
+    In-process metrics registry.
+    Instruments are created once (by name and labels) and kept by the caller,
+    so the hot path is a plain attribute update with no lookups or locks.
+    Collectors run before every read to refresh gauges that are cheaper to
+    sample than to track (queue depths, thread counts).
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.families = {} # name -> (kind, help, {labels: instrument})
+        self.collectors = []
+        self.add_collector(self.collect_process)
+
+    def instrument(self, kind, name, help, labels, **kwargs):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            family = self.families.setdefault(name, (kind, help, {}))
+            if family[0] != kind:
+                raise ValueError(f"Metric {name} is a {family[0]}, not a {kind}")
+            instruments = family[2]
+            if key not in instruments:
+                instruments[key] = KINDS[kind](**kwargs)
+            return instruments[key]
+
+    def counter(self, name, help="", **labels):
+        return self.instrument("counter", name, help, labels)
+
+    def gauge(self, name, help="", **labels):
+        return self.instrument("gauge", name, help, labels)
+
+    def histogram(self, name, help="", buckets=DEFAULT_BUCKETS, **labels):
+        return self.instrument("histogram", name, help, labels, buckets=buckets)
+
+    def family(self, name):
+        """{labels dict as tuple: instrument} for `name` (empty if unknown)."""
+        with self.lock:
+            family = self.families.get(name)
+            return dict(family[2]) if family else {}
+
+    def add_collector(self, callback):
+        """Call `callback(metrics)` before metrics are read."""
+        if callback not in self.collectors:
+            self.collectors.append(callback)
+
+    def remove_collector(self, callback):
+        if callback in self.collectors:
+            self.collectors.remove(callback)
+
+    def collect(self):
+        for callback in list(self.collectors):
+            try:
+                callback(self)
+            except Exception as e:
+                print(f"Metrics collector error: {e}")
+
+    def collect_process(self, metrics):
+        self.gauge("dashboard_threads", "Live Python threads").set(threading.active_count())
+        self.gauge("dashboard_process_cpu_seconds", "CPU time used by the process").set(time.process_time())
+
+    def prometheus(self):
+        """All metrics in the Prometheus text exposition format."""
+        self.collect()
+        lines = []
+        with self.lock:
+            families = [(name, kind, help, dict(instruments)) for name, (kind, help, instruments) in sorted(self.families.items())]
+
+        for name, kind, help, instruments in families:
+            if help:
+                lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, metric in sorted(instruments.items()):
+                if kind != "histogram":
+                    lines.append(f"{name}{format_labels(labels)} {metric.value}")
+                    continue
+                cumulative = 0
+                for bound, n in zip(metric.buckets + (float("inf"),), metric.counts):
+                    cumulative += n
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_bucket{format_labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{format_labels(labels)} {metric.sum}")
+                lines.append(f"{name}_count{format_labels(labels)} {metric.count}")
+        return "\n".join(lines) + "\n"
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in labels) + "}"
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class MetricsExporter:
+    """
+    Publishes a Metrics registry in Prometheus text format: rewritten to
+    `path` every `interval` seconds (for node_exporter's textfile collector)
+    and/or served at http://127.0.0.1:<port>/metrics.
+    """
+    def __init__(self, metrics, path=None, port=None, interval=METRICS_EXPORT_INTERVAL, host="127.0.0.1"):
+        self.metrics = metrics
+        self.path = path
+        self.port = port
+        self.host = host
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.server = None
+
+    def start(self):
+        if self.path:
+            threading.Thread(target=self.write_loop, daemon=True).start()
+        if self.port:
+            metrics = self.metrics
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split("?")[0] not in ("/", "/metrics"):
+                        self.send_error(404)
+                        return
+                    body = metrics.prometheus().encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, format, *args):
+                    pass # Scrapes every few seconds would flood the console
+
+            self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+            threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def write(self):
+        # Write then rename so scrapers never read a half-written file
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.metrics.prometheus())
+        os.replace(tmp, self.path)
+
+    def write_loop(self):
+        while not self.stopped.is_set():
+            try:
+                self.write()
+            except Exception as e:
+                print(f"Metrics export error: {e}")
+            self.stopped.wait(self.interval)
+
+
+_shared_metrics = None
+
+def shared_metrics():
+    """The process-wide registry used by components that are not given one."""
+    global _shared_metrics
+    if _shared_metrics is None:
+        _shared_metrics = Metrics()
+    return _shared_metrics
@@ -0,0 +1,174 @@
+import os
+import gzip
+import json
+import time
+import threading
+import argparse
+from config import *
+
+class StreamRecorder:
+    """
+    Append-only recording of raw stream frames and REST responses.
+
+    Each line is `<epoch µs>\t<channel>\t<payload>`: the channel is the stream
+    name for WebSocket frames (payload = the combined-stream frame as
+    received) or `rest:<path>` for REST responses (payload = {"params",
+    "data"} JSON). Lines go to gzip segment files that are rotated by age and
+    size and never rewritten; the open segment is sync-flushed every second so
+    a crash loses at most that much.
+    """
+    def __init__(self, path, segment_seconds=RECORD_SEGMENT_SECONDS, segment_bytes=RECORD_SEGMENT_BYTES):
+        self.path = path
+        self.segment_seconds = segment_seconds
+        self.segment_bytes = segment_bytes
+        os.makedirs(path, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.file = None
+        self.segment = len(segment_files(path)) # Continue numbering after existing segments
+        self.segment_started = 0
+        self.segment_size = 0
+        self.last_flush = 0
+        self.hub = None
+        self.rest = None
+        self.frames = 0
+        self.responses = 0
+
+    def attach(self, hub, rest=None):
+        """Record every frame the hub receives (and every response `rest` returns)."""
+        self.hub = hub
+        hub.add_frame_listener(self.on_frame)
+        if rest is not None:
+            self.rest = rest
+            rest.add_listener(self.on_response)
+
+    def detach(self):
+        if self.hub:
+            self.hub.remove_frame_listener(self.on_frame)
+            self.hub = None
+        if self.rest:
+            self.rest.remove_listener(self.on_response)
+            self.rest = None
+
+    def on_frame(self, stream, message):
+        self.frames += 1
+        self.record(stream, message)
+
+    def on_response(self, path, params, data):
+        self.responses += 1
+        self.record(f"rest:{path}", json.dumps({"params": params or {}, "data": data}, separators=(",", ":")))
+
+    def record(self, channel, payload, timestamp=None):
+        if isinstance(payload, bytes):
+            payload = payload.decode()
+        timestamp = timestamp or time.time_ns() // 1000
+        line = f"{timestamp}\t{channel}\t{payload}\n"
+
+        with self.lock:
+            now = time.monotonic()
+            if (self.file is None or now - self.segment_started >= self.segment_seconds
+                    or self.segment_size >= self.segment_bytes):
+                self.rotate(timestamp)
+            self.file.write(line)
+            self.segment_size += len(line)
+            if now - self.last_flush >= 1:
+                self.file.flush()
+                self.last_flush = now
+
+    def rotate(self, timestamp):
+        # Caller holds the lock
+        if self.file:
+            self.file.close()
+        self.segment += 1
+        name = f"{self.segment:06d}-{timestamp // 1000}.log.gz"
+        self.file = gzip.open(os.path.join(self.path, name), "at", encoding="utf-8")
+        self.segment_started = time.monotonic()
+        self.segment_size = 0
+
+    def close(self):
+        self.detach()
+        with self.lock:
+            if self.file:
+                self.file.close()
+                self.file = None
+
+def segment_files(path):
+    """Segment file paths of a recording, oldest first."""
+    if not os.path.isdir(path):
+        return []
+    return [os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith(".log.gz")]
+
+def read_recording(path, channels=None):
+    """
+    Yield (epoch µs, channel, payload) for every line of a recording, in
+    order. A segment cut short by a crash is read up to its last full line.
+    """
+    for segment in segment_files(path):
+        with gzip.open(segment, "rt", encoding="utf-8") as f:
+            try:
+                for line in f:
+                    if not line.endswith("\n"):
+                        break # Torn final line
+                    timestamp, channel, payload = line[:-1].split("\t", 2)
+                    if channels is None or channel in channels:
+                        yield int(timestamp), channel, payload
+            except EOFError:
+                pass # Unterminated gzip stream: keep what was flushed
+
+def snapshot_loop(rest, streams, stopped, interval):
+    """Periodically fetch the REST state a replay needs: depth, ticker and recent trade snapshots and kline history."""
+    while not stopped.is_set():
+        for stream in streams:
+            symbol, _, kind = stream.partition("@")
+            try:
+                if kind.startswith("depth"):
+                    rest.depth(symbol, DEPTH_SNAPSHOT_LIMIT)
+                elif kind.startswith("kline_"):
+                    rest.klines(symbol, kind[len("kline_"):], limit=KLINE_FETCH_LIMIT)
+                elif kind == "ticker":
+                    rest.ticker_24hr(symbol)
+                elif kind in ("trade", "aggTrade"):
+                    rest.agg_trades(symbol, limit=TRADES_SNAPSHOT_LIMIT)
+            except Exception as e:
+                print(f"Recorder snapshot error ({stream}): {e}")
+        stopped.wait(interval)
+
+def main():
+    from core.stream_hub import StreamHub
+    from core.rest_client import BinanceRest
+
+    parser = argparse.ArgumentParser(description="Record Binance streams for offline replay")
+    parser.add_argument("streams", nargs="+", help="stream names, e.g. btcusdt@trade btcusdt@depth@100ms")
+    parser.add_argument("--out", help=f"recording folder (default: {RECORD_DIR}/<timestamp>)")
+    parser.add_argument("--duration", type=float, default=0, help="seconds to record (default: until Ctrl+C)")
+    parser.add_argument("--snapshot-interval", type=float, default=RECORD_SNAPSHOT_INTERVAL,
+                        help="seconds between REST depth/kline snapshots")
+    args = parser.parse_args()
+
+    path = args.out or os.path.join(RECORD_DIR, time.strftime("%Y%m%d-%H%M%S"))
+    hub = StreamHub()
+    rest = BinanceRest()
+    recorder = StreamRecorder(path)
+    recorder.attach(hub, rest)
+
+    for stream in args.streams:
+        hub.subscribe(stream, lambda data: None)
+    stopped = threading.Event()
+    threading.Thread(target=snapshot_loop, args=(rest, args.streams, stopped, args.snapshot_interval), daemon=True).start()
+
+    print(f"Recording {len(args.streams)} streams to {path} (Ctrl+C to stop)")
+    started = time.monotonic()
+    try:
+        while not args.duration or time.monotonic() - started < args.duration:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stopped.set()
+        hub.stop()
+        recorder.close()
+        rest.close()
+    print(f"Recorded {recorder.frames:,} frames and {recorder.responses:,} REST responses in {recorder.segment} segments")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+import json
+import time
+import base64
+import struct
+import hashlib
+import argparse
+import threading
+import socketserver
+from bisect import bisect_right
+from urllib.parse import urlsplit, parse_qsl
+from config import *
+from core.recorder import read_recording
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+OP_TEXT, OP_CLOSE, OP_PING, OP_PONG = 0x1, 0x8, 0x9, 0xA
+
+def ws_frame(opcode, payload):
+    """One unmasked, unfragmented server frame."""
+    n = len(payload)
+    if n < 126:
+        header = struct.pack("!BB", 0x80 | opcode, n)
+    elif n < 65536:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, n)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, n)
+    return header + payload
+
+def read_ws_frame(rfile):
+    """(opcode, payload) of the next client frame, or None when the socket closes."""
+    head = rfile.read(2)
+    if len(head) < 2:
+        return None
+    opcode, n = head[0] & 0x0F, head[1] & 0x7F
+    if n == 126:
+        n = struct.unpack("!H", rfile.read(2))[0]
+    elif n == 127:
+        n = struct.unpack("!Q", rfile.read(8))[0]
+    mask = rfile.read(4) if head[1] & 0x80 else None
+    payload = rfile.read(n)
+    if mask:
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    return opcode, payload
+
+class ReplayClient:
+    """One connected WebSocket client and the streams it asked for."""
+    def __init__(self, connection, streams):
+        self.connection = connection
+        self.streams = set(streams)
+        self.lock = threading.Lock()
+        self.is_open = True
+
+    def send(self, opcode, payload):
+        with self.lock:
+            if not self.is_open:
+                return
+            try:
+                self.connection.sendall(ws_frame(opcode, payload))
+            except OSError:
+                self.is_open = False
+
+class ReplayHandler(socketserver.StreamRequestHandler):
+    """HTTP/1.1 keep-alive REST requests, or a WebSocket upgrade for /stream."""
+    def handle(self):
+        replay = self.server.replay
+        while True:
+            request_line = self.rfile.readline()
+            if not request_line.strip():
+                return
+            try:
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+            except ValueError:
+                return
+            headers = {}
+            while True:
+                line = self.rfile.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                key, _, value = line.decode("latin-1").partition(":")
+                headers[key.strip().lower()] = value.strip()
+
+            url = urlsplit(target)
+            query = dict(parse_qsl(url.query))
+            if headers.get("upgrade", "").lower() == "websocket":
+                replay.serve_stream(self, query, headers)
+                return
+            replay.serve_rest(self, url.path, query)
+            if headers.get("connection", "").lower() == "close":
+                return
+
+class ReplayTCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+class ReplayServer:
+    """
+    Serves a StreamRecorder recording back as a fake Binance endpoint.
+
+    One port answers both the combined-stream WebSocket (`/stream?streams=`
+    plus runtime SUBSCRIBE/UNSUBSCRIBE) and the REST paths that were
+    recorded. Frames are sent on the recorded schedule divided by `speed`;
+    the schedule is computed from the first frame, so playback does not
+    drift however long it runs. speed=0 sends as fast as the clients read.
+    REST requests get the response recorded closest before the playback
+    clock (klines and aggTrades are filtered by the request's range).
+    """
+    def __init__(self, path, speed=1.0, host=REPLAY_HOST, port=REPLAY_PORT, loop=False, wait_for_client=True):
+        self.path = path
+        self.speed = speed
+        self.host = host
+        self.port = port
+        self.loop = loop
+        self.wait_for_client = wait_for_client
+
+        self.lock = threading.Lock()
+        self.clients = []
+        self.client_connected = threading.Event()
+        self.stopped = threading.Event()
+        self.finished = threading.Event()
+        self.server = None
+
+        self.clock = 0 # Recorded time (epoch µs) of the last frame played
+        self.sent = 0
+        self.played = 0
+        self.max_lag = 0.0 # Worst delay behind schedule, in seconds
+        self.rest = self.load_rest()
+
+    @property
+    def stream_url(self):
+        return f"ws://{self.host}:{self.port}/stream"
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def load_rest(self):
+        """Index the recorded REST responses: (path, symbol, interval) -> ([times], [data])."""
+        index = {}
+        for timestamp, channel, payload in read_recording(self.path):
+            if not channel.startswith("rest:"):
+                continue
+            record = json.loads(payload)
+            params = record["params"]
+            times, responses = index.setdefault((channel[5:], params.get("symbol"), params.get("interval")), ([], []))
+            times.append(timestamp)
+            responses.append(record["data"])
+        return index
+
+    def start(self):
+        self.server = ReplayTCPServer((self.host, self.port), ReplayHandler)
+        self.server.replay = self
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        threading.Thread(target=self.play, daemon=True).start()
+
+    def stop(self):
+        self.stopped.set()
+        self.client_connected.set()
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        with self.lock:
+            for client in self.clients:
+                client.send(OP_CLOSE, b"")
+                client.is_open = False
+
+    # --- Playback ---
+
+    def play(self):
+        if self.wait_for_client:
+            self.client_connected.wait()
+        while not self.stopped.is_set():
+            start = time.perf_counter()
+            first = None
+            for timestamp, channel, payload in read_recording(self.path):
+                if self.stopped.is_set():
+                    break
+                if channel.startswith("rest:"):
+                    continue
+                if first is None:
+                    first = timestamp
+                if self.speed:
+                    delay = start + (timestamp - first) / 1e6 / self.speed - time.perf_counter()
+                    if delay > 0:
+                        self.stopped.wait(delay)
+                    else:
+                        self.max_lag = max(self.max_lag, -delay)
+                self.clock = timestamp
+                self.broadcast(channel, payload.encode())
+                self.played += 1
+            if not self.loop:
+                break
+        self.finished.set()
+
+    def broadcast(self, stream, payload):
+        with self.lock:
+            clients = [c for c in self.clients if stream in c.streams]
+        for client in clients:
+            client.send(OP_TEXT, payload)
+            self.sent += 1
+
+    # --- WebSocket ---
+
+    def serve_stream(self, handler, query, headers):
+        accept = base64.b64encode(hashlib.sha1((headers.get("sec-websocket-key", "") + WS_GUID).encode()).digest()).decode()
+        handler.wfile.write((
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode())
+        handler.wfile.flush()
+
+        client = ReplayClient(handler.connection, filter(None, query.get("streams", "").split("/")))
+        with self.lock:
+            self.clients.append(client)
+        self.client_connected.set()
+
+        try:
+            while client.is_open:
+                frame = read_ws_frame(handler.rfile)
+                if frame is None:
+                    break
+                opcode, payload = frame
+                if opcode == OP_TEXT:
+                    self.handle_request(client, payload)
+                elif opcode == OP_PING:
+                    client.send(OP_PONG, payload)
+                elif opcode == OP_CLOSE:
+                    client.send(OP_CLOSE, payload)
+                    break
+        except OSError:
+            pass
+        finally:
+            client.is_open = False
+            with self.lock:
+                self.clients.remove(client)
+
+    def handle_request(self, client, payload):
+        """SUBSCRIBE / UNSUBSCRIBE / LIST_SUBSCRIPTIONS, answered like Binance does."""
+        try:
+            request = json.loads(payload)
+        except ValueError:
+            return
+        method = request.get("method")
+        streams = request.get("params") or []
+        result = None
+        if method == "SUBSCRIBE":
+            client.streams.update(streams)
+        elif method == "UNSUBSCRIBE":
+            client.streams.difference_update(streams)
+        elif method == "LIST_SUBSCRIPTIONS":
+            result = sorted(client.streams)
+        client.send(OP_TEXT, json.dumps({"result": result, "id": request.get("id")}).encode())
+
+    # --- REST ---
+
+    def serve_rest(self, handler, path, query):
+        data = self.rest_response(path, query)
+        status = "200 OK"
+        if data is None:
+            status = "404 Not Found"
+            data = {"code": -1, "msg": f"{path} was not recorded"}
+        body = json.dumps(data, separators=(",", ":")).encode()
+        handler.wfile.write((
+            f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n").encode() + body)
+        handler.wfile.flush()
+
+    def rest_response(self, path, query):
+        entry = self.rest.get((path, query.get("symbol"), query.get("interval")))
+        if entry is None:
+            return None
+        times, responses = entry
+        # Latest response recorded before the playback clock, else the first one
+        data = responses[max(bisect_right(times, self.clock) - 1, 0)]
+
+        if path == "/api/v3/klines":
+            data = filter_range(data, query, time_key=0)
+        elif path == "/api/v3/aggTrades":
+            if "fromId" in query:
+                data = [t for t in data if t["a"] >= int(query["fromId"])]
+            data = filter_range(data, query, time_key="T")
+        return data
+
+def filter_range(rows, query, time_key):
+    """Apply startTime/endTime/limit the way Binance would to a recorded page."""
+    if "startTime" in query:
+        rows = [r for r in rows if r[time_key] >= int(query["startTime"])]
+    if "endTime" in query:
+        rows = [r for r in rows if r[time_key] <= int(query["endTime"])]
+        if "startTime" not in query:
+            return rows[-int(query.get("limit", 500)):] # Binance returns the newest page before endTime
+    return rows[:int(query.get("limit", 500))]
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recording as a local Binance endpoint")
+    parser.add_argument("path", help="recording folder written by core.recorder")
+    parser.add_argument("--speed", default="1", help="playback speed: 1, 10, ... or max")
+    parser.add_argument("--host", default=REPLAY_HOST)
+    parser.add_argument("--port", type=int, default=REPLAY_PORT)
+    parser.add_argument("--loop", action="store_true", help="start over at the end of the recording")
+    args = parser.parse_args()
+
+    speed = 0 if args.speed == "max" else float(args.speed)
+    server = ReplayServer(args.path, speed=speed, host=args.host, port=args.port, loop=args.loop)
+    server.start()
+    print(f"Replaying {args.path} at {'max' if not speed else f'{speed:g}x'} speed. Run the dashboard with:")
+    print(f"  BINANCE_STREAM_URL={server.stream_url} BINANCE_BASE_URL={server.base_url} python main.py")
+
+    started = time.monotonic()
+    try:
+        while not server.finished.wait(1):
+            pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    elapsed = time.monotonic() - started
+    print(f"Played {server.played:,} frames ({server.sent:,} sent) in {elapsed:.1f}s, max lag {server.max_lag * 1000:.0f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+import time
+import random
+import asyncio
+import threading
+import functools
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from config import *
+
+class WeightLimiter:
+    """
+    Client-side view of Binance's per-minute request-weight budget.
+    Requests reserve their weight before being sent and block when the
+    current minute is used up; the server's X-MBX-USED-WEIGHT-1M header and
+    429/418 Retry-After replies correct the local count.
+    """
+    def __init__(self, limit=REST_WEIGHT_LIMIT, window=60):
+        self.limit = limit
+        self.window = window
+        self.lock = threading.Lock()
+        self.window_start = time.monotonic()
+        self.used = 0
+        self.blocked_until = 0
+        self.waited = 0.0 # Total seconds requests spent waiting for budget
+
+    def acquire(self, weight):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now - self.window_start >= self.window:
+                    self.window_start = now
+                    self.used = 0
+                if now < self.blocked_until:
+                    delay = self.blocked_until - now # Retry-After pause
+                elif self.used + weight <= self.limit:
+                    self.used += weight
+                    return
+                else:
+                    delay = max(self.window_start + self.window - now, 0.05) # Budget used up
+                self.waited += delay
+            time.sleep(delay)
+
+    def observe(self, used):
+        """Sync with the server's count for the current minute."""
+        if used is None:
+            return
+        with self.lock:
+            self.used = max(self.used, int(used))
+
+    def pause(self, seconds):
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+class BinanceRest:
+    """
+    Shared REST client for Binance endpoints.
+    One keep-alive connection pool serves every caller, each request has a
+    timeout, transient failures are retried with jittered exponential backoff
+    and request weight is rate limited. The *_async methods run on a bounded
+    worker pool so many symbols can be fetched concurrently from asyncio.
+    """
+    def __init__(self, base_url=None, timeout=REST_TIMEOUT, retries=REST_RETRIES,
+                 pool_size=REST_POOL_SIZE, weight_limit=REST_WEIGHT_LIMIT):
+        self.base_url = base_url or BINANCE_BASE_URL
+        self.timeout = timeout
+        self.retries = retries
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.limiter = WeightLimiter(weight_limit)
+        self.executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="rest")
+        self.listeners = [] # callback(path, params, data) after every successful request
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        self.session.close()
+
+    def add_listener(self, callback):
+        if callback not in self.listeners:
+            self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+    def backoff(self, attempt):
+        return REST_BACKOFF * (2 ** attempt) * (0.5 + random.random())
+
+    def get(self, path, params=None, weight=1):
+        """GET `path` (e.g. "/api/v3/klines") and return the decoded JSON."""
+        url = f"{self.base_url}{path}"
+        error = None
+
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(self.backoff(attempt - 1))
+            self.limiter.acquire(weight)
+
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+                continue
+
+            self.limiter.observe(response.headers.get("X-MBX-USED-WEIGHT-1M"))
+
+            # 429 = slow down, 418 = IP banned for a while; both say how long
+            if response.status_code in (429, 418):
+                retry_after = float(response.headers.get("Retry-After", 0)) or self.backoff(attempt)
+                self.limiter.pause(retry_after)
+                error = requests.HTTPError(f"{response.status_code} rate limited, retry after {retry_after:.0f}s", response=response)
+                continue
+            if response.status_code >= 500:
+                error = requests.HTTPError(f"{response.status_code} server error", response=response)
+                continue
+
+            response.raise_for_status()
+            data = response.json()
+            for callback in list(self.listeners):
+                callback(path, params, data)
+            return data
+
+        raise error
+
+    async def get_async(self, path, params=None, weight=1):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(self.get, path, params, weight))
+
+    # --- Endpoints ---
+
+    def klines(self, symbol, interval, **params):
+        return self.get("/api/v3/klines", {"symbol": symbol.upper(), "interval": interval, **params}, weight=2)
+
+    def depth(self, symbol, limit=100):
+        return self.get("/api/v3/depth", {"symbol": symbol.upper(), "limit": limit}, weight=depth_weight(limit))
+
+    def agg_trades(self, symbol, **params):
+        return self.get("/api/v3/aggTrades", {"symbol": symbol.upper(), **params}, weight=4)
+
+    def ticker_24hr(self, symbol):
+        return self.get("/api/v3/ticker/24hr", {"symbol": symbol.upper()}, weight=2)
+
+    async def klines_async(self, symbol, interval, **params):
+        return await self.get_async("/api/v3/klines", {"symbol": symbol.upper(), "interval": interval, **params}, weight=2)
+
+    async def depth_async(self, symbol, limit=100):
+        return await self.get_async("/api/v3/depth", {"symbol": symbol.upper(), "limit": limit}, weight=depth_weight(limit))
+
+    async def agg_trades_async(self, symbol, **params):
+        return await self.get_async("/api/v3/aggTrades", {"symbol": symbol.upper(), **params}, weight=4)
+
+def depth_weight(limit):
+    # Binance charges more for deeper snapshots
+    if limit <= 100:
+        return 5
+    if limit <= 500:
+        return 25
+    if limit <= 1000:
+        return 50
+    return 250
+
+
+_shared_rest = None
+_shared_lock = threading.Lock()
+
+def shared_rest():
+    """Return the process-wide REST client."""
+    global _shared_rest
+    with _shared_lock:
+        if _shared_rest is None:
+            _shared_rest = BinanceRest()
+        return _shared_rest
@@ -0,0 +1,160 @@
+import numpy as np
+from config import *
+
+# Layout of the shared blocks written by the ingest workers (core.ingest).
+# Every section starts with an int64 counter followed by float64 values, so
+# a block is plain memory that any process can map with numpy.
+COUNTER = np.dtype(np.int64).itemsize
+FLOAT = np.dtype(np.float64).itemsize
+
+TICKER_FIELDS = ("price", "change", "change_pct", "quote_volume")
+BOOK_HEADER = ("synced", "last_update_id", "resyncs", "bid_levels", "ask_levels", "n_bids", "n_asks")
+STATS_FIELDS = ("trades", "volume", "buy_volume", "sell_volume", "vwap", "imbalance", "large")
+
+class Seqlock:
+    """
+    `size` float64 values behind a sequence counter, for one writer and any
+    number of readers in other processes. The writer makes the counter odd,
+    writes, then makes it even again; a reader copies the values and retries
+    if the counter was odd or moved meanwhile. Readers never block the
+    writer and never see half an update. The counter is set rather than
+    incremented, so a worker that died mid-write (leaving it odd) does not
+    invert the parity for the worker restarted on the same block.
+    """
+    def __init__(self, buffer, offset, size):
+        self.seq = np.ndarray((1,), np.int64, buffer, offset)
+        self.values = np.ndarray((size,), np.float64, buffer, offset + COUNTER)
+
+    @staticmethod
+    def nbytes(size):
+        return COUNTER + size * FLOAT
+
+    def write(self, values):
+        seq = int(self.seq[0]) | 1
+        self.seq[0] = seq
+        self.values[:len(values)] = values
+        self.seq[0] = seq + 1
+
+    def version(self):
+        """Number of completed writes (cheap check before a read)."""
+        return int(self.seq[0]) >> 1
+
+    def read(self, spins=1000):
+        """(version, copy of the values), or None if the writer kept it busy for every try."""
+        for _ in range(spins):
+            before = int(self.seq[0])
+            if before & 1:
+                continue
+            values = self.values.copy()
+            if int(self.seq[0]) == before:
+                return before >> 1, values
+        return None
+
+class TradeRing:
+    """
+    (time ms, price, qty, is_buyer_maker) rows in a shared ring buffer.
+    `count` is the number of rows ever written; the writer fills a row
+    first and bumps the count after, so every row below the count is
+    complete. Readers keep their own position and copy only what is new.
+    """
+    def __init__(self, buffer, offset, capacity):
+        self.capacity = capacity
+        self.count = np.ndarray((1,), np.int64, buffer, offset)
+        self.rows = np.ndarray((capacity, 4), np.float64, buffer, offset + COUNTER)
+
+    @staticmethod
+    def nbytes(capacity):
+        return COUNTER + capacity * 4 * FLOAT
+
+    def append(self, trade):
+        n = int(self.count[0])
+        self.rows[n % self.capacity] = trade
+        self.count[0] = n + 1
+
+    def read_since(self, position):
+        """(new position, rows written after `position`, oldest first). Rows the writer has lapped are skipped."""
+        end = int(self.count[0])
+        start = max(position, end - self.capacity)
+        if start >= end:
+            return end, self.rows[:0].copy()
+        rows = self.rows[np.arange(start, end) % self.capacity]
+        # The writer may have started on the slot of the oldest row while we copied
+        overwritten = int(self.count[0]) - self.capacity + 1
+        if overwritten > start:
+            rows = rows[overwritten - start:]
+        return end, rows
+
+class TickerState:
+    """Latest ticker fields for one symbol."""
+    def __init__(self, buffer):
+        self.fields = Seqlock(buffer, 0, len(TICKER_FIELDS))
+
+    @staticmethod
+    def nbytes():
+        return Seqlock.nbytes(len(TICKER_FIELDS))
+
+    def publish(self, price, change, change_pct, quote_volume):
+        self.fields.write((price, change, change_pct, quote_volume))
+
+class BookState:
+    """Top `levels` of a local order book plus its sync state and depth."""
+    def __init__(self, buffer, levels=INGEST_BOOK_LEVELS):
+        self.levels = levels
+        self.fields = Seqlock(buffer, 0, len(BOOK_HEADER) + 4 * levels)
+
+    @staticmethod
+    def nbytes(levels=INGEST_BOOK_LEVELS):
+        return Seqlock.nbytes(len(BOOK_HEADER) + 4 * levels)
+
+    def publish(self, book):
+        bids, asks = book.top(self.levels)
+        n_bids, n_asks = book.depth()
+        values = np.zeros(len(BOOK_HEADER) + 4 * self.levels)
+        values[:len(BOOK_HEADER)] = (book.is_synced, book.last_update_id, book.resyncs, len(bids), len(asks), n_bids, n_asks)
+        start = len(BOOK_HEADER)
+        if bids:
+            values[start:start + 2 * len(bids)] = np.ravel(bids)
+        start += 2 * self.levels
+        if asks:
+            values[start:start + 2 * len(asks)] = np.ravel(asks)
+        self.fields.write(values)
+
+    def unpack(self, values):
+        """{header field: value} plus "bids"/"asks" as [(price, qty), ...]."""
+        header = dict(zip(BOOK_HEADER, values[:len(BOOK_HEADER)].tolist()))
+        levels = values[len(BOOK_HEADER):].reshape(2, self.levels, 2)
+        header["bids"] = [tuple(level) for level in levels[0, :int(header["bid_levels"])].tolist()]
+        header["asks"] = [tuple(level) for level in levels[1, :int(header["ask_levels"])].tolist()]
+        return header
+
+class TradeState:
+    """A trade ring buffer and the TradeStats windows of one trade stream."""
+    def __init__(self, buffer, capacity=TRADES_BUFFER_SIZE, windows=TRADE_STATS_WINDOWS):
+        self.windows = tuple(windows)
+        self.ring = TradeRing(buffer, 0, capacity)
+        self.stats = Seqlock(buffer, TradeRing.nbytes(capacity), len(self.windows) * len(STATS_FIELDS))
+
+    @staticmethod
+    def nbytes(capacity=TRADES_BUFFER_SIZE, windows=TRADE_STATS_WINDOWS):
+        return TradeRing.nbytes(capacity) + Seqlock.nbytes(len(windows) * len(STATS_FIELDS))
+
+    def publish_stats(self, snapshot):
+        values = []
+        for seconds in self.windows:
+            s = snapshot[seconds]
+            values.extend((s["trades"], s["volume"], s["buy_volume"], s["sell_volume"],
+                           np.nan if s["vwap"] is None else s["vwap"], s["imbalance"], s["large"]))
+        self.stats.write(values)
+
+    def unpack_stats(self, values):
+        """The TradeStats.snapshot() shape, minus the individual large trades."""
+        result = {}
+        for i, seconds in enumerate(self.windows):
+            s = dict(zip(STATS_FIELDS, values[i * len(STATS_FIELDS):(i + 1) * len(STATS_FIELDS)].tolist()))
+            s["trades"] = int(s["trades"])
+            s["large"] = int(s["large"])
+            s["tps"] = s["trades"] / seconds
+            s["vwap"] = None if np.isnan(s["vwap"]) else s["vwap"]
+            s["large_trades"] = []
+            result[seconds] = s
+        return result
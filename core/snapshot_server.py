@@ -0,0 +1,100 @@
+import json
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qsl
+from config import *
+
+class SnapshotServer:
+    """
+    Read-only JSON view of a MarketEngine on a local port.
+
+        /snapshot                    every running feed
+        /feeds                       running feed keys and listener counts
+        /ticker/<symbol>
+        /book/<symbol>?levels=20
+        /trades/<symbol>?n=100       (&stream=aggTrade for the aggregated feed)
+        /klines/<symbol>/<interval>?n=100
+        /market?n=50&sort=change&quote=USDT
+        /metrics                     Prometheus text, when given a registry
+
+    Only feeds that are already running are served; a request never
+    subscribes to anything.
+    """
+    def __init__(self, engine, port=SNAPSHOT_PORT, host=SNAPSHOT_HOST, metrics=None):
+        self.engine = engine
+        self.host = host
+        self.port = port
+        self.metrics = metrics
+        self.server = None
+
+    def start(self):
+        snapshots = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlsplit(self.path)
+                if url.path == "/metrics" and snapshots.metrics:
+                    self.reply(200, snapshots.metrics.prometheus().encode(), "text/plain; version=0.0.4")
+                    return
+                try:
+                    data = snapshots.route(url.path.strip("/").split("/"), dict(parse_qsl(url.query)))
+                except (ValueError, KeyError) as e:
+                    self.reply(400, json.dumps({"error": str(e)}).encode())
+                    return
+                if data is None:
+                    self.reply(404, json.dumps({"error": f"{url.path} is not running"}).encode())
+                    return
+                self.reply(200, json.dumps(data, separators=(",", ":")).encode())
+
+            def reply(self, status, body, content_type="application/json"):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass # Polling clients would flood the console
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.port = self.server.server_address[1] # When started on port 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def route(self, parts, query):
+        """JSON-serializable answer for a request path, or None when the feed is not running."""
+        engine = self.engine
+        kind, args = parts[0], parts[1:]
+        if kind in ("", "snapshot"):
+            return engine.snapshot()
+        if kind == "feeds":
+            with engine.lock:
+                feeds = list(engine.feeds.values())
+            return [{"key": list(feed.key), "refs": feed.refs, "listeners": len(feed.listeners)} for feed in feeds]
+
+        if kind == "ticker" and len(args) == 1:
+            feed = engine.find("ticker", args[0].lower())
+            return feed and feed.snapshot()
+        if kind == "book" and len(args) == 1:
+            feed = engine.find("book", args[0].lower())
+            return feed and feed.snapshot(levels=int(query.get("levels", ORDERBOOK_LEVELS)))
+        if kind == "trades" and len(args) == 1:
+            feed = engine.find("trades", args[0].lower(), query.get("stream", TRADES_STREAM))
+            return feed and feed.snapshot(n=int(query.get("n", 100)))
+        if kind == "klines" and len(args) == 2:
+            feed = engine.find("klines", args[0].lower(), args[1])
+            return feed and feed.snapshot(n=int(query.get("n", 100)))
+        if kind == "market" and len(args) <= 1:
+            feed = engine.find("market", args[0] if args else WATCHLIST_STREAM)
+            return feed and feed.snapshot(n=int(query.get("n", 50)), sort_by=query.get("sort", "change"),
+                                          quote=query.get("quote", ""))
+        return None
@@ -0,0 +1,327 @@
+import threading
+import random
+import time
+import json
+import ssl
+import certifi
+import websocket
+from config import *
+from core.decoder import default_decoder
+from core.metrics import shared_metrics, FAST_BUCKETS
+
+class StreamHub:
+    """
+    Shared Binance combined-stream connection.
+    All components subscribe here instead of opening their own WebSocket,
+    so the whole dashboard runs on one socket and one thread. Dropped
+    connections are re-dialled with jittered exponential backoff.
+    Frames are decoded by a MessageDecoder (msgspec/orjson when installed);
+    handlers can ask for a typed event schema instead of the raw dict.
+    """
+    def __init__(self, url=BINANCE_STREAM_URL, decoder=None, metrics=None):
+        self.url = url
+        self.decoder = decoder or default_decoder()
+        self.metrics = metrics or shared_metrics()
+        self.decode_time = self.metrics.histogram("dashboard_decode_seconds", "Time to decode one stream frame", buckets=FAST_BUCKETS)
+        self.stream_metrics = {} # stream -> (message counter, handler time histogram)
+        self.ws = None
+        self.is_active = False
+        self.is_connected = False
+        self.state = "stopped" # stopped / connecting / live / reconnecting
+        self.wake = threading.Event() # Interrupts the backoff sleep on stop()
+        self.generation = 0 # Bumped by start() so a run() left over from stop() exits
+
+        self.lock = threading.Lock()
+        self.handlers = {} # stream name -> [callback, ...]
+        self.schemas = {} # (stream, callback) -> schema name, for typed handlers
+        self.url_streams = () # streams baked into the connection URL
+        self.live_streams = set() # streams the server is currently sending
+        self.connect_listeners = [] # callback(reconnected) on every (re)connect
+        self.frame_listeners = [] # callback(stream, raw frame) for every stream message
+        self.connections = 0
+        self.reconnects = 0
+        self.flush_timer = None
+        self.request_id = 0
+
+        # Activity, for the supervisor's watchdog (time.monotonic() values)
+        self.connected_at = None
+        self.last_message = None
+        self.last_seen = {} # stream -> last message
+        self.subscribed_at = {} # stream -> when a handler first asked for it
+
+    def start(self):
+        """Open the combined-stream connection in a separate thread."""
+        with self.lock:
+            if self.is_active:
+                return
+            self.is_active = True
+            self.connections = 0
+            self.state = "connecting"
+            self.generation += 1
+            generation = self.generation
+        self.wake.clear()
+        threading.Thread(target=self.run, args=(generation,), daemon=True).start()
+
+    def run(self, generation):
+        """Dial, run until the socket drops, back off, repeat while active."""
+        ssl_context = ssl.create_default_context(cafile=certifi.where())
+        failures = 0
+
+        while self.is_active and generation == self.generation:
+            with self.lock:
+                # Streams known up front go straight into the URL, the rest are
+                # sent as SUBSCRIBE requests once the socket is open.
+                streams = sorted(self.handlers)[:STREAM_URL_LIMIT]
+                self.url_streams = tuple(streams)
+                opened = self.connections
+
+            ws_url = self.url
+            if streams:
+                ws_url = f"{self.url}?streams={'/'.join(streams)}"
+
+            self.ws = websocket.WebSocketApp(
+                ws_url,
+                on_message=self.on_message,
+                on_error=self.on_error,
+                on_close=self.on_close,
+                on_open=self.on_open
+            )
+            # Pings double as a heartbeat: no pong within the timeout drops the socket
+            self.ws.run_forever(sslopt={"context": ssl_context},
+                                ping_interval=WS_PING_INTERVAL, ping_timeout=WS_PING_TIMEOUT)
+
+            with self.lock:
+                self.is_connected = False
+            if not self.is_active or generation != self.generation:
+                return
+
+            failures = 0 if self.connections > opened else failures + 1
+            delay = min(WS_RECONNECT_MAX, WS_RECONNECT_BASE * 2 ** failures) * random.uniform(0.5, 1.5)
+            self.state = "reconnecting"
+            print(f"Stream Hub reconnecting in {delay:.1f}s")
+            self.wake.wait(delay)
+
+    def reconnect(self):
+        """Drop the current socket; run() dials a fresh one."""
+        ws = self.ws
+        if ws:
+            ws.close()
+
+    def stop(self):
+        """Close the connection and cancel pending subscription changes."""
+        with self.lock:
+            self.is_active = False
+            self.is_connected = False
+            self.state = "stopped"
+            if self.flush_timer:
+                self.flush_timer.cancel()
+                self.flush_timer = None
+        self.wake.set()
+        if self.ws:
+            self.ws.close()
+            self.ws = None
+
+    def subscribe(self, stream, callback, schema=None):
+        """
+        Route messages of `stream` (e.g. "btcusdt@trade") to `callback(data)`.
+        `data` is the payload dict, or a typed event when `schema` names one of
+        core.decoder.SCHEMAS ("trade", "depth", "ticker").
+        """
+        with self.lock:
+            callbacks = self.handlers.setdefault(stream, [])
+            if callback not in callbacks:
+                callbacks.append(callback)
+            if schema:
+                self.schemas[(stream, callback)] = schema
+            self.subscribed_at.setdefault(stream, time.monotonic())
+            started = self.is_active
+
+        if started:
+            self.schedule_flush()
+        else:
+            self.start()
+
+    def unsubscribe(self, stream, callback):
+        """Stop routing `stream` to `callback`; the stream is dropped when unused."""
+        with self.lock:
+            callbacks = self.handlers.get(stream)
+            if not callbacks or callback not in callbacks:
+                return
+            callbacks.remove(callback)
+            self.schemas.pop((stream, callback), None)
+            if not callbacks:
+                del self.handlers[stream]
+                self.subscribed_at.pop(stream, None)
+                self.last_seen.pop(stream, None)
+
+        self.schedule_flush()
+
+    def add_connect_listener(self, callback):
+        """Call `callback(reconnected)` whenever the socket opens; reconnected is False the first time."""
+        with self.lock:
+            if callback not in self.connect_listeners:
+                self.connect_listeners.append(callback)
+
+    def remove_connect_listener(self, callback):
+        with self.lock:
+            if callback in self.connect_listeners:
+                self.connect_listeners.remove(callback)
+
+    def add_frame_listener(self, callback):
+        """Call `callback(stream, message)` with every raw frame, before it is dispatched."""
+        with self.lock:
+            if callback not in self.frame_listeners:
+                self.frame_listeners.append(callback)
+
+    def remove_frame_listener(self, callback):
+        with self.lock:
+            if callback in self.frame_listeners:
+                self.frame_listeners.remove(callback)
+
+    def resubscribe(self, stream):
+        """Ask the server for `stream` again (e.g. it went silent on a live socket)."""
+        with self.lock:
+            self.live_streams.discard(stream)
+            self.subscribed_at[stream] = time.monotonic()
+        self.schedule_flush()
+
+    def activity(self):
+        """Snapshot for health checks: {stream: (subscribed_at, last_seen or None)}."""
+        with self.lock:
+            return {stream: (self.subscribed_at.get(stream), self.last_seen.get(stream)) for stream in self.handlers}
+
+    def schedule_flush(self):
+        # Binance allows 5 incoming messages per second per connection, so
+        # changes made in quick succession (e.g. a symbol switch touching three
+        # panels) are batched into a single SUBSCRIBE/UNSUBSCRIBE pair.
+        with self.lock:
+            if self.flush_timer or not self.is_connected:
+                return
+            self.flush_timer = threading.Timer(0.25, self.flush_subscriptions)
+            self.flush_timer.daemon = True
+            self.flush_timer.start()
+
+    def flush_subscriptions(self):
+        """Send the difference between wanted and live streams to the server."""
+        with self.lock:
+            self.flush_timer = None
+            if not self.is_connected:
+                return
+            wanted = set(self.handlers)
+            to_add = sorted(wanted - self.live_streams)
+            to_drop = sorted(self.live_streams - wanted)
+            connection = self.connections
+
+        # live_streams only follows requests that were actually sent (on this
+        # socket), so a failed send is retried by the next flush instead of
+        # being forgotten
+        if to_drop and self.send_request("UNSUBSCRIBE", to_drop):
+            with self.lock:
+                if self.connections == connection:
+                    self.live_streams.difference_update(to_drop)
+        if to_add and self.send_request("SUBSCRIBE", to_add):
+            with self.lock:
+                if self.connections == connection:
+                    self.live_streams.update(to_add)
+
+    def send_request(self, method, streams):
+        """Send a SUBSCRIBE/UNSUBSCRIBE request; False if the socket refused it."""
+        # Flushes can run on the timer and the socket thread at once
+        with self.lock:
+            self.request_id += 1
+            request_id = self.request_id
+        payload = {"method": method, "params": streams, "id": request_id}
+        try:
+            self.ws.send(json.dumps(payload))
+        except Exception as e:
+            print(f"Stream Hub {method} Error: {e}")
+            return False
+        return True
+
+    def on_message(self, ws, message):
+        started = time.perf_counter()
+        try:
+            stream, payload = self.decoder.decode(message)
+        except Exception as e:
+            print(f"Stream Hub Error parsing message: {e}")
+            return
+        decoded = time.perf_counter()
+        self.decode_time.observe(decoded - started)
+
+        # Replies to SUBSCRIBE/UNSUBSCRIBE look like {"result": null, "id": 1}
+        if stream is None:
+            return
+
+        now = time.monotonic()
+        with self.lock:
+            self.last_message = now
+            self.last_seen[stream] = now
+            callbacks = [(callback, self.schemas.get((stream, callback))) for callback in self.handlers.get(stream, ())]
+            frame_listeners = list(self.frame_listeners)
+
+        for listener in frame_listeners:
+            try:
+                listener(stream, message)
+            except Exception as e:
+                print(f"Stream Hub Error in frame listener: {e}")
+
+        views = {} # Each form of the payload is built once per message
+        for callback, schema in callbacks:
+            try:
+                data = views.get(schema)
+                if data is None:
+                    data = views[schema] = self.decoder.view(payload, schema)
+                callback(data)
+            except Exception as e:
+                print(f"Stream Hub Error in {stream} handler: {e}")
+
+        instruments = self.stream_metrics.get(stream)
+        if instruments is None:
+            instruments = self.stream_metrics[stream] = (
+                self.metrics.counter("dashboard_stream_messages_total", "Messages received per stream", stream=stream),
+                self.metrics.histogram("dashboard_stream_handler_seconds", "Time spent in a stream's handlers",
+                                       buckets=FAST_BUCKETS, stream=stream))
+        instruments[0].inc()
+        instruments[1].observe(time.perf_counter() - decoded)
+
+    def on_error(self, ws, error):
+        print(f"Stream Hub WS Error: {error}")
+
+    def on_close(self, ws, status, msg):
+        with self.lock:
+            self.is_connected = False
+        print("Stream Hub WS Closed")
+
+    def on_open(self, ws):
+        with self.lock:
+            self.is_connected = True
+            self.state = "live"
+            self.connected_at = self.last_message = time.monotonic()
+            # A fresh socket only carries the URL streams, whatever was
+            # SUBSCRIBEd on the previous one has to be sent again.
+            self.live_streams = set(self.url_streams)
+            reconnected = self.connections > 0
+            self.connections += 1
+            if reconnected:
+                self.reconnects += 1
+            listeners = list(self.connect_listeners)
+        print("Stream Hub WS Reconnected" if reconnected else "Stream Hub WS Connected")
+
+        # Catch up on anything subscribed while the handshake was in flight
+        self.flush_subscriptions()
+
+        for callback in listeners:
+            try:
+                callback(reconnected)
+            except Exception as e:
+                print(f"Stream Hub Error in connect listener: {e}")
+
+
+_shared_hub = None
+
+def shared_hub():
+    """Return the process-wide hub used by components that are not given one."""
+    global _shared_hub
+    if _shared_hub is None:
+        _shared_hub = StreamHub()
+    return _shared_hub
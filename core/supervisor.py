@@ -0,0 +1,96 @@
+import threading
+import time
+from config import *
+
+class StreamSupervisor:
+    """
+    Watchdog for a StreamHub.
+    The hub already re-dials dropped sockets; this catches the quiet
+    failures: a socket that is open but delivers nothing (reconnect), and a
+    single stream that stopped while the others flow (re-SUBSCRIBE). It also
+    reports per-stream health for the UI.
+    """
+    def __init__(self, hub, stall_timeout=STREAM_STALL_TIMEOUT, stale_after=STREAM_STALE_AFTER, check_interval=1.0):
+        self.hub = hub
+        self.stall_timeout = stall_timeout
+        self.stale_after = stale_after
+        self.check_interval = check_interval
+        self.is_active = False
+        self.stalls = 0 # Reconnects forced by the watchdog
+        self.resubscribed = {} # stream -> when it was last re-requested
+
+    def start(self):
+        if self.is_active: return
+        self.is_active = True
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def stop(self):
+        self.is_active = False
+
+    def run(self):
+        while self.is_active:
+            time.sleep(self.check_interval)
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Supervisor Error: {e}")
+
+    def check(self):
+        hub = self.hub
+        if not hub.is_connected:
+            return
+        now = time.monotonic()
+        if hub.last_message is not None and now - hub.last_message > self.stall_timeout:
+            self.stalls += 1
+            print(f"Supervisor: no data for {now - hub.last_message:.0f}s, reconnecting")
+            hub.reconnect()
+            return
+
+        # The socket is alive, so a silent stream was most likely dropped
+        # server-side; ask for it again, at most once per threshold.
+        for stream, state in self.health(now).items():
+            if state != "stale":
+                continue
+            if now - self.resubscribed.get(stream, 0) > self.timeout(stream):
+                self.resubscribed[stream] = now
+                print(f"Supervisor: {stream} is stale, resubscribing")
+                hub.resubscribe(stream)
+
+    def timeout(self, stream):
+        """Silence allowed on `stream` before it counts as stale, by stream type."""
+        # "btcusdt@depth@100ms" -> "depth", "btcusdt@kline_1m" -> "kline", "!miniTicker@arr" -> "arr"
+        kind = stream.split("@")[1].split("_")[0]
+        return self.stale_after.get(kind, self.stall_timeout)
+
+    def health(self, now=None):
+        """{stream: "connecting" | "live" | "stale" | "down"} for every subscribed stream."""
+        hub = self.hub
+        now = now or time.monotonic()
+        connected = hub.is_connected
+        since = hub.connected_at or 0
+
+        result = {}
+        for stream, (subscribed_at, last_seen) in hub.activity().items():
+            if not connected:
+                result[stream] = "down"
+            elif last_seen is None or last_seen < since:
+                # Nothing yet on this socket: give it one threshold to start
+                waited = now - max(subscribed_at or 0, since)
+                result[stream] = "connecting" if waited < self.timeout(stream) else "stale"
+            else:
+                result[stream] = "live" if now - last_seen < self.timeout(stream) else "stale"
+        return result
+
+    def summary(self):
+        """One-line description of the feed for a status bar."""
+        health = self.health()
+        counts = {}
+        for state in health.values():
+            counts[state] = counts.get(state, 0) + 1
+        parts = [f"{counts[state]} {state}" for state in ("live", "connecting", "stale", "down") if counts.get(state)]
+        text = f"Feed: {self.hub.state}"
+        if parts:
+            text += " (" + ", ".join(parts) + ")"
+        if self.hub.reconnects:
+            text += f" | Reconnects: {self.hub.reconnects}"
+        return text
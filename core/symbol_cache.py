@@ -0,0 +1,113 @@
+import threading
+from collections import OrderedDict
+from config import *
+
+class SymbolCache:
+    """
+    Keeps the detail feeds (order book, trades, klines) of recently viewed
+    symbols running in the background, least recently used first out.
+    Holding a reference on each feed is all it takes: the engine shares the
+    same feeds with the panels, so switching to a cached symbol attaches
+    them to a synced book, a full trade tape and loaded candles instead of
+    starting cold. stop() releases every feed but keeps the symbols, and
+    start() acquires them again, so a Lifecycle can suspend the cache with
+    the window.
+    """
+    def __init__(self, engine, capacity=SYMBOL_CACHE_SIZE, interval=CHART_DEFAULT_INTERVAL, stream_type=TRADES_STREAM):
+        self.engine = engine
+        self.capacity = capacity
+        self.interval = interval
+        self.stream_type = stream_type
+        self.lock = threading.Lock()
+        self.entries = OrderedDict() # symbol -> {feed key: feed}, most recent last
+        self.is_active = True # While stopped, entries keep their place but hold no feeds
+        self.hits = 0
+        self.misses = 0
+
+    def wanted(self, symbol):
+        return [("book", symbol), ("trades", symbol, self.stream_type), ("klines", symbol, self.interval)]
+
+    def touch(self, symbol, interval=None, stream_type=None):
+        """Mark `symbol` as just viewed (with the panels' current settings) and make sure its feeds run."""
+        symbol = symbol.lower()
+        with self.lock:
+            self.interval = interval or self.interval
+            self.stream_type = stream_type or self.stream_type
+            if symbol in self.entries:
+                self.hits += 1
+            else:
+                self.misses += 1
+        self.warm(symbol, recent=True)
+
+    def prewarm(self, symbols):
+        """Warm `symbols` in the background without making them more recent than what was viewed."""
+        for symbol in symbols:
+            with self.lock:
+                if len(self.entries) >= self.capacity:
+                    return
+            self.warm(symbol.lower(), recent=False)
+
+    def warm(self, symbol, recent):
+        acquired, released = [], []
+        with self.lock:
+            entry = self.entries.get(symbol)
+            if recent:
+                entry = self.entries.pop(symbol, None) or {}
+                self.entries[symbol] = entry
+            elif entry is None:
+                entry = self.entries[symbol] = {}
+                self.entries.move_to_end(symbol, last=False)
+
+            # Settings changed since the entry was filled: swap the stale feeds
+            wanted = self.wanted(symbol)
+            for key in list(entry):
+                if key not in wanted:
+                    released.append(entry.pop(key))
+            missing = [key for key in wanted if key not in entry] if self.is_active else []
+
+            while len(self.entries) > self.capacity:
+                _, evicted = self.entries.popitem(last=False)
+                released.extend(evicted.values())
+
+        for key in missing:
+            acquired.append((key, self.engine.acquire(*key)))
+        with self.lock:
+            entry = self.entries.get(symbol)
+            for key, feed in acquired:
+                if entry is not None and key not in entry and self.is_active:
+                    entry[key] = feed
+                else:
+                    released.append(feed) # Evicted, filled or stopped meanwhile
+        for feed in released:
+            self.engine.release(feed)
+
+    def symbols(self):
+        """Cached symbols, most recently viewed first."""
+        with self.lock:
+            return list(reversed(self.entries))
+
+    def start(self):
+        """Acquire the feeds of every cached symbol again."""
+        with self.lock:
+            if self.is_active: return
+            self.is_active = True
+            symbols = list(self.entries)
+        for symbol in symbols:
+            self.warm(symbol, recent=False)
+
+    def stop(self):
+        """Release every feed (the engine lets them linger) but remember the symbols and their order."""
+        with self.lock:
+            self.is_active = False
+            released = [feed for entry in self.entries.values() for feed in entry.values()]
+            for entry in self.entries.values():
+                entry.clear()
+        for feed in released:
+            self.engine.release(feed)
+
+    def clear(self):
+        with self.lock:
+            entries, self.entries = list(self.entries.values()), OrderedDict()
+        for entry in entries:
+            for feed in entry.values():
+                self.engine.release(feed)
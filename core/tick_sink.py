@@ -0,0 +1,291 @@
+import os
+import time
+import queue
+import threading
+import numpy as np
+from config import *
+from core.metrics import shared_metrics
+
+# Optional: columnar files need pyarrow
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# Table -> columns in the order rows are appended. "symbol" holds a code into
+# the sink's symbol list until the batch is written.
+TABLES = {
+    "trades": [("received", "int64"), ("symbol", "int32"), ("time", "int64"), ("price", "float64"),
+               ("qty", "float64"), ("is_buyer_maker", "bool"), ("aggregated", "bool")],
+    "book": [("received", "int64"), ("symbol", "int32"), ("update_id", "int64"), ("bid", "float64"),
+             ("bid_qty", "float64"), ("ask", "float64"), ("ask_qty", "float64")],
+    "ticker": [("received", "int64"), ("symbol", "int32"), ("price", "float64"), ("change", "float64"),
+               ("change_pct", "float64"), ("quote_volume", "float64")],
+}
+DAY_US = 86_400_000_000
+
+class ColumnBuffer:
+    """One batch of a table: preallocated column arrays filled in place."""
+    def __init__(self, columns, capacity):
+        self.names = [name for name, _ in columns]
+        self.arrays = [np.empty(capacity, dtype) for _, dtype in columns]
+        self.capacity = capacity
+        self.size = 0
+        self.opened = time.monotonic()
+
+    def append(self, row):
+        """Store one row; True once the buffer is full."""
+        i = self.size
+        for array, value in zip(self.arrays, row):
+            array[i] = value
+        self.size = i + 1
+        return self.size == self.capacity
+
+    def clear(self):
+        self.size = 0
+        self.opened = time.monotonic()
+
+class TickSink:
+    """
+    Columnar recording of the ticker, book top and trade events the feeds
+    publish, for offline analysis (unlike StreamRecorder, which keeps the raw
+    frames for replay). Rows go into preallocated column buffers on the feed
+    threads; a full (or `flush_seconds` old) buffer is handed to one writer
+    thread that appends it to zstd-compressed Parquet or Arrow IPC files at
+    `<path>/<table>/date=YYYY-MM-DD/`, so the UI thread never touches a file.
+    Each table has `max_pending` spare buffers: when the writer falls that far
+    behind, rows are dropped (and counted) instead of growing without bound.
+    """
+    def __init__(self, path=TICK_RECORD_DIR, format=TICK_RECORD_FORMAT, batch_rows=TICK_BATCH_ROWS,
+                 flush_seconds=TICK_FLUSH_SECONDS, file_seconds=TICK_FILE_SECONDS,
+                 max_pending=TICK_MAX_PENDING, compression=TICK_COMPRESSION, metrics=None):
+        if pa is None:
+            raise RuntimeError("Tick recording needs pyarrow (pip install pyarrow)")
+        if format not in ("parquet", "arrow"):
+            raise ValueError(f"Unknown tick recording format: {format}")
+        self.path = path
+        self.format = format
+        self.flush_seconds = flush_seconds
+        self.file_seconds = file_seconds
+        self.compression = compression
+        os.makedirs(path, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.buffers = {table: ColumnBuffer(columns, batch_rows) for table, columns in TABLES.items()}
+        self.spare = {table: [ColumnBuffer(columns, batch_rows) for _ in range(max_pending)]
+                      for table, columns in TABLES.items()}
+        self.queue = queue.Queue() # (table, buffer) batches for the writer; None stops it
+        self.symbols = [] # code -> symbol
+        self.codes = {} # symbol -> code
+        self.writers = {} # table -> (day, writer, opened)
+        self.files = 0
+
+        self.engine = None
+        self.callbacks = {} # feed -> its listener
+        self.is_active = False
+        self.thread = None
+
+        self.metrics = metrics or shared_metrics()
+        self.rows = {table: self.metrics.counter("dashboard_tick_rows_total", "Rows written by the tick recorder", table=table)
+                     for table in TABLES}
+        self.dropped = {table: self.metrics.counter("dashboard_tick_dropped_rows_total", "Rows dropped while the tick writer was behind", table=table)
+                        for table in TABLES}
+        self.write_time = self.metrics.histogram("dashboard_tick_write_seconds", "Time to write one tick batch")
+
+    def start(self):
+        if self.is_active: return
+        self.is_active = True
+        self.thread = threading.Thread(target=self.run, name="tick-writer", daemon=True)
+        self.thread.start()
+
+    def attach(self, engine):
+        """Record every ticker, book and trade feed of `engine`, including the ones already running."""
+        self.engine = engine
+        engine.add_feed_listener(self.on_feed)
+        with engine.lock:
+            feeds = list(engine.feeds.values())
+        for feed in feeds:
+            if feed.is_active:
+                self.on_feed(feed, True)
+
+    def detach(self):
+        if self.engine is None: return
+        self.engine.remove_feed_listener(self.on_feed)
+        for feed, callback in list(self.callbacks.items()):
+            feed.remove_listener(callback)
+        self.callbacks.clear()
+        self.engine = None
+
+    def on_feed(self, feed, started):
+        table = feed.kind # Ticker, book and trade feeds each have a table of their own
+        if table not in TABLES: return
+        if started:
+            if feed not in self.callbacks:
+                self.callbacks[feed] = self.listener(table, feed)
+                feed.add_listener(self.callbacks[feed])
+        else:
+            callback = self.callbacks.pop(feed, None)
+            if callback:
+                feed.remove_listener(callback)
+
+    def listener(self, table, feed):
+        """A feed listener that appends the event as a row of `table` (runs on the feed's thread)."""
+        code = self.symbol_code(feed.symbol)
+        append = self.append
+        if table == "ticker":
+            def on_ticker(price, change, change_pct, quote_volume):
+                append("ticker", (time.time_ns() // 1000, code, price, change, change_pct, quote_volume))
+            return on_ticker
+        if table == "book":
+            book = feed.book
+            def on_book():
+                bids, asks = book.top(1)
+                if bids and asks:
+                    append("book", (time.time_ns() // 1000, code, book.last_update_id,
+                                    bids[0][0], bids[0][1], asks[0][0], asks[0][1]))
+            return on_book
+        aggregated = feed.stream_type == "aggTrade"
+        def on_trade(trade):
+            append("trades", (time.time_ns() // 1000, code, *trade, aggregated))
+        return on_trade
+
+    def symbol_code(self, symbol):
+        with self.lock:
+            code = self.codes.get(symbol)
+            if code is None:
+                code = self.codes[symbol] = len(self.symbols)
+                self.symbols.append(symbol)
+            return code
+
+    def append(self, table, row):
+        with self.lock:
+            buffer = self.buffers[table]
+            if buffer.append(row):
+                self.hand_off(table)
+
+    def hand_off(self, table):
+        # Caller holds the lock. Swap in a spare buffer, or drop the batch if none is left.
+        buffer = self.buffers[table]
+        spare = self.spare[table]
+        if not spare:
+            self.dropped[table].inc(buffer.size)
+            buffer.clear()
+            return
+        self.buffers[table] = spare.pop()
+        self.buffers[table].clear()
+        self.queue.put((table, buffer))
+
+    def flush(self, older_than=0):
+        """Hand every buffer with rows (opened at least `older_than` seconds ago) to the writer."""
+        now = time.monotonic()
+        with self.lock:
+            for table, buffer in self.buffers.items():
+                if buffer.size and now - buffer.opened >= older_than:
+                    self.hand_off(table)
+
+    # --- Writer thread ---
+
+    def run(self):
+        while True:
+            try:
+                item = self.queue.get(timeout=self.flush_seconds / 2)
+            except queue.Empty:
+                self.flush(self.flush_seconds)
+                self.rotate()
+                continue
+            if item is None:
+                break
+            table, buffer = item
+            try:
+                started = time.perf_counter()
+                self.write(table, buffer)
+                self.write_time.observe(time.perf_counter() - started)
+            except Exception as e:
+                self.dropped[table].inc(buffer.size)
+                print(f"Tick Writer Error ({table}): {e}")
+            with self.lock:
+                buffer.clear()
+                self.spare[table].append(buffer)
+        for table in list(self.writers):
+            self.close_writer(table)
+
+    def write(self, table, buffer):
+        n = buffer.size
+        columns = dict(zip(buffer.names, (array[:n] for array in buffer.arrays)))
+        with self.lock:
+            symbols = pa.array(self.symbols, pa.string())
+        days = columns["received"] // DAY_US
+        # A batch only spans two days around midnight: split it per date partition
+        for day in np.unique(days):
+            rows = days == day
+            part = columns if rows.all() else {name: values[rows] for name, values in columns.items()}
+            self.writer(table, int(day)).write_table(self.to_table(table, part, symbols))
+            self.rows[table].inc(int(rows.sum()))
+
+    def to_table(self, table, columns, symbols):
+        schema = self.schema(table)
+        arrays = []
+        for field, values in zip(schema, columns.values()):
+            if field.name == "symbol":
+                codes = pa.array(values, pa.int32())
+                if pa.types.is_dictionary(field.type):
+                    # Codes index the symbol list as is: a dictionary column without a lookup per row
+                    arrays.append(pa.DictionaryArray.from_arrays(codes, symbols))
+                else:
+                    arrays.append(symbols.take(codes))
+            else:
+                arrays.append(pa.array(values, field.type))
+        return pa.Table.from_arrays(arrays, schema=schema)
+
+    def writer(self, table, day):
+        """The open file of `table` for `day`, opening a new one on a new day or after `file_seconds`."""
+        current = self.writers.get(table)
+        if current and current[0] == day and time.monotonic() - current[2] < self.file_seconds:
+            return current[1]
+        if current:
+            self.close_writer(table)
+        date = time.strftime("%Y-%m-%d", time.gmtime(day * 86400))
+        folder = os.path.join(self.path, table, f"date={date}")
+        os.makedirs(folder, exist_ok=True)
+        self.files += 1
+        name = f"{table}-{time.strftime('%H%M%S', time.gmtime())}-{os.getpid()}-{self.files:04d}.{self.format}"
+        schema = self.schema(table)
+        if self.format == "parquet":
+            writer = pq.ParquetWriter(os.path.join(folder, name), schema, compression=self.compression)
+        else:
+            options = pa.ipc.IpcWriteOptions(compression=self.compression)
+            writer = pa.ipc.new_file(os.path.join(folder, name), schema, options=options)
+        self.writers[table] = (day, writer, time.monotonic())
+        return writer
+
+    def schema(self, table):
+        # Each Parquet row group carries its own dictionary, but an Arrow IPC
+        # file allows one per field, and the symbol list grows as feeds start
+        symbol = pa.dictionary(pa.int32(), pa.string()) if self.format == "parquet" else pa.string()
+        types = {"received": pa.timestamp("us", tz="UTC"), "time": pa.timestamp("ms", tz="UTC"), "symbol": symbol}
+        return pa.schema([(name, types.get(name) or pa.from_numpy_dtype(np.dtype(dtype))) for name, dtype in TABLES[table]])
+
+    def rotate(self):
+        # Close files that are old enough while the tables are quiet, so they become readable
+        for table, (day, writer, opened) in list(self.writers.items()):
+            if time.monotonic() - opened >= self.file_seconds:
+                self.close_writer(table)
+
+    def close_writer(self, table):
+        day, writer, opened = self.writers.pop(table)
+        try:
+            writer.close()
+        except Exception as e:
+            print(f"Tick Writer Error ({table}): {e}")
+
+    def close(self):
+        """Stop recording, write what is buffered and close the files."""
+        self.detach()
+        if not self.is_active: return
+        self.is_active = False
+        self.flush()
+        self.queue.put(None)
+        if self.thread:
+            self.thread.join(timeout=10)
+            self.thread = None
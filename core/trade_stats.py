@@ -0,0 +1,104 @@
+import threading
+from collections import deque
+from config import *
+
+class RollingWindow:
+    """
+    Running sums over the trades of the last `seconds`.
+    Trades arrive in time order, so expiry is a popleft from a deque and every
+    update is O(1) amortized.
+    """
+    def __init__(self, seconds, large_notional):
+        self.span = seconds * 1000
+        self.seconds = seconds
+        self.large_notional = large_notional
+        self.trades = deque() # (time ms, notional, qty, is_sell)
+        self.large = deque() # (time ms, price, qty, is_sell)
+        self.notional = 0.0
+        self.volume = 0.0
+        self.sell_volume = 0.0
+
+    def add(self, timestamp, price, qty, is_sell):
+        notional = price * qty
+        self.trades.append((timestamp, notional, qty, is_sell))
+        self.notional += notional
+        self.volume += qty
+        if is_sell:
+            self.sell_volume += qty
+        if notional >= self.large_notional:
+            self.large.append((timestamp, price, qty, is_sell))
+        self.expire(timestamp)
+
+    def expire(self, now):
+        cutoff = now - self.span
+        trades = self.trades
+        while trades and trades[0][0] <= cutoff:
+            _, notional, qty, is_sell = trades.popleft()
+            self.notional -= notional
+            self.volume -= qty
+            if is_sell:
+                self.sell_volume -= qty
+        if not trades:
+            # Avoid carrying float drift forward
+            self.notional = self.volume = self.sell_volume = 0.0
+        while self.large and self.large[0][0] <= cutoff:
+            self.large.popleft()
+
+    def snapshot(self):
+        buy_volume = self.volume - self.sell_volume
+        return {
+            "trades": len(self.trades),
+            "tps": len(self.trades) / self.seconds,
+            "volume": self.volume,
+            "buy_volume": buy_volume,
+            "sell_volume": self.sell_volume,
+            "vwap": self.notional / self.volume if self.volume > 0 else None,
+            # +1 = all buying, -1 = all selling
+            "imbalance": (buy_volume - self.sell_volume) / self.volume if self.volume > 0 else 0.0,
+            "large": len(self.large),
+            "large_trades": list(self.large),
+        }
+
+class TradeStats:
+    """
+    Streaming statistics over a trade (or aggTrade) stream: rolling VWAP,
+    buy/sell volume imbalance, trades per second and large trades for each
+    window in TRADE_STATS_WINDOWS. Safe to feed from the socket thread and
+    read from anywhere.
+    """
+    def __init__(self, windows=TRADE_STATS_WINDOWS, large_notional=LARGE_TRADE_NOTIONAL):
+        self.lock = threading.Lock()
+        self.windows = {seconds: RollingWindow(seconds, large_notional) for seconds in windows}
+        self.last_time = 0
+        self.listeners = []
+
+    def add_listener(self, callback):
+        """Call `callback(timestamp, price, qty, is_sell)` for every trade fed in."""
+        self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+    def add(self, timestamp, price, qty, is_sell):
+        with self.lock:
+            self.last_time = max(self.last_time, timestamp)
+            for window in self.windows.values():
+                window.add(timestamp, price, qty, is_sell)
+        for callback in self.listeners:
+            callback(timestamp, price, qty, is_sell)
+
+    def clear(self):
+        with self.lock:
+            self.windows = {s: RollingWindow(s, w.large_notional) for s, w in self.windows.items()}
+            self.last_time = 0
+
+    def snapshot(self, now=None):
+        """{window seconds: stats dict}. `now` (ms) expires trades even when the market is quiet."""
+        with self.lock:
+            now = max(now or 0, self.last_time)
+            result = {}
+            for seconds, window in self.windows.items():
+                window.expire(now)
+                result[seconds] = window.snapshot()
+            return result
@@ -0,0 +1,116 @@
+"""
+Run the market data engine without a UI.
+
+    python headless.py --symbols btcusdt,ethusdt --interval 1m --watchlist
+
+Feeds for the given symbols stay subscribed, a metrics summary is printed
+every --log-interval seconds, and the current state is served as JSON at
+http://127.0.0.1:<port>/snapshot (see core.snapshot_server for the routes).
+"""
+import time
+import argparse
+from config import *
+from core.engine import MarketEngine
+from core.ingest import IngestEngine
+from core.supervisor import StreamSupervisor
+from core.snapshot_server import SnapshotServer
+from core.tick_sink import TickSink
+from core.metrics import shared_metrics, MetricsExporter
+
+def summary(engine, metrics, previous, seconds):
+    """One console line per interval: message rate, decode time and the watched prices."""
+    metrics.collect()
+    messages = sum(counter.value for counter in metrics.family("dashboard_stream_messages_total").values())
+    rate = (messages - previous.get("messages", messages)) / seconds
+    previous["messages"] = messages
+
+    decode = None
+    for histogram in metrics.family("dashboard_decode_seconds").values():
+        since = previous.get("decode")
+        previous["decode"] = histogram.snapshot()
+        p99 = histogram.quantile(0.99, since)
+        decode = f"{p99 * 1e6:.1f} µs" if p99 is not None else "--"
+
+    prices = []
+    with engine.lock:
+        feeds = list(engine.feeds.values())
+    for feed in feeds:
+        if feed.kind == "ticker" and feed.last:
+            prices.append(f"{feed.symbol.upper()} {feed.last[0]:,.2f}")
+        elif feed.kind == "book":
+            spread = feed.book.spread()
+            prices.append(f"{feed.symbol.upper()} spread {spread:.2f}" if spread is not None else f"{feed.symbol.upper()} syncing")
+    return " | ".join([f"{rate:,.0f} msg/s", f"decode p99 {decode or '--'}"] + prices)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the market data engine without the Tk dashboard")
+    parser.add_argument("--symbols", default="btcusdt", help="comma-separated symbols (default: btcusdt)")
+    parser.add_argument("--interval", default=CHART_DEFAULT_INTERVAL, help="kline interval to keep (\"\" = none)")
+    parser.add_argument("--indicators", default="", help="comma-separated indicators kept on the klines, e.g. sma:20,rsi:14")
+    parser.add_argument("--trades", default=TRADES_STREAM, choices=["trade", "aggTrade", "none"], help="trade stream to keep")
+    parser.add_argument("--no-book", action="store_true", help="do not keep local order books")
+    parser.add_argument("--watchlist", action="store_true", help="also keep the all-market ticker table")
+    parser.add_argument("--processes", action="store_true", default=INGEST_PROCESSES,
+                        help="decode ticker, book and trade streams in worker processes")
+    parser.add_argument("--host", default=SNAPSHOT_HOST)
+    parser.add_argument("--port", type=int, default=SNAPSHOT_PORT, help="snapshot port (0 = off)")
+    parser.add_argument("--record-ticks", default=TICK_RECORD_DIR, metavar="DIR",
+                        help="record ticker, book top and trade rows as Parquet (or Arrow) files under DIR (needs pyarrow)")
+    parser.add_argument("--log-interval", type=float, default=HEADLESS_LOG_INTERVAL, help="seconds between summaries")
+    args = parser.parse_args()
+
+    metrics = shared_metrics()
+    engine = (IngestEngine if args.processes else MarketEngine)(metrics=metrics)
+    supervisor = StreamSupervisor(engine.hub)
+    supervisor.start()
+    exporter = MetricsExporter(metrics, path=METRICS_EXPORT_FILE, port=METRICS_PORT)
+    exporter.start()
+
+    sink = None
+    if args.record_ticks:
+        try:
+            sink = TickSink(args.record_ticks, metrics=metrics)
+        except (RuntimeError, ValueError) as e:
+            print(f"Tick recording off: {e}")
+        else:
+            sink.start()
+            sink.attach(engine)
+            print(f"Recording ticks to {args.record_ticks}")
+
+    for symbol in filter(None, (s.strip().lower() for s in args.symbols.split(","))):
+        engine.ticker(symbol)
+        if not args.no_book:
+            engine.book(symbol)
+        if args.trades != "none":
+            engine.trades(symbol, args.trades)
+        if args.interval:
+            feed = engine.klines(symbol, args.interval)
+            for spec in filter(None, (s.strip() for s in args.indicators.split(","))):
+                feed.indicators.add(spec)
+    if args.watchlist:
+        engine.market()
+
+    server = None
+    if args.port:
+        server = SnapshotServer(engine, port=args.port, host=args.host, metrics=metrics)
+        server.start()
+        print(f"Serving snapshots at {server.url}/snapshot")
+
+    previous = {}
+    try:
+        while True:
+            time.sleep(args.log_interval)
+            print(f"{supervisor.summary()} | {summary(engine, metrics, previous, args.log_interval)}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if server:
+            server.stop()
+        exporter.stop()
+        supervisor.stop()
+        engine.stop()
+        if sink:
+            sink.close()
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,21 @@ from tkinter import ttk
 from components.ticker import CryptoTicker
 from components.orderbook import OrderBookPanel
 from components.chart import ChartPanel
+from components.chart_grid import ChartGrid
+from components.depth import DepthPanel
 from components.trades import TradesPanel
+from components.watchlist import WatchlistPanel
+from components.render_loop import RenderLoop
+from components.lifecycle import Lifecycle
+from components.perf_overlay import PerfOverlay
+from components.widget_cache import shared_widget_cache
+from core.engine import MarketEngine
+from core.ingest import IngestEngine
+from core.supervisor import StreamSupervisor
+from core.symbol_cache import SymbolCache
+from core.tick_sink import TickSink
+from core.metrics import shared_metrics, MetricsExporter
+from config import METRICS_EXPORT_FILE, METRICS_PORT, INGEST_PROCESSES, TICK_RECORD_DIR
 
 import json
 import os
@@ -19,6 +33,45 @@ class MultiTickerApp:
         self.prefs_file = "prefs.json"
         self.preferences = self.load_preferences()
 
+        # Market state lives in the engine (one combined-stream socket, shared
+        # feeds); the components are views over its feeds. With
+        # DASHBOARD_INGEST_PROCESSES=1 ticker, book and trade feeds are decoded
+        # in worker processes and handed over through shared memory.
+        self.metrics = shared_metrics()
+        engine_class = IngestEngine if INGEST_PROCESSES else MarketEngine
+        self.engine = engine_class(metrics=self.metrics)
+        # Book, trades and klines of recently viewed (and the top ticker) symbols
+        # keep running in the background so switching to them is instant
+        self.symbol_cache = SymbolCache(self.engine)
+        # Forces a reconnect when the socket goes silent, re-requests stale streams
+        self.supervisor = StreamSupervisor(self.engine.hub)
+        self.supervisor.start()
+
+        # Coalesces component updates into one flush per frame
+        self.render_loop = RenderLoop(root, metrics=self.metrics)
+        self.render_loop.start()
+
+        # Components only stream and draw while shown, not minimized and not covered
+        self.lifecycle = Lifecycle(root)
+        # The symbol cache's background feeds pause with the window as well
+        self.lifecycle.add(self.symbol_cache)
+
+        # Prometheus export (file and/or /metrics port), if configured
+        self.exporter = MetricsExporter(self.metrics, path=METRICS_EXPORT_FILE, port=METRICS_PORT)
+        self.exporter.start()
+
+        # With DASHBOARD_TICK_DIR set, the rows the ticker, book and trade feeds
+        # publish are also written to Parquet files on a background thread
+        self.tick_sink = None
+        if TICK_RECORD_DIR:
+            try:
+                self.tick_sink = TickSink(TICK_RECORD_DIR, metrics=self.metrics)
+            except (RuntimeError, ValueError) as e:
+                print(f"Tick recording off: {e}")
+            else:
+                self.tick_sink.start()
+                self.tick_sink.attach(self.engine)
+
         # Control Panel
         control_frame = ttk.Frame(root, padding=10)
         control_frame.pack(fill=tk.X)
@@ -30,10 +83,30 @@ class MultiTickerApp:
             btn.pack(side=tk.LEFT, padx=5)
             self.ticker_btns[key] = btn
 
+        self.watchlist_btn = ttk.Button(control_frame, text="Show Watchlist", command=self.toggle_watchlist)
+        self.watchlist_btn.pack(side=tk.LEFT, padx=(20, 5))
+
+        self.depth_btn = ttk.Button(control_frame, text="Show Depth", command=self.toggle_depth)
+        self.depth_btn.pack(side=tk.LEFT, padx=5)
+
+        self.grid_btn = ttk.Button(control_frame, text="Show Grid", command=self.toggle_grid)
+        self.grid_btn.pack(side=tk.LEFT, padx=5)
+
+        self.perf_btn = ttk.Button(control_frame, text="Show Perf", command=self.toggle_perf)
+        self.perf_btn.pack(side=tk.LEFT, padx=5)
+
         # Details Label
         self.detail_var = tk.StringVar(value="Select a ticker to view details (Default: BTC)")
         ttk.Label(control_frame, textvariable=self.detail_var, font=("Arial", 12, "italic")).pack(side=tk.RIGHT, padx=20)
 
+        # Feed health (per-stream live/stale counts, reconnects)
+        self.health_var = tk.StringVar(value="")
+        ttk.Label(control_frame, textvariable=self.health_var, foreground="gray").pack(side=tk.RIGHT, padx=10)
+
+        # Render stats (how many updates the frame limiter merged away)
+        self.render_var = tk.StringVar(value="")
+        ttk.Label(control_frame, textvariable=self.render_var, foreground="gray").pack(side=tk.RIGHT, padx=10)
+
         # Ticker Panel
         self.ticker_frame = ttk.Frame(root, padding=20)
         self.ticker_frame.pack(fill=tk.X)
@@ -51,32 +124,66 @@ class MultiTickerApp:
         self.detail_frame.pack(fill=tk.BOTH, expand=True)
 
         # Sub-panels
+        # Watchlist (Far right, hidden by default)
+        self.watchlist_panel = WatchlistPanel(self.detail_frame, engine=self.engine, render_loop=self.render_loop,
+                                              on_click=self.on_ticker_click)
+        self.lifecycle.add(self.watchlist_panel, wanted=False)
+        self.watchlist_visible = False
+
         # Order Book (Left)
-        self.ob_panel = OrderBookPanel(self.detail_frame, "btcusdt")
+        self.ob_panel = OrderBookPanel(self.detail_frame, "btcusdt", engine=self.engine, render_loop=self.render_loop)
         self.ob_panel.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5)
-        self.ob_panel.start()
+        self.lifecycle.add(self.ob_panel)
+
+        # Depth heatmap + cumulative depth (next to the book, hidden by default)
+        self.depth_panel = DepthPanel(self.detail_frame, "btcusdt", engine=self.engine, render_loop=self.render_loop,
+                                      metrics=self.metrics)
+        self.lifecycle.add(self.depth_panel, wanted=False)
+        self.depth_visible = False
 
         # Chart (Center)
-        self.chart_panel = ChartPanel(self.detail_frame, "btcusdt")
+        self.chart_panel = ChartPanel(self.detail_frame, "btcusdt", engine=self.engine, render_loop=self.render_loop)
         self.chart_panel.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5)
-        self.chart_panel.start()
+        self.lifecycle.add(self.chart_panel)
 
         # Trades (Right)
-        self.trades_panel = TradesPanel(self.detail_frame, "btcusdt")
+        self.trades_panel = TradesPanel(self.detail_frame, "btcusdt", engine=self.engine, render_loop=self.render_loop)
         self.trades_panel.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5)
-        self.trades_panel.start()
+        self.lifecycle.add(self.trades_panel)
+
+        # Chart grid: mini charts rasterized off the Tk thread, shown instead of the panels above
+        self.grid_panel = ChartGrid(self.detail_frame, engine=self.engine, render_loop=self.render_loop,
+                                    metrics=self.metrics, on_click=self.on_grid_click)
+        self.lifecycle.add(self.grid_panel, wanted=False)
+        self.grid_visible = False
+
+        # Performance overlay: a floating window above the dashboard, hidden by default
+        self.perf_window = tk.Toplevel(root)
+        self.perf_window.title("Performance")
+        self.perf_window.attributes("-topmost", True)
+        self.perf_window.protocol("WM_DELETE_WINDOW", self.toggle_perf)
+        self.perf_window.withdraw()
+        self.perf_overlay = PerfOverlay(self.perf_window, metrics=self.metrics)
+        self.perf_overlay.pack(fill=tk.BOTH, expand=True)
+        self.perf_visible = False
 
         self.active_symbol = "btcusdt"
+        self.symbol_cache.touch(self.active_symbol)
+        self.symbol_cache.prewarm(self.tickers[key]["component"].symbol for key in PANEL_ORDER if key in self.tickers)
 
         # Apply preferences
         self.apply_preferences()
 
+        self.update_render_stats()
+
     def create_ticker(self, key, symbol, name):
         """Helper to create and start a ticker."""
         # Pass click handler
-        ticker = CryptoTicker(self.ticker_frame, symbol, name, on_click=self.on_ticker_click)
-        ticker.start()
-        self.tickers[key] = {"component": ticker, "visible": True}
+        ticker = CryptoTicker(self.ticker_frame, symbol, name, on_click=self.on_ticker_click,
+                              engine=self.engine, render_loop=self.render_loop)
+        visible = self.preferences.get(key, True)
+        self.lifecycle.add(ticker, wanted=visible)
+        self.tickers[key] = {"component": ticker, "visible": visible}
 
     def on_ticker_click(self, symbol):
         """Handle ticker click event."""
@@ -95,11 +202,90 @@ class MultiTickerApp:
             else:
                 t.set_selected(False)
 
-        # Update panels
+        # Update panels (from warm feeds when the symbol is cached)
+        self.symbol_cache.touch(symbol, interval=self.chart_panel.interval, stream_type=self.trades_panel.stream_type)
         self.ob_panel.change_symbol(symbol)
+        self.depth_panel.change_symbol(symbol)
         self.chart_panel.change_symbol(symbol)
         self.trades_panel.change_symbol(symbol)
 
+    def update_render_stats(self):
+        """Show how many updates were merged or batched by the render loop."""
+        stats = self.render_loop.stats()
+        running, total = self.lifecycle.stats()
+        widgets = shared_widget_cache().stats()
+        self.render_var.set(f"UI {stats['fps']:g} fps | merged {stats['merged']:,} | batched {stats['batched']:,} | "
+                            f"unchanged labels {widgets['skipped']:,} | live panels {running}/{total}")
+        self.health_var.set(self.supervisor.summary())
+        self.root.after(1000, self.update_render_stats)
+
+    def toggle_watchlist(self):
+        """Show/hide the market-wide watchlist; its stream only runs while shown."""
+        self.set_watchlist_visible(not self.watchlist_visible)
+        self.save_preferences()
+
+    def set_watchlist_visible(self, visible):
+        self.watchlist_visible = visible
+        if visible:
+            first = self.grid_panel if self.grid_visible else self.ob_panel
+            self.watchlist_panel.pack(side=tk.RIGHT, fill=tk.Y, padx=5, before=first.frame)
+        else:
+            self.watchlist_panel.pack_forget()
+        self.lifecycle.set_wanted(self.watchlist_panel, visible)
+        self.watchlist_btn.config(text=f"{'Hide' if visible else 'Show'} Watchlist")
+
+    def toggle_grid(self):
+        """Swap the detail panels for the multi-symbol chart grid and back."""
+        self.set_grid_visible(not self.grid_visible)
+        self.save_preferences()
+
+    def set_grid_visible(self, visible):
+        self.grid_visible = visible
+        self.repack_details()
+        self.grid_btn.config(text=f"{'Hide' if visible else 'Show'} Grid")
+
+    def toggle_depth(self):
+        """Show/hide the depth heatmap next to the order book."""
+        self.set_depth_visible(not self.depth_visible)
+        self.save_preferences()
+
+    def set_depth_visible(self, visible):
+        self.depth_visible = visible
+        self.repack_details()
+        self.depth_btn.config(text=f"{'Hide' if visible else 'Show'} Depth")
+
+    def repack_details(self):
+        """Pack the detail panels (or the chart grid instead) in order; the others stop streaming."""
+        details = [self.ob_panel, self.depth_panel, self.chart_panel, self.trades_panel]
+        shown = [self.grid_panel] if self.grid_visible else [p for p in details if p is not self.depth_panel or self.depth_visible]
+        for panel in details + [self.grid_panel]:
+            panel.pack_forget()
+        for panel in shown:
+            panel.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5)
+        for panel in details + [self.grid_panel]:
+            self.lifecycle.set_wanted(panel, panel in shown)
+
+    def on_grid_click(self, symbol):
+        """A grid cell opens that symbol in the detail panels."""
+        self.set_grid_visible(False)
+        self.save_preferences()
+        self.on_ticker_click(symbol)
+
+    def toggle_perf(self):
+        """Show/hide the performance overlay; it only refreshes while shown."""
+        self.set_perf_visible(not self.perf_visible)
+        self.save_preferences()
+
+    def set_perf_visible(self, visible):
+        self.perf_visible = visible
+        if visible:
+            self.perf_window.deiconify()
+            self.perf_overlay.start()
+        else:
+            self.perf_overlay.stop()
+            self.perf_window.withdraw()
+        self.perf_btn.config(text=f"{'Hide' if visible else 'Show'} Perf")
+
     def toggle_ticker(self, key):
         """Toggle ticker visibility."""
         data = self.tickers[key]
@@ -120,10 +306,13 @@ class MultiTickerApp:
             if key in self.tickers:
                 self.tickers[key]["component"].pack_forget()
 
-        # Repack visible ones in order
+        # Repack visible ones in order; hidden ones stop streaming
         for key in PANEL_ORDER:
-            if key in self.tickers and self.tickers[key]["visible"]:
-                self.tickers[key]["component"].pack(side=tk.LEFT, padx=10, fill=tk.BOTH, expand=True)
+            if key in self.tickers:
+                visible = self.tickers[key]["visible"]
+                if visible:
+                    self.tickers[key]["component"].pack(side=tk.LEFT, padx=10, fill=tk.BOTH, expand=True)
+                self.lifecycle.set_wanted(self.tickers[key]["component"], visible)
 
     def update_button_text(self, key):
         btn = self.ticker_btns[key]
@@ -142,6 +331,10 @@ class MultiTickerApp:
 
     def save_preferences(self):
         prefs = {k: self.tickers[k]["visible"] for k in self.tickers}
+        prefs["watchlist"] = self.watchlist_visible
+        prefs["perf"] = self.perf_visible
+        prefs["grid"] = self.grid_visible
+        prefs["depth"] = self.depth_visible
         with open(self.prefs_file, "w") as f:
             json.dump(prefs, f)
 
@@ -155,6 +348,10 @@ class MultiTickerApp:
                 self.update_button_text(key)
 
         self.repack_all()
+        self.set_watchlist_visible(self.preferences.get("watchlist", False))
+        self.set_perf_visible(self.preferences.get("perf", False))
+        self.set_depth_visible(self.preferences.get("depth", False))
+        self.set_grid_visible(self.preferences.get("grid", False))
 
     def on_closing(self):
         """Clean up resources when closing the app."""
@@ -166,8 +363,19 @@ class MultiTickerApp:
 
         # Stop detail panels
         self.ob_panel.stop()
+        self.depth_panel.stop()
         self.chart_panel.stop()
         self.trades_panel.stop()
+        self.grid_panel.stop()
+        self.watchlist_panel.stop()
+        self.symbol_cache.clear()
+        self.perf_overlay.stop()
+        self.exporter.stop()
+        self.supervisor.stop()
+        self.engine.stop()
+        if self.tick_sink:
+            self.tick_sink.close()
+        self.render_loop.stop()
 
         self.root.destroy()
 
@@ -0,0 +1,47 @@
+import time
+from types import SimpleNamespace
+import core.local_book as local_book
+from core.local_book import LocalOrderBook
+
+class FlakyRest:
+    """Fails the first `failures` depth requests, then serves one snapshot."""
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    def depth(self, symbol, limit):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("snapshot unavailable")
+        return {"lastUpdateId": 10, "bids": [["100.0", "1.0"]], "asks": [["101.0", "2.0"]]}
+
+def diff(first, last, bids=(), asks=()):
+    return SimpleNamespace(first_id=first, last_id=last, bids=list(bids), asks=list(asks))
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+def test_failed_snapshot_is_retried(monkeypatch):
+    monkeypatch.setattr(local_book, "DEPTH_SNAPSHOT_RETRY_BASE", 0.01)
+    rest = FlakyRest(failures=2)
+    book = LocalOrderBook("btcusdt", rest=rest)
+    book.reset()
+    book.apply(diff(9, 11, bids=[("100.0", "3.0")]))
+    assert wait_for(lambda: book.is_synced)
+    assert rest.calls == 3
+    assert book.top(1) == ([(100.0, 3.0)], [(101.0, 2.0)])
+    book.close()
+
+def test_unsynced_buffer_is_bounded(monkeypatch):
+    monkeypatch.setattr(local_book, "DEPTH_SNAPSHOT_RETRY_BASE", 60)
+    book = LocalOrderBook("btcusdt", rest=FlakyRest(failures=1))
+    book.reset()
+    for i in range(local_book.DEPTH_BUFFER_LIMIT * 3):
+        book.apply(diff(i, i))
+    assert len(book.buffer) == local_book.DEPTH_BUFFER_LIMIT
+    assert book.buffer[-1].last_id == local_book.DEPTH_BUFFER_LIMIT * 3 - 1
+    book.close()
+    assert book.retry is None
@@ -0,0 +1,144 @@
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+import pytest
+import requests
+import core.rest_client as rest_client
+from core.rest_client import BinanceRest, WeightLimiter
+
+class StubBinance:
+    """
+    A local HTTP server standing in for the Binance REST API. Each path
+    answers from a script of (status, headers, body, delay) replies; the
+    last reply repeats. Every request is logged as (path, params).
+    """
+    def __init__(self):
+        self.scripts = {}
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlsplit(self.path)
+                stub.requests.append((url.path, {k: v[0] for k, v in parse_qs(url.query).items()}))
+                script = stub.scripts.get(url.path) or [(404, {}, {"msg": "unknown"}, 0)]
+                status, headers, body, delay = script.pop(0) if len(script) > 1 else script[0]
+                time.sleep(delay)
+                payload = json.dumps(body).encode()
+                try:
+                    self.send_response(status)
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except OSError:
+                    pass # The client timed out and hung up
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def script(self, path, *replies):
+        self.scripts[path] = [(status, headers, body, delay) for status, headers, body, delay in replies]
+
+    def count(self, path):
+        return sum(1 for p, _ in self.requests if p == path)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def stub():
+    server = StubBinance()
+    yield server
+    server.close()
+
+@pytest.fixture
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(rest_client, "REST_BACKOFF", 0.01)
+
+def test_server_errors_are_retried(stub, fast_backoff):
+    stub.script("/api/v3/depth", (500, {}, {}, 0), (503, {}, {}, 0),
+                (200, {}, {"lastUpdateId": 1, "bids": [], "asks": []}, 0))
+    rest = BinanceRest(base_url=stub.url, retries=3)
+    seen = []
+    rest.add_listener(lambda path, params, data: seen.append(path))
+    assert rest.depth("btcusdt", 100)["lastUpdateId"] == 1
+    assert stub.count("/api/v3/depth") == 3
+    assert stub.requests[-1][1] == {"symbol": "BTCUSDT", "limit": "100"}
+    assert seen == ["/api/v3/depth"] # Listeners only see the successful reply
+    rest.close()
+
+def test_retries_give_up_with_the_last_error(stub, fast_backoff):
+    stub.script("/api/v3/ticker/24hr", (502, {}, {}, 0))
+    rest = BinanceRest(base_url=stub.url, retries=2)
+    with pytest.raises(requests.HTTPError, match="502"):
+        rest.ticker_24hr("btcusdt")
+    assert stub.count("/api/v3/ticker/24hr") == 3
+    rest.close()
+
+def test_client_errors_are_not_retried(stub, fast_backoff):
+    stub.script("/api/v3/klines", (400, {}, {"msg": "Invalid interval"}, 0))
+    rest = BinanceRest(base_url=stub.url, retries=3)
+    with pytest.raises(requests.HTTPError):
+        rest.klines("btcusdt", "7m")
+    assert stub.count("/api/v3/klines") == 1
+    rest.close()
+
+def test_rate_limit_waits_for_retry_after(stub, fast_backoff):
+    stub.script("/api/v3/aggTrades", (429, {"Retry-After": "1"}, {"msg": "Too many requests"}, 0), (200, {}, [], 0))
+    rest = BinanceRest(base_url=stub.url, retries=1)
+    started = time.monotonic()
+    assert rest.agg_trades("btcusdt", limit=10) == []
+    elapsed = time.monotonic() - started
+    assert 0.9 <= elapsed < 5 # Retry-After, not the rest of the weight window
+    assert rest.limiter.waited >= 0.9
+    assert stub.count("/api/v3/aggTrades") == 2
+    rest.close()
+
+def test_used_weight_header_syncs_the_limiter(stub):
+    stub.script("/api/v3/depth", (200, {"X-MBX-USED-WEIGHT-1M": "4321"}, {"lastUpdateId": 1}, 0))
+    rest = BinanceRest(base_url=stub.url)
+    rest.depth("btcusdt", 1000)
+    assert rest.limiter.used == 4321
+    rest.close()
+
+def test_weight_limiter_blocks_until_the_window_resets():
+    limiter = WeightLimiter(limit=10, window=0.3)
+    limiter.acquire(6)
+    started = time.monotonic()
+    limiter.acquire(6) # Over budget: waits for the next window
+    assert time.monotonic() - started >= 0.2
+    assert limiter.used == 6
+
+def test_timeouts_are_retried_then_raised(stub, fast_backoff):
+    stub.script("/api/v3/klines", (200, {}, [], 0.5))
+    rest = BinanceRest(base_url=stub.url, timeout=0.1, retries=1)
+    with pytest.raises(requests.Timeout):
+        rest.klines("btcusdt", "1m")
+    assert stub.count("/api/v3/klines") == 2
+    rest.close()
+
+def test_async_requests_run_concurrently(stub):
+    stub.script("/api/v3/klines", (200, {}, [[0, "1", "1", "1", "1", "1"]], 0.3))
+    rest = BinanceRest(base_url=stub.url, pool_size=4)
+
+    async def fetch_all():
+        return await asyncio.gather(*(rest.klines_async(symbol, "1m", limit=1) for symbol in ("btcusdt", "ethusdt", "bnbusdt", "solusdt")))
+
+    started = time.monotonic()
+    results = asyncio.run(fetch_all())
+    assert time.monotonic() - started < 0.9 # Four 0.3 s requests in parallel, not in sequence
+    assert len(results) == 4 and all(len(rows) == 1 for rows in results)
+    assert sorted(params["symbol"] for _, params in stub.requests) == ["BNBUSDT", "BTCUSDT", "ETHUSDT", "SOLUSDT"]
+    rest.close()
@@ -0,0 +1,44 @@
+from multiprocessing import shared_memory
+from core.engine import Feed
+from core.ingest import TickerPublisher
+from core.shared_state import Seqlock, TickerState
+
+class StubEngine:
+    """Just enough of a MarketEngine for a Publisher: feeds that are never started."""
+    hub = rest = None
+
+    def acquire(self, kind, *args):
+        return Feed(self, (kind,) + args)
+
+    def release(self, feed):
+        pass
+
+def test_seqlock_round_trip():
+    lock = Seqlock(bytearray(Seqlock.nbytes(3)), 0, 3)
+    lock.write((1.0, 2.0, 3.0))
+    lock.write((4.0, 5.0, 6.0))
+    version, values = lock.read()
+    assert version == 2
+    assert values.tolist() == [4.0, 5.0, 6.0]
+
+def test_restarted_publisher_recovers_from_a_torn_write():
+    memory = shared_memory.SharedMemory(create=True, size=TickerState.nbytes())
+    try:
+        reader = TickerState(memory.buf)
+        reader.publish(1.0, 0.1, 1.0, 100.0)
+        # The worker died between the two counter updates of its next write
+        reader.fields.seq[0] += 1
+        assert reader.fields.read(spins=10) is None
+
+        publisher = TickerPublisher(StubEngine(), memory.name, "ticker", ("btcusdt",))
+        publisher.on_update(2.0, 0.2, 2.0, 200.0)
+        read = reader.fields.read(spins=10)
+        assert read is not None
+        assert read[1].tolist() == [2.0, 0.2, 2.0, 200.0]
+        publisher.on_update(3.0, 0.3, 3.0, 300.0)
+        assert reader.fields.read(spins=10)[1].tolist() == [3.0, 0.3, 3.0, 300.0]
+        publisher.close()
+    finally:
+        del reader
+        memory.close()
+        memory.unlink()
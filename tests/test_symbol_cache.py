@@ -0,0 +1,36 @@
+from core.symbol_cache import SymbolCache
+
+class CountingEngine:
+    """Counts references per feed key the way MarketEngine does, without starting anything."""
+    def __init__(self):
+        self.refs = {}
+
+    def acquire(self, *key):
+        self.refs[key] = self.refs.get(key, 0) + 1
+        return key
+
+    def release(self, feed):
+        self.refs[feed] -= 1
+
+    def held(self):
+        return {key for key, refs in self.refs.items() if refs}
+
+def test_stop_releases_feeds_and_start_warms_them_again():
+    engine = CountingEngine()
+    cache = SymbolCache(engine, capacity=3, interval="1m", stream_type="aggTrade")
+    cache.touch("btcusdt")
+    cache.touch("ethusdt")
+    assert len(engine.held()) == 6
+
+    cache.stop()
+    assert engine.held() == set()
+    # Viewed while suspended: remembered, but nothing is acquired
+    cache.touch("solusdt")
+    assert engine.held() == set()
+    assert cache.symbols() == ["solusdt", "ethusdt", "btcusdt"]
+
+    cache.start()
+    assert engine.held() == {key for symbol in ("btcusdt", "ethusdt", "solusdt") for key in cache.wanted(symbol)}
+    assert all(refs == 1 for refs in engine.refs.values())
+    cache.clear()
+    assert engine.held() == set()
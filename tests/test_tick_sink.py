@@ -0,0 +1,31 @@
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.dataset as ds
+from core.metrics import Metrics
+from core.tick_sink import TickSink
+
+NOW = 1_700_000_000_000_000 # µs, 2023-11-14 UTC
+
+def write_batch(sink, symbol, price):
+    code = sink.symbol_code(symbol)
+    for i in range(4):
+        sink.append("ticker", (NOW + i, code, price, 0.0, 0.0, 1.0))
+    table, buffer = sink.queue.get_nowait()
+    sink.write(table, buffer)
+
+@pytest.mark.parametrize("format", ["parquet", "arrow"])
+def test_new_symbol_between_batches(tmp_path, format):
+    sink = TickSink(str(tmp_path), format=format, batch_rows=4, file_seconds=3600, metrics=Metrics())
+    write_batch(sink, "btcusdt", 1.0)
+    # A second feed starts after the first batch was written to the same file
+    write_batch(sink, "ethusdt", 2.0)
+    for table in list(sink.writers):
+        sink.close_writer(table)
+
+    assert sink.rows["ticker"].value == 8
+    assert sink.dropped["ticker"].value == 0
+    files = list((tmp_path / "ticker" / "date=2023-11-14").iterdir())
+    assert len(files) == 1
+    rows = ds.dataset(str(files[0]), format="parquet" if format == "parquet" else "ipc").to_table().to_pylist()
+    assert [(row["symbol"], row["price"]) for row in rows] == [("btcusdt", 1.0)] * 4 + [("ethusdt", 2.0)] * 4